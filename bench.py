@@ -0,0 +1,736 @@
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import json
+import csv
+import time
+import shutil
+import random
+import argparse
+import platform
+from operator import itemgetter
+from contextlib import redirect_stdout
+import tempfile
+import sqlite3
+import subprocess
+import db
+import csv_import
+
+try:
+    import resource
+except ImportError:
+    # Windowsではresourceモジュールが使えない
+    resource = None
+
+try:
+    import numpy
+except ImportError:
+    # NumPyは変換方式の比較にだけ使う（インポート処理では使わない）
+    numpy = None
+
+# ベンチマーク用の合成データのカラム定義（CSVカラム名, DBカラム名, データ型）
+BENCH_COLUMNS = [
+    ('ID', 'id', 'INTEGER'),
+    ('名前', 'name', 'TEXT'),
+    ('年齢', 'age', 'INTEGER'),
+    ('部署', 'department', 'TEXT'),
+    ('入社日', 'hire_date', 'TEXT'),
+    ('給与', 'salary', 'REAL'),
+]
+
+DEPARTMENTS = ['営業部', '人事部', '技術部', '総務部', '経理部']
+
+# importベンチマークの合成データのデータ型の構成（「データ型:比」をカンマ区切り）
+DEFAULT_TYPE_MIX = 'TEXT:2,INTEGER:2,REAL:1,DATE:1'
+
+# importベンチマークの合成データの文字コード
+BENCH_ENCODINGS = ('utf-8', 'shift_jis')
+
+# 合成データのTEXTのセルに混ぜる、引用符で囲む必要がある値（カンマ・引用符・改行を含む）
+QUOTED_SAMPLES = ['東京都,千代田区', '"至急"の案件', '1行目\n2行目']
+
+# 合成データのデータ型（DECIMALは小数点以下2桁）と、値を生成する関数
+SYNTHETIC_TYPES = {
+    'TEXT': ('TEXT', lambda rng: f"{rng.choice(DEPARTMENTS)}{rng.randint(0, 99999)}"),
+    'INTEGER': ('INTEGER', lambda rng: str(rng.randint(-1000000, 1000000))),
+    'REAL': ('REAL', lambda rng: f"{rng.uniform(-1000, 1000):.3f}"),
+    'DATE': ('DATE', lambda rng: f"20{rng.randint(10, 25)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"),
+    'DATETIME': ('DATETIME', lambda rng: f"20{rng.randint(10, 25)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+                                         f" {rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:{rng.randint(0, 59):02d}"),
+    'BOOLEAN': ('BOOLEAN', lambda rng: rng.choice(['true', 'false'])),
+    'DECIMAL': ('DECIMAL(12,2)', lambda rng: f"{rng.uniform(0, 100000):.2f}"),
+}
+
+def peak_rss_mb():
+    """プロセスのピークRSS（MB）を取得"""
+    if resource is None:
+        return None
+    # Linuxではキロバイト単位、macOSではバイト単位
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin':
+        return rss / (1024 * 1024)
+    return rss / 1024
+
+def generate_csv(work_dir, base_name, rows, seed=0):
+    """合成CSVファイルと設定ファイルを生成し、(csv_path, config_path)を返す"""
+    rng = random.Random(seed)
+    csv_path = os.path.join(work_dir, f"{base_name}.csv")
+    config_path = os.path.join(work_dir, f"{base_name}.json")
+
+    with open(csv_path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow([col[0] for col in BENCH_COLUMNS])
+        for i in range(1, rows + 1):
+            writer.writerow([
+                i,
+                f"社員{i}",
+                rng.randint(20, 65),
+                rng.choice(DEPARTMENTS),
+                f"20{rng.randint(10, 25)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+                round(rng.uniform(200000, 800000), 2),
+            ])
+
+    config = {
+        'table_name': base_name,
+        'csv_settings': {
+            'encoding': 'utf-8',
+            'delimiter': ',',
+            'has_header': True
+        },
+        'column_mappings': [
+            {'csv_column': c, 'db_column': d, 'data_type': t}
+            for c, d, t in BENCH_COLUMNS
+        ]
+    }
+    with open(config_path, 'w', encoding='utf-8') as f:
+        json.dump(config, f, ensure_ascii=False, indent=2)
+
+    return csv_path, config_path
+
+def import_legacy(csv_path, config):
+    """従来のリスト一括方式でインポート（比較用）"""
+    headers, data = csv_import.read_csv_data(csv_path, config)
+    csv_import.create_table_from_config(config)
+    mapped_data = csv_import.map_csv_data(headers, data, config)
+    db.insert_csv_data(config['table_name'], mapped_data)
+    return len(mapped_data)
+
+def import_stream(csv_path, config):
+    """ストリーミング方式でインポート"""
+    headers = csv_import.read_csv_header(csv_path, config)
+    csv_import.create_table_from_config(config)
+    batches = csv_import.read_csv_batches(csv_path, config, csv_import.get_batch_size(config))
+    bulk_profile = config.get('bulk_profile', db.DEFAULT_BULK_PROFILE)
+    return db.insert_csv_batches(config['table_name'], csv_import.map_csv_batches(headers, batches, config), bulk_profile)
+
+def run_stream_once(rows, mode, batch_size, bulk_profile=db.DEFAULT_BULK_PROFILE, base_dir=None):
+    """1回分の計測（ピークRSSを分離するため子プロセスで実行される）"""
+    work_dir = tempfile.mkdtemp(prefix='cy_bench_', dir=base_dir)
+    try:
+        db.DB_PATH = os.path.join(work_dir, 'bench.db')
+        db.init_database()
+
+        csv_path, config_path = generate_csv(work_dir, 'bench_stream', rows)
+        config = csv_import.load_config(config_path)
+        config['batch_size'] = batch_size
+        config['bulk_profile'] = bulk_profile
+
+        baseline_rss = peak_rss_mb()
+        start = time.perf_counter()
+        if mode == 'legacy':
+            row_count = import_legacy(csv_path, config)
+        else:
+            row_count = import_stream(csv_path, config)
+        elapsed = time.perf_counter() - start
+
+        return {
+            'mode': mode,
+            'rows': row_count,
+            'batch_size': batch_size if mode == 'stream' else None,
+            'bulk_profile': bulk_profile if mode == 'stream' else None,
+            'csv_mb': round(os.path.getsize(csv_path) / (1024 * 1024), 1),
+            'seconds': round(elapsed, 2),
+            'rows_per_sec': round(row_count / elapsed) if elapsed else None,
+            'baseline_rss_mb': baseline_rss and round(baseline_rss, 1),
+            'peak_rss_mb': baseline_rss and round(peak_rss_mb(), 1),
+        }
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+def cmd_profiles(options):
+    """一括ロードプロファイルごとの行/秒を計測"""
+    results = []
+    for profile in options.profiles:
+        args = ['_stream-once', str(options.rows), 'stream', str(options.batch_size), '--profile', profile]
+        if options.dir:
+            args += ['--dir', options.dir]
+        result = run_isolated(args)
+        if result:
+            print(json.dumps(result, ensure_ascii=False))
+            results.append(result)
+    return results
+
+def cmd_chunks(options):
+    """ファイル内並列読み込みのワーカー数ごとの行/秒を計測"""
+    work_dir = tempfile.mkdtemp(prefix='cy_bench_', dir=options.dir)
+    results = []
+    try:
+        csv_path, config_path = generate_csv(work_dir, 'bench_chunks', options.rows)
+        config = csv_import.load_config(config_path)
+        headers = csv_import.read_csv_header(csv_path, config)
+
+        for workers in options.workers:
+            db.DB_PATH = os.path.join(work_dir, f"bench_{workers}.db")
+            db.init_database()
+            csv_import.create_table_from_config(config)
+
+            start = time.perf_counter()
+            if workers > 1:
+                chunks = csv_import.plan_csv_chunks(csv_path, config, options.chunk_mb * 1024 * 1024)
+                batches = csv_import.read_csv_chunks(csv_path, config, headers, chunks, workers, [])
+            else:
+                chunks = None
+                batches = csv_import.map_csv_batches(
+                    headers, csv_import.read_csv_batches(csv_path, config, csv_import.DEFAULT_BATCH_SIZE), config)
+            row_count = db.insert_csv_batches(config['table_name'], batches)
+            elapsed = time.perf_counter() - start
+
+            result = {
+                'workers': workers,
+                'chunks': len(chunks) if chunks else None,
+                'rows': row_count,
+                'seconds': round(elapsed, 2),
+                'rows_per_sec': round(row_count / elapsed),
+                'cpu_count': os.cpu_count(),
+            }
+            print(json.dumps(result, ensure_ascii=False))
+            results.append(result)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return results
+
+def legacy_fetch_one(task_id):
+    """変更前のfetch_one（呼び出しごとに接続を開閉する実装、比較用）"""
+    conn = sqlite3.connect(db.DB_PATH)
+    conn.row_factory = sqlite3.Row
+    cursor = conn.cursor()
+    cursor.execute('SELECT * FROM tasks WHERE id = ?', (task_id,))
+    row = cursor.fetchone()
+    conn.close()
+    return dict(row) if row else None
+
+def cmd_pool(options):
+    """fetch_oneを繰り返し呼んだときの接続プールの効果を計測"""
+    work_dir = tempfile.mkdtemp(prefix='cy_bench_', dir=options.dir)
+    try:
+        db.DB_PATH = os.path.join(work_dir, 'bench_pool.db')
+        db.init_database()
+        for i in range(options.tasks):
+            db.insert({'id': f"task{i}", 'name': f"タスク{i}", 'tags': ['bench']})
+        task_ids = [f"task{i % options.tasks}" for i in range(options.calls)]
+
+        legacy = time_best(lambda: [legacy_fetch_one(task_id) for task_id in task_ids], options.repeat)
+        pooled = time_best(lambda: [db.fetch_one(task_id) for task_id in task_ids], options.repeat)
+        result = {
+            'calls': options.calls,
+            'per_call_connect_sec': round(legacy, 3),
+            'pooled_sec': round(pooled, 3),
+            'per_call_connect_us': round(legacy / options.calls * 1e6, 1),
+            'pooled_us': round(pooled / options.calls * 1e6, 1),
+            'speedup': round(legacy / pooled, 2),
+        }
+        print(json.dumps(result, ensure_ascii=False))
+        return result
+    finally:
+        db.get_database().close()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+def legacy_get_table_data(table_name, limit, offset):
+    """変更前のget_table_data（OFFSETと毎回のCOUNT(*)、比較用）"""
+    conn = sqlite3.connect(db.DB_PATH)
+    cursor = conn.cursor()
+    cursor.execute(f"SELECT * FROM {table_name} ORDER BY rowid LIMIT ? OFFSET ?", (limit, offset))
+    data = cursor.fetchall()
+    cursor.execute(f"SELECT COUNT(*) FROM {table_name}")
+    total_count = cursor.fetchone()[0]
+    conn.close()
+    return data, total_count
+
+def cmd_pagination(options):
+    """ページの深さごとにOFFSET方式とシーク方式の取得時間を比較"""
+    work_dir = tempfile.mkdtemp(prefix='cy_bench_', dir=options.dir)
+    results = []
+    try:
+        db.DB_PATH = os.path.join(work_dir, 'bench_pagination.db')
+        db.init_database()
+        db.create_import_table('bench_pages', [{'name': 'id', 'type': 'INTEGER'}, {'name': 'name', 'type': 'TEXT'}])
+
+        # 連番の行を生成して挿入（rowidは1からの連番になる）
+        def batches():
+            for start in range(0, options.rows, csv_import.DEFAULT_BATCH_SIZE):
+                end = min(start + csv_import.DEFAULT_BATCH_SIZE, options.rows)
+                yield [(i, f"name{i}") for i in range(start + 1, end + 1)]
+        db.insert_csv_batches('bench_pages', batches())
+
+        last_page = (options.rows + options.limit - 1) // options.limit
+        for page in sorted({p for p in options.pages if p <= last_page} | {last_page}):
+            offset = (page - 1) * options.limit
+            legacy = time_best(lambda: legacy_get_table_data('bench_pages', options.limit, offset), options.repeat)
+            seek = time_best(lambda: db.get_table_page('bench_pages', options.limit, after=offset or None), options.repeat)
+            result = {
+                'rows': options.rows,
+                'page': page,
+                'offset_ms': round(legacy * 1000, 2),
+                'seek_ms': round(seek * 1000, 2),
+            }
+            print(json.dumps(result, ensure_ascii=False))
+            results.append(result)
+    finally:
+        db.get_database().close()
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return results
+
+def legacy_map_csv_data(headers, data, config):
+    """変更前のmap_csv_data（セルごとに型分岐する実装、比較用）"""
+    column_mappings = config['column_mappings']
+    header_to_index = {}
+    if headers:
+        for i, header in enumerate(headers):
+            header_to_index[header] = i
+
+    mapped_data = []
+    for row in data:
+        mapped_row = []
+        for mapping in column_mappings:
+            csv_column = mapping['csv_column']
+            data_type = mapping['data_type']
+            value = ""
+            if headers:
+                if csv_column in header_to_index:
+                    idx = header_to_index[csv_column]
+                    if idx < len(row):
+                        value = row[idx]
+            else:
+                idx = len(mapped_row)
+                if idx < len(row):
+                    value = row[idx]
+            if data_type.upper() == 'INTEGER':
+                try:
+                    value = int(value) if value.strip() else 0
+                except ValueError:
+                    value = 0
+            elif data_type.upper() == 'REAL':
+                try:
+                    value = float(value) if value.strip() else 0.0
+                except ValueError:
+                    value = 0.0
+            else:
+                value = str(value)
+            mapped_row.append(value)
+        mapped_data.append(mapped_row)
+    return mapped_data
+
+def make_mapping_fixture(columns, rows, seed=0):
+    """カラム数を指定してマッピング計測用のヘッダー・行・設定を生成"""
+    rng = random.Random(seed)
+    types = ['TEXT', 'INTEGER', 'REAL']
+    headers = [f"col{i}" for i in range(columns)]
+    column_mappings = [
+        {'csv_column': header, 'db_column': header, 'data_type': types[i % len(types)]}
+        for i, header in enumerate(headers)
+    ]
+    samples = {
+        'TEXT': lambda: f"text{rng.randint(0, 9999)}",
+        'INTEGER': lambda: str(rng.randint(-100000, 100000)),
+        'REAL': lambda: f"{rng.uniform(-1000, 1000):.3f}",
+    }
+    data = [
+        [samples[mapping['data_type']]() for mapping in column_mappings]
+        for _ in range(rows)
+    ]
+    return headers, data, {'column_mappings': column_mappings}
+
+def time_best(func, repeat):
+    """関数をrepeat回実行し、最速の実行時間（秒）を返す"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def cmd_mapping(options):
+    """マッピング処理の行/秒をカラム数ごとに新旧比較"""
+    results = []
+    for columns in options.columns:
+        headers, data, config = make_mapping_fixture(columns, options.rows)
+        legacy = time_best(lambda: legacy_map_csv_data(headers, data, config), options.repeat)
+        compiled = time_best(lambda: csv_import.map_csv_data(headers, data, config), options.repeat)
+        result = {
+            'columns': columns,
+            'rows': options.rows,
+            'legacy_rows_per_sec': round(options.rows / legacy),
+            'compiled_rows_per_sec': round(options.rows / compiled),
+            'speedup': round(legacy / compiled, 2),
+        }
+        print(json.dumps(result, ensure_ascii=False))
+        results.append(result)
+    return results
+
+def make_numeric_fixture(columns, rows, invalid_rate, seed=0):
+    """数値カラム（INTEGERとREALが交互）だけの変換計測用のヘッダー・行・設定を生成
+
+    invalid_rateの割合のセルは空欄または変換できない値にする。
+    """
+    rng = random.Random(seed)
+    types = ['INTEGER', 'REAL']
+    headers = [f"num{i}" for i in range(columns)]
+    column_mappings = [
+        {'csv_column': header, 'db_column': header, 'data_type': types[i % len(types)]}
+        for i, header in enumerate(headers)
+    ]
+    samples = {
+        'INTEGER': lambda: str(rng.randint(-1000000, 1000000)),
+        'REAL': lambda: f"{rng.uniform(-1000, 1000):.3f}",
+    }
+    data = [
+        [rng.choice(['', 'N/A']) if rng.random() < invalid_rate else samples[mapping['data_type']]()
+         for mapping in column_mappings]
+        for _ in range(rows)
+    ]
+    return headers, data, {'column_mappings': column_mappings}
+
+def wrapped_convert_rows(headers, data, config):
+    """変更前の行変換（数値のセルごとにCOLUMN_CONVERTERSの関数を呼ぶ実装、比較用）"""
+    typed_columns = [(i, csv_import.COLUMN_CONVERTERS[mapping['data_type'].upper()])
+                     for i, mapping in enumerate(config['column_mappings'])]
+    getter = itemgetter(*range(len(typed_columns)))
+    mapped_data = []
+    for row in data:
+        values = list(getter(row))
+        for i, convert in typed_columns:
+            values[i] = convert(values[i])
+        mapped_data.append(values)
+    return mapped_data
+
+def numpy_convert_rows(headers, data, config):
+    """NumPyでカラムごとに一括変換する実装（比較用）
+
+    変換できない値を含むカラムは、セルごとの変換に戻す（空欄・不正値は0/0.0）。
+    SQLiteに渡すため、変換後はPythonの値のリストに戻す。
+    """
+    converted = []
+    for mapping, column in zip(config['column_mappings'], zip(*data)):
+        data_type = mapping['data_type'].upper()
+        try:
+            values = numpy.array(column, dtype='S').astype(
+                numpy.int64 if data_type == 'INTEGER' else numpy.float64).tolist()
+        except (ValueError, OverflowError, UnicodeEncodeError):
+            values = [csv_import.COLUMN_CONVERTERS[data_type](value) for value in column]
+        converted.append(values)
+    return [list(row) for row in zip(*converted)]
+
+def cmd_convert(options):
+    """数値カラムの型変換のセル/秒を変換方式ごとに比較
+
+    batch_rows行のデータをcells個のセルに達するまで繰り返し変換し、合計時間を計測する。
+    """
+    headers, data, config = make_numeric_fixture(options.columns, options.batch_rows, options.invalid_rate)
+    batch_cells = options.columns * options.batch_rows
+    batch_count = max(options.cells // batch_cells, 1)
+    cells = batch_cells * batch_count
+
+    methods = [
+        ('per-cell', wrapped_convert_rows),
+        ('fast-path', csv_import.map_csv_data),
+        ('numpy', numpy_convert_rows if numpy is not None else None),
+    ]
+    expected = wrapped_convert_rows(headers, data, config)
+
+    results = []
+    for name, convert in methods:
+        result = {'method': name, 'cells': cells, 'invalid_rate': options.invalid_rate}
+        if convert is None:
+            result['skipped'] = 'numpyがインストールされていません'
+        else:
+            if convert(headers, data, config) != expected:
+                result['mismatch'] = True
+            elapsed = 0.0
+            for _ in range(batch_count):
+                start = time.perf_counter()
+                convert(headers, data, config)
+                elapsed += time.perf_counter() - start
+            result['seconds'] = round(elapsed, 2)
+            result['cells_per_sec'] = round(cells / elapsed)
+        print(json.dumps(result, ensure_ascii=False))
+        results.append(result)
+    return results
+
+def parse_type_mix(text):
+    """「データ型:比,...」形式のデータ型の構成を [(データ型, 比), ...] に変換"""
+    type_mix = []
+    for part in text.split(','):
+        data_type, _, weight = part.partition(':')
+        data_type = data_type.strip().upper()
+        try:
+            weight = int(weight) if weight else 1
+        except ValueError:
+            weight = 0
+        if data_type not in SYNTHETIC_TYPES or weight < 1:
+            types = ', '.join(SYNTHETIC_TYPES)
+            raise argparse.ArgumentTypeError(f"データ型の構成は「データ型:比」のカンマ区切りで指定してください（{types}）: {text}")
+        type_mix.append((data_type, weight))
+    return type_mix
+
+def get_mix_types(type_mix, columns):
+    """データ型の構成の比に合わせて、カラムごとのデータ型を割り当てる"""
+    pattern = [data_type for data_type, weight in type_mix for _ in range(weight)]
+    return [pattern[i % len(pattern)] for i in range(columns)]
+
+def generate_import_csv(work_dir, base_name, rows, columns=8, type_mix=DEFAULT_TYPE_MIX, encoding='utf-8',
+                        quote_rate=0.0, seed=0):
+    """カラム数・データ型の構成・文字コード・引用符の割合を指定して合成CSVと設定ファイルを生成
+
+    quote_rateの割合のTEXTのセルは、引用符で囲む必要がある値（カンマ・引用符・改行を含む）にする。
+    (csv_path, config_path)を返す。
+    """
+    rng = random.Random(seed)
+    types = get_mix_types(parse_type_mix(type_mix), columns)
+    headers = [f"{data_type.lower()}{i}" for i, data_type in enumerate(types)]
+    samples = [SYNTHETIC_TYPES[data_type][1] for data_type in types]
+    csv_path = os.path.join(work_dir, f"{base_name}.csv")
+    config_path = os.path.join(work_dir, f"{base_name}.json")
+
+    def make_row():
+        row = [sample(rng) for sample in samples]
+        if quote_rate:
+            for i, data_type in enumerate(types):
+                if data_type == 'TEXT' and rng.random() < quote_rate:
+                    row[i] = rng.choice(QUOTED_SAMPLES)
+        return row
+
+    with open(csv_path, 'w', encoding=encoding, newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(headers)
+        for start in range(0, rows, csv_import.DEFAULT_BATCH_SIZE):
+            writer.writerows(make_row() for _ in range(min(csv_import.DEFAULT_BATCH_SIZE, rows - start)))
+
+    config = {
+        'table_name': base_name,
+        'csv_settings': {
+            'encoding': encoding,
+            'delimiter': ',',
+            'has_header': True
+        },
+        'column_mappings': [
+            {'csv_column': header, 'db_column': header, 'data_type': SYNTHETIC_TYPES[data_type][0]}
+            for header, data_type in zip(headers, types)
+        ]
+    }
+    with open(config_path, 'w', encoding='utf-8') as f:
+        json.dump(config, f, ensure_ascii=False, indent=2)
+
+    return csv_path, config_path
+
+def run_import_once(rows, columns, type_mix, encoding, quote_rate, chunk_workers=1, base_dir=None):
+    """import_csv_fileによる1回分のインポートを計測（ピークRSSを分離するため子プロセスで実行される）
+
+    処理段階ごとの秒数とバッチ数などのカウンタは、import_csv_fileが計測・記録したもの。
+    """
+    work_dir = tempfile.mkdtemp(prefix='cy_bench_', dir=base_dir)
+    try:
+        db.DB_PATH = os.path.join(work_dir, 'bench.db')
+        db.init_database()
+        csv_import.LOG_FOLDER = os.path.join(work_dir, 'log')
+        os.makedirs(csv_import.LOG_FOLDER)
+
+        csv_path, config_path = generate_import_csv(work_dir, 'bench_import', rows, columns, type_mix,
+                                                    encoding, quote_rate)
+        csv_mb = os.path.getsize(csv_path) / (1024 * 1024)
+
+        baseline_rss = peak_rss_mb()
+        timings = {}
+        start = time.perf_counter()
+        with open(os.devnull, 'w', encoding='utf-8') as devnull, redirect_stdout(devnull):
+            success = csv_import.import_csv_file((csv_path, config_path, 'bench_import'), chunk_workers,
+                                                 timings=timings)
+        elapsed = time.perf_counter() - start
+        rss = peak_rss_mb()
+        metrics = db.get_import_metrics(1)
+        counters = metrics[0]['counters'] if metrics else {}
+
+        return {
+            'command': 'import',
+            'rows': rows,
+            'columns': columns,
+            'type_mix': type_mix,
+            'encoding': encoding,
+            'quote_rate': quote_rate,
+            'chunk_workers': chunk_workers,
+            'success': success,
+            'csv_mb': round(csv_mb, 1),
+            'seconds': round(elapsed, 2),
+            'rows_per_sec': round(rows / elapsed) if elapsed else None,
+            'mb_per_sec': round(csv_mb / elapsed, 1) if elapsed else None,
+            'baseline_rss_mb': baseline_rss and round(baseline_rss, 1),
+            'peak_rss_mb': rss and round(rss, 1),
+            'phases': {phase: round(timings[phase], 3) for phase, _ in csv_import.IMPORT_PHASES if phase in timings},
+            'batches': counters.get('batches'),
+            'commit_seconds': counters.get('commit_seconds') and round(counters['commit_seconds'], 3),
+            'conversion_failed_rows': counters.get('conversion_failed_rows', 0),
+            'conversion_errors': counters.get('conversion_errors', 0),
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+        }
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+def cmd_import(options):
+    """合成データをimport_csv_fileで取り込み、行/秒・MB/秒・ピークRSS・処理段階ごとの秒数を計測
+
+    --outputを指定すると、結果をJSONの配列としてファイルに書き出す（バージョン間の比較用）。
+    """
+    results = []
+    for rows in options.rows:
+        for encoding in options.encoding:
+            args = ['_import-once', str(rows), '--columns', str(options.columns), '--types', options.types,
+                    '--encoding', encoding, '--quote-rate', str(options.quote_rate),
+                    '--chunk-workers', str(options.chunk_workers)]
+            if options.dir:
+                args += ['--dir', options.dir]
+            result = run_isolated(args)
+            if result:
+                print(json.dumps(result, ensure_ascii=False))
+                results.append(result)
+
+    if options.output:
+        with open(options.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+    return results
+
+def run_isolated(args):
+    """ベンチマークを子プロセスで実行し、結果のJSONを返す"""
+    result = subprocess.run([sys.executable, os.path.abspath(__file__)] + args,
+                            capture_output=True, text=True, encoding='utf-8')
+    if result.returncode != 0:
+        print(result.stderr, file=sys.stderr)
+        return None
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def cmd_stream(options):
+    """ストリーミングインポートのRSSと処理速度を計測"""
+    results = []
+    for rows in options.rows:
+        for mode in options.modes:
+            result = run_isolated(['_stream-once', str(rows), mode, str(options.batch_size)])
+            if result:
+                print(json.dumps(result, ensure_ascii=False))
+                results.append(result)
+    return results
+
+def main():
+    """メイン処理"""
+    parser = argparse.ArgumentParser(description='Container Yard インポートベンチマーク')
+    sub = parser.add_subparsers(dest='command')
+
+    p = sub.add_parser('stream', help='ストリーミングインポートのRSS・行/秒を計測')
+    p.add_argument('--rows', type=int, nargs='+', default=[1000000, 10000000])
+    p.add_argument('--modes', nargs='+', choices=['stream', 'legacy'], default=['stream'])
+    p.add_argument('--batch-size', type=int, default=csv_import.DEFAULT_BATCH_SIZE)
+
+    p = sub.add_parser('mapping', help='カラムマッピングの行/秒をカラム数ごとに新旧比較')
+    p.add_argument('--columns', type=int, nargs='+', default=[5, 10, 20, 40])
+    p.add_argument('--rows', type=int, default=100000)
+    p.add_argument('--repeat', type=int, default=3)
+
+    p = sub.add_parser('convert', help='数値カラムの型変換のセル/秒を変換方式ごとに比較（NumPyを含む）')
+    p.add_argument('--cells', type=int, default=10000000)
+    p.add_argument('--columns', type=int, default=10)
+    p.add_argument('--batch-rows', type=int, default=50000)
+    p.add_argument('--invalid-rate', type=float, default=0.001)
+
+    p = sub.add_parser('import', help='合成データのインポートの行/秒・MB/秒・ピークRSS・処理段階ごとの秒数を計測')
+    p.add_argument('--rows', type=int, nargs='+', default=[1000000])
+    p.add_argument('--columns', type=int, default=8)
+    p.add_argument('--types', type=str, default=DEFAULT_TYPE_MIX,
+                   help=f'データ型の構成「データ型:比」のカンマ区切り（既定: {DEFAULT_TYPE_MIX}）')
+    p.add_argument('--encoding', nargs='+', choices=BENCH_ENCODINGS, default=['utf-8'])
+    p.add_argument('--quote-rate', type=float, default=0.0,
+                   help='引用符で囲む値にするTEXTのセルの割合（0〜1）')
+    p.add_argument('--chunk-workers', type=int, default=1)
+    p.add_argument('--output', help='結果をJSONの配列として書き出すファイル')
+    p.add_argument('--dir', help='DB・CSVを作成するディレクトリ')
+
+    p = sub.add_parser('profiles', help='一括ロードプロファイルごとの行/秒を計測')
+    p.add_argument('--rows', type=int, default=1000000)
+    p.add_argument('--profiles', nargs='+', choices=list(db.BULK_LOAD_PROFILES), default=list(db.BULK_LOAD_PROFILES))
+    p.add_argument('--batch-size', type=int, default=csv_import.DEFAULT_BATCH_SIZE)
+    p.add_argument('--dir', help='DB・CSVを作成するディレクトリ（計測したいディスク上を指定）')
+
+    p = sub.add_parser('chunks', help='ファイル内並列読み込みのワーカー数ごとの行/秒を計測')
+    p.add_argument('--rows', type=int, default=1000000)
+    p.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    p.add_argument('--chunk-mb', type=int, default=csv_import.PARALLEL_CHUNK_BYTES // (1024 * 1024))
+    p.add_argument('--dir', help='DB・CSVを作成するディレクトリ')
+
+    p = sub.add_parser('pool', help='fetch_oneの接続プールあり・なしを比較')
+    p.add_argument('--calls', type=int, default=10000)
+    p.add_argument('--tasks', type=int, default=1000)
+    p.add_argument('--repeat', type=int, default=3)
+    p.add_argument('--dir', help='DBを作成するディレクトリ')
+
+    p = sub.add_parser('pagination', help='ページの深さごとにOFFSET方式とシーク方式を比較')
+    p.add_argument('--rows', type=int, default=2000000)
+    p.add_argument('--limit', type=int, default=50)
+    p.add_argument('--pages', type=int, nargs='+', default=[1, 100, 1000, 10000])
+    p.add_argument('--repeat', type=int, default=3)
+    p.add_argument('--dir', help='DBを作成するディレクトリ')
+
+    p = sub.add_parser('_import-once')
+    p.add_argument('rows', type=int)
+    p.add_argument('--columns', type=int)
+    p.add_argument('--types')
+    p.add_argument('--encoding')
+    p.add_argument('--quote-rate', type=float)
+    p.add_argument('--chunk-workers', type=int)
+    p.add_argument('--dir')
+
+    p = sub.add_parser('_stream-once')
+    p.add_argument('rows', type=int)
+    p.add_argument('mode')
+    p.add_argument('batch_size', type=int)
+    p.add_argument('--profile', default=db.DEFAULT_BULK_PROFILE)
+    p.add_argument('--dir')
+
+    options = parser.parse_args()
+
+    if options.command == 'stream':
+        cmd_stream(options)
+    elif options.command == 'profiles':
+        cmd_profiles(options)
+    elif options.command == 'chunks':
+        cmd_chunks(options)
+    elif options.command == 'pool':
+        cmd_pool(options)
+    elif options.command == 'pagination':
+        cmd_pagination(options)
+    elif options.command == 'mapping':
+        cmd_mapping(options)
+    elif options.command == 'convert':
+        cmd_convert(options)
+    elif options.command == 'import':
+        cmd_import(options)
+    elif options.command == '_import-once':
+        result = run_import_once(options.rows, options.columns, options.types, options.encoding,
+                                 options.quote_rate, options.chunk_workers, options.dir)
+        print(json.dumps(result, ensure_ascii=False))
+    elif options.command == '_stream-once':
+        result = run_stream_once(options.rows, options.mode, options.batch_size, options.profile, options.dir)
+        print(json.dumps(result, ensure_ascii=False))
+    else:
+        parser.print_help()
+
+if __name__ == '__main__':
+    main()
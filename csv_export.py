@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+"""
+インポート済みテーブルのエクスポート
+
+テーブル全体（または絞り込んだ行）をCSVまたはJSON Lines（NDJSON）で出力する。
+行はdb.export_tableで一定の行数ずつ読み込み、そのまま出力先に書き出すため、
+テーブルの大きさに関係なくメモリ使用量は一定。gzip圧縮しながら出力することもできる。
+"""
+
+import io
+import sys
+import csv
+import gzip
+import json
+import argparse
+import db
+
+# 出力形式（形式名 → (Content-Type, 拡張子)）
+EXPORT_FORMATS = {
+    'csv': ('text/csv', '.csv'),
+    'ndjson': ('application/x-ndjson', '.ndjson'),
+}
+DEFAULT_EXPORT_FORMAT = 'csv'
+
+# CSVの出力に使える文字コード（utf-8-sigはExcelで開く場合向け）
+EXPORT_ENCODINGS = ('utf-8', 'utf-8-sig', 'cp932')
+DEFAULT_EXPORT_ENCODING = 'utf-8'
+
+# gzipの圧縮レベル（出力の速度を優先。20万行のCSVで9: 7.0秒、6: 4.9秒、1: 1.0秒、サイズの差は2割程度）
+EXPORT_COMPRESS_LEVEL = 1
+
+def get_export_filename(table_name, export_format=DEFAULT_EXPORT_FORMAT, compress=False):
+    """ダウンロード時のファイル名を取得"""
+    filename = table_name + EXPORT_FORMATS[export_format][1]
+    return filename + '.gz' if compress else filename
+
+def get_content_type(export_format=DEFAULT_EXPORT_FORMAT, compress=False):
+    """出力のContent-Typeを取得"""
+    if compress:
+        return 'application/gzip'
+    content_type = EXPORT_FORMATS[export_format][0]
+    return f"{content_type}; charset=UTF-8" if export_format == 'ndjson' else content_type
+
+def write_export(stream, columns, batches, export_format=DEFAULT_EXPORT_FORMAT, compress=False,
+                 encoding=DEFAULT_EXPORT_ENCODING):
+    """行のバッチを順に出力先（バイナリのストリーム）に書き出し、書き出した行数を返す
+    
+    バッチごとに出力先までフラッシュするため、受け取り側は全件の読み込みを待たずに処理を始められる。
+    NDJSONは常にUTF-8で、1行に1レコードのJSONオブジェクト（キーはカラム名）を書き出す。
+    """
+    gzip_stream = gzip.GzipFile(fileobj=stream, mode='wb', compresslevel=EXPORT_COMPRESS_LEVEL) if compress else None
+    if export_format == 'ndjson':
+        encoding = 'utf-8'
+    text = io.TextIOWrapper(gzip_stream or stream, encoding=encoding, errors='replace', newline='')
+    
+    row_count = 0
+    try:
+        if export_format == 'csv':
+            writer = csv.writer(text)
+            writer.writerow(columns)
+            for batch in batches:
+                writer.writerows(batch)
+                row_count += len(batch)
+                text.flush()
+                stream.flush()
+        else:
+            for batch in batches:
+                text.write(''.join(json.dumps(dict(zip(columns, row)), ensure_ascii=False, default=str) + '\n'
+                                   for row in batch))
+                row_count += len(batch)
+                text.flush()
+                stream.flush()
+    finally:
+        # 出力先は閉じずに、圧縮の終端までを書き出す
+        text.flush()
+        text.detach()
+        if gzip_stream:
+            gzip_stream.close()
+        stream.flush()
+    
+    return row_count
+
+def parse_filter(text):
+    """「カラム名:演算子:値」形式の絞り込み条件を (カラム名, 演算子, 値) に変換"""
+    parts = text.split(':', 2)
+    if len(parts) != 3:
+        raise argparse.ArgumentTypeError(f"絞り込み条件は「カラム名:演算子:値」の形式で指定してください: {text}")
+    return tuple(parts)
+
+def main():
+    """メイン処理"""
+    parser = argparse.ArgumentParser(description='インポート済みテーブルのエクスポート')
+    parser.add_argument('table', help='エクスポートするテーブル名')
+    parser.add_argument('--format', choices=list(EXPORT_FORMATS), default=DEFAULT_EXPORT_FORMAT,
+                        help='出力形式（既定: csv）')
+    parser.add_argument('--gzip', action='store_true',
+                        help='gzip圧縮して出力する')
+    parser.add_argument('--encoding', choices=EXPORT_ENCODINGS, default=DEFAULT_EXPORT_ENCODING,
+                        help='CSVの文字コード（既定: utf-8）')
+    parser.add_argument('--filter', type=parse_filter, action='append', default=[],
+                        help='絞り込み条件「カラム名:演算子:値」（演算子は eq, gt, ge, lt, le, prefix。複数指定可）')
+    parser.add_argument('--sort', help='並び替えのカラム（既定: 取り込み順）')
+    parser.add_argument('--desc', action='store_true',
+                        help='降順に並べる')
+    parser.add_argument('-o', '--output',
+                        help='出力ファイル（既定: 標準出力）')
+    args = parser.parse_args()
+    
+    try:
+        columns, batches = db.export_table(args.table, args.filter, args.sort, args.desc)
+    except ValueError as e:
+        print(f"エクスポートエラー: {e}", file=sys.stderr)
+        sys.exit(1)
+    if columns is None:
+        print(f"テーブル '{args.table}' は存在しません", file=sys.stderr)
+        sys.exit(1)
+    
+    if args.output:
+        with open(args.output, 'wb') as f:
+            row_count = write_export(f, columns, batches, args.format, args.gzip, args.encoding)
+    else:
+        row_count = write_export(sys.stdout.buffer, columns, batches, args.format, args.gzip, args.encoding)
+    print(f"{row_count} 行をエクスポートしました", file=sys.stderr)
+
+if __name__ == '__main__':
+    main()
@@ -1,12 +1,30 @@
 # -*- coding: utf-8 -*-
 
 import os
+import re
 import json
 import csv
 import shutil
 import sys
-from datetime import datetime
+import io
+import time
+import codecs
+import hashlib
+import argparse
+import multiprocessing
+import queue
+import cProfile
+import pstats
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from collections import deque
+from contextlib import redirect_stdout, redirect_stderr
+from datetime import datetime, date
+from functools import lru_cache
+from itertools import islice
+from operator import itemgetter
 import db
+import snapshot
 
 # フォルダパス設定
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -14,18 +32,85 @@ IMPORT_FOLDER = os.path.join(SCRIPT_DIR, 'import')
 LOG_FOLDER = os.path.join(SCRIPT_DIR, 'log')
 DB_FILE = os.path.join(SCRIPT_DIR, 'container_yard.db')
 
+# ストリーミングインポートの既定バッチサイズ（行数）
+DEFAULT_BATCH_SIZE = 50000
+
+# 並列インポート時、ファイルごとに書き込み待ちにできるバッチ数（メモリ上限）
+PARALLEL_QUEUE_DEPTH = 2
+
+# ファイル内並列読み込みの1チャンクあたりのバイト数
+PARALLEL_CHUNK_BYTES = 8 * 1024 * 1024
+
+# バイト単位でレコード境界を探せる文字コード
+# （マルチバイト文字の途中に改行・引用符と同じバイトが現れないもの）
+CHUNK_SAFE_CODECS = {'utf-8', 'utf-8-sig', 'ascii', 'shift_jis', 'cp932', 'euc_jp', 'iso8859-1', 'cp1252'}
+
+# ファイルのハッシュを計算するときの読み込み単位（バイト）
+HASH_BLOCK_SIZE = 1024 * 1024
+
+# 行数の見込みに使う、ファイル先頭のサンプルのバイト数
+ROW_ESTIMATE_SAMPLE_BYTES = 1024 * 1024
+
+# 文字コードの判定・確認に使うサンプル（先頭を含め、ファイル全体から均等に抜き出すブロックの数と大きさ）
+ENCODING_SAMPLE_BLOCKS = 8
+ENCODING_SAMPLE_BYTES = 64 * 1024
+
+# "encoding": "auto" の場合にBOMから判定する文字コード
+ENCODING_BOMS = [
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+]
+
+# BOMがない場合に試す文字コード（utf-8でデコードできなければ、日本語の文字が多くなる方を選ぶ）
+AUTO_ENCODINGS = ('utf-8', 'cp932', 'euc_jp')
+
+# 取り込み済みと同じCSV・設定の組を見つけたときの扱い
+# log: 取り込まずにlogフォルダへ移動（ファイル名に_duplicateを付ける）
+# skip: 取り込まずにimportフォルダに残す
+# import: 重複を確認せずに取り込む
+DUPLICATE_POLICIES = ('log', 'skip', 'import')
+DEFAULT_DUPLICATE_POLICY = 'log'
+
+# 取り込まれるデータに影響しない設定項目（重複判定では無視する）
+FINGERPRINT_IGNORED_KEYS = {'batch_size', 'bulk_profile', 'checkpoint', 'on_duplicate', 'defer_indexes', 'snapshot',
+                            'metrics', 'reject_file', 'max_conversion_errors'}
+
+# リジェクトファイル（変換できない値の一覧）のヘッダー行
+REJECT_FILE_HEADER = ['row_number', 'column', 'data_type', 'value']
+
+# --profile・--trace-memoryで表示する上位の件数
+PROFILE_TOP_COUNT = 20
+
+# インポートの処理段階と表示名（処理時間の表示順）
+IMPORT_PHASES = [
+    ('hash', 'ハッシュ計算'),
+    ('create', 'テーブル作成'),
+    ('read', '読み込み'),
+    ('map', '変換'),
+    ('parse', '読み込み・変換'),  # 読み込みと変換を別に計測できない場合（ワーカープロセスで行う場合）
+    ('insert', '挿入'),
+    ('index', 'インデックス作成'),
+    ('analyze', '統計情報更新'),
+    ('move', 'ファイル移動'),
+]
+
 def ensure_folders():
     """必要なフォルダが存在することを確認"""
     os.makedirs(IMPORT_FOLDER, exist_ok=True)
     os.makedirs(LOG_FOLDER, exist_ok=True)
 
-def move_to_log(csv_path, config_path, base_name):
-    """処理済みファイルをlogフォルダに移動"""
-    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+def move_to_log(csv_path, config_path, base_name, marker=None, timestamp=None):
+    """処理済みファイルをlogフォルダに移動（markerを指定するとファイル名の末尾に付ける）
+    
+    timestampを指定すると、現在時刻の代わりにファイル名に使う（リジェクトファイルと名前を揃える場合）。
+    """
+    timestamp = timestamp or datetime.now().strftime('%Y%m%d_%H%M%S')
+    suffix = f"_{marker}" if marker else ""
     
     # 新しいファイル名を生成
-    new_csv_name = f"{base_name}_{timestamp}.csv"
-    new_config_name = f"{base_name}_{timestamp}.json"
+    new_csv_name = f"{base_name}_{timestamp}{suffix}.csv"
+    new_config_name = f"{base_name}_{timestamp}{suffix}.json"
     
     new_csv_path = os.path.join(LOG_FOLDER, new_csv_name)
     new_config_path = os.path.join(LOG_FOLDER, new_config_name)
@@ -66,6 +151,95 @@ def validate_config(config):
             print(f"CSV設定に必須項目 '{key}' がありません", file=sys.stderr)
             return False
     
+    # 一括ロードプロファイル（任意）
+    bulk_profile = config.get('bulk_profile', db.DEFAULT_BULK_PROFILE)
+    if bulk_profile not in db.BULK_LOAD_PROFILES:
+        profiles = ', '.join(db.BULK_LOAD_PROFILES)
+        print(f"bulk_profile '{bulk_profile}' は不正です（{profiles} のいずれか）", file=sys.stderr)
+        return False
+    
+    # 既存データの扱い（任意）
+    import_mode = config.get('import_mode', db.DEFAULT_IMPORT_MODE)
+    if import_mode not in db.IMPORT_MODES:
+        modes = ', '.join(db.IMPORT_MODES)
+        print(f"import_mode '{import_mode}' は不正です（{modes} のいずれか）", file=sys.stderr)
+        return False
+    
+    # 主キー・一意制約・インデックス（任意）
+    db_columns = {mapping['db_column'] for mapping in config['column_mappings']}
+    keys = get_table_keys(config)
+    for key_columns in ([keys['primary_key']] if keys['primary_key'] else []) + keys['unique'] + keys['indexes']:
+        unknown = [name for name in key_columns if name not in db_columns]
+        if unknown or not key_columns:
+            print(f"キー・インデックスに指定したカラムがcolumn_mappingsにありません: {', '.join(unknown)}",
+                  file=sys.stderr)
+            return False
+    
+    if import_mode == 'upsert' and not get_conflict_columns(keys):
+        print("import_mode 'upsert' には primary_key または unique の指定が必要です", file=sys.stderr)
+        return False
+    
+    # データ型ごとの書式・桁数と空欄の扱い（任意）
+    for mapping in config['column_mappings']:
+        data_type, args = parse_data_type(mapping['data_type'])
+        null_policy = mapping.get('null_policy', DEFAULT_NULL_POLICY)
+        if null_policy not in NULL_POLICIES:
+            policies = ', '.join(NULL_POLICIES)
+            print(f"null_policy '{null_policy}' は不正です（{policies} のいずれか）", file=sys.stderr)
+            return False
+        if 'format' in mapping and data_type not in ('DATE', 'DATETIME'):
+            print(f"format はDATE・DATETIME型のカラムのみ指定できます（'{mapping['db_column']}' は {mapping['data_type']}）",
+                  file=sys.stderr)
+            return False
+        if 'format' in mapping and not isinstance(mapping['format'], str):
+            print(f"format '{mapping['format']}' は不正です（strptimeの書式文字列）", file=sys.stderr)
+            return False
+        scale = args[-1] if args else mapping.get('scale')
+        if data_type == 'DECIMAL' and scale is not None and (not isinstance(scale, int) or scale < 0):
+            print(f"scale '{scale}' は不正です（0以上の整数）", file=sys.stderr)
+            return False
+    
+    # 全文検索（任意、TEXT型のカラムのみ）
+    for mapping in config['column_mappings']:
+        if mapping.get('fulltext') and mapping['data_type'].upper() != 'TEXT':
+            print(f"fulltext はTEXT型のカラムのみ指定できます（'{mapping['db_column']}' は {mapping['data_type']}）",
+                  file=sys.stderr)
+            return False
+    
+    # インデックスの作成を挿入後まで遅らせるか（任意）
+    defer_indexes = config.get('defer_indexes', 'auto')
+    if defer_indexes not in (True, False, 'auto'):
+        print(f"defer_indexes '{defer_indexes}' は不正です（true, false, \"auto\" のいずれか）", file=sys.stderr)
+        return False
+    
+    # インポート後の列指向スナップショット（任意）
+    snapshot_option = config.get('snapshot', False)
+    if snapshot_option not in (True, False) and snapshot_option not in snapshot.SNAPSHOT_FORMATS:
+        formats = ', '.join(f'"{name}"' for name in snapshot.SNAPSHOT_FORMATS)
+        print(f"snapshot '{snapshot_option}' は不正です（true, false, {formats} のいずれか）", file=sys.stderr)
+        return False
+    
+    # インポートの計測値の記録（任意）
+    if config.get('metrics', True) not in (True, False):
+        print(f"metrics '{config['metrics']}' は不正です（true, false のいずれか）", file=sys.stderr)
+        return False
+    
+    # 変換できない値の書き出しと件数の上限（任意）
+    if config.get('reject_file', False) not in (True, False):
+        print(f"reject_file '{config['reject_file']}' は不正です（true, false のいずれか）", file=sys.stderr)
+        return False
+    max_errors = config.get('max_conversion_errors')
+    if max_errors is not None and (not isinstance(max_errors, int) or isinstance(max_errors, bool) or max_errors < 0):
+        print(f"max_conversion_errors '{max_errors}' は不正です（0以上の整数）", file=sys.stderr)
+        return False
+    
+    # 重複ファイルの扱い（任意）
+    on_duplicate = config.get('on_duplicate', DEFAULT_DUPLICATE_POLICY)
+    if on_duplicate not in DUPLICATE_POLICIES:
+        policies = ', '.join(DUPLICATE_POLICIES)
+        print(f"on_duplicate '{on_duplicate}' は不正です（{policies} のいずれか）", file=sys.stderr)
+        return False
+    
     return True
 
 def get_csv_files():
@@ -117,10 +291,254 @@ def read_csv_data(csv_path, config):
         print(f"CSV読み込みエラー: {e}", file=sys.stderr)
         return None, None
 
+def get_batch_size(config):
+    """設定ファイルからバッチサイズを取得（未指定・不正な場合は既定値）"""
+    try:
+        batch_size = int(config.get('batch_size', DEFAULT_BATCH_SIZE))
+    except (TypeError, ValueError):
+        return DEFAULT_BATCH_SIZE
+    return batch_size if batch_size > 0 else DEFAULT_BATCH_SIZE
+
+def read_csv_header(csv_path, config):
+    """CSVのヘッダー行のみを読み込み（ヘッダーなしの場合は空リスト）"""
+    csv_settings = config['csv_settings']
+    
+    if not csv_settings['has_header']:
+        return []
+    
+    try:
+        with open(csv_path, 'r', encoding=csv_settings['encoding'], newline='') as f:
+            reader = csv.reader(f, delimiter=csv_settings['delimiter'])
+            return next(reader, [])
+    except Exception as e:
+        print(f"CSV読み込みエラー: {e}", file=sys.stderr)
+        return None
+
+def is_chunk_safe_encoding(encoding):
+    """バイト単位でレコード境界を探せる文字コードかどうか"""
+    try:
+        return codecs.lookup(encoding).name in CHUNK_SAFE_CODECS
+    except LookupError:
+        return False
+
+def read_encoding_samples(csv_path):
+    """文字コードの判定・確認用に、ファイルの先頭と、全体から均等に抜き出したブロックを読み込む
+    
+    先頭以外のブロックは最初の改行の直後から始める
+    （ASCII互換の文字コードでは、改行のバイトがマルチバイト文字の途中に現れないため）。
+    """
+    file_size = os.path.getsize(csv_path)
+    samples = []
+    with open(csv_path, 'rb') as f:
+        samples.append(f.read(ENCODING_SAMPLE_BYTES))
+        for index in range(1, ENCODING_SAMPLE_BLOCKS):
+            offset = file_size * index // ENCODING_SAMPLE_BLOCKS
+            if offset < ENCODING_SAMPLE_BYTES:
+                continue
+            f.seek(offset)
+            block = f.read(ENCODING_SAMPLE_BYTES)
+            newline = block.find(b'\n')
+            if newline >= 0:
+                samples.append(block[newline + 1:])
+    return samples
+
+def can_decode(samples, encoding):
+    """サンプルをすべてデコードできるかどうか（ブロック末尾で途切れた文字は問わない）"""
+    for sample in samples:
+        decoder = codecs.getincrementaldecoder(encoding)()
+        try:
+            decoder.decode(sample, final=False)
+        except UnicodeDecodeError:
+            return False
+    return True
+
+def count_japanese_characters(samples, encoding):
+    """サンプルをデコードしたときの、ひらがな・カタカナ・漢字の数から半角カタカナの数を引いた値
+    
+    euc_jpのファイルはcp932でも（半角カタカナの多い文字列として）デコードできることが多いため、その判別に使う。
+    """
+    text = ''.join(sample.decode(encoding, errors='ignore') for sample in samples)
+    return (len(re.findall('[\u3040-\u30ff\u4e00-\u9fff]', text))
+            - len(re.findall('[\uff61-\uff9f]', text)))
+
+def detect_encoding(csv_path):
+    """CSVファイルの文字コードを判定（判定できない場合はNone）
+    
+    BOMがあればそれに従う。ない場合はファイルの先頭と全体から抜き出したサンプルを
+    AUTO_ENCODINGSの順にデコードし、デコードできたものを選ぶ（ASCIIのみのファイルはutf-8）。
+    """
+    with open(csv_path, 'rb') as f:
+        head = f.read(4)
+    for bom, encoding in ENCODING_BOMS:
+        if head.startswith(bom):
+            return encoding
+    
+    samples = read_encoding_samples(csv_path)
+    candidates = [encoding for encoding in AUTO_ENCODINGS if can_decode(samples, encoding)]
+    if not candidates:
+        return None
+    if candidates[0] == 'utf-8':
+        return 'utf-8'
+    return max(candidates, key=lambda encoding: count_japanese_characters(samples, encoding))
+
+def resolve_encoding(csv_path, config):
+    """csv_settingsのencodingを確認し、"auto"の場合は判定した文字コードに置き換える（失敗した場合はFalse）
+    
+    文字コードを指定した場合も、ファイルの先頭と全体から抜き出したサンプルをデコードしてみて、
+    デコードできなければ読み込みを始める前に失敗させる（大きなファイルを途中まで読んでから失敗しないように）。
+    サンプルの確認はASCII互換の文字コード（is_chunk_safe_encoding）の場合のみ行う。
+    """
+    csv_settings = config['csv_settings']
+    encoding = csv_settings['encoding']
+    
+    try:
+        if encoding == 'auto':
+            detected = detect_encoding(csv_path)
+            if detected is None:
+                print(f"文字コードを判定できません（{', '.join(AUTO_ENCODINGS)} のいずれでもデコードできません）",
+                      file=sys.stderr)
+                return False
+            print(f"文字コードを判定しました: {detected}")
+            csv_settings['encoding'] = detected
+            return True
+        
+        try:
+            codecs.lookup(encoding)
+        except LookupError:
+            print(f"encoding '{encoding}' は不正です（Pythonの文字コード名または \"auto\"）", file=sys.stderr)
+            return False
+        
+        if is_chunk_safe_encoding(encoding) and not can_decode(read_encoding_samples(csv_path), encoding):
+            detected = detect_encoding(csv_path)
+            hint = f"判定結果は {detected} です。" if detected else ""
+            print(f"CSVファイルを文字コード {encoding} でデコードできません。{hint}"
+                  f"設定ファイルのencodingを確認するか、\"auto\" を指定してください", file=sys.stderr)
+            return False
+    except OSError as e:
+        print(f"CSV読み込みエラー: {e}", file=sys.stderr)
+        return False
+    
+    return True
+
+def compute_file_hash(file_path):
+    """ファイルの内容のハッシュ（SHA-256）を計算"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        while True:
+            block = f.read(HASH_BLOCK_SIZE)
+            if not block:
+                break
+            digest.update(block)
+    return digest.hexdigest()
+
+def compute_fingerprint(file_hash, config):
+    """CSVの内容のハッシュと設定から、重複判定用のフィンガープリントを計算
+    
+    設定はキー順を揃えたJSONにするため、空白や項目の並びの違いは同じ設定とみなす。
+    バッチサイズなど取り込まれるデータに影響しない項目は含めない。
+    """
+    settings = {key: value for key, value in config.items() if key not in FINGERPRINT_IGNORED_KEYS}
+    config_json = json.dumps(settings, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(f"{file_hash}\n{config_json}".encode('utf-8')).hexdigest()
+
+def read_csv_batches(csv_path, config, batch_size=DEFAULT_BATCH_SIZE):
+    """CSVデータをバッチ単位で読み込むジェネレータ（ヘッダー行は読み飛ばす）
+    
+    ファイル全体をメモリに載せず、最大batch_size行ずつリストで返す。
+    """
+    csv_settings = config['csv_settings']
+    
+    try:
+        with open(csv_path, 'r', encoding=csv_settings['encoding'], newline='') as f:
+            reader = csv.reader(f, delimiter=csv_settings['delimiter'])
+            
+            if csv_settings['has_header']:
+                next(reader, None)
+            
+            while True:
+                batch = list(islice(reader, batch_size))
+                if not batch:
+                    break
+                yield batch
+    except Exception as e:
+        print(f"CSV読み込みエラー: {e}", file=sys.stderr)
+        raise
+
+def read_csv_batches_from(csv_path, config, position, batch_size=DEFAULT_BATCH_SIZE):
+    """position['byte_offset']の位置から読み込みを始め、CSVデータをバッチ単位で返すジェネレータ
+    
+    バッチを返すたびに、positionをそのバッチの末尾のバイト位置と通算のデータ行数に更新する。
+    先頭から読む場合のみヘッダー行を読み飛ばす。
+    レコードの途中で区切らないよう、行単位でバイト数を数えながら読み込むため、
+    is_chunk_safe_encodingを満たす文字コードでのみ使用できる。
+    """
+    csv_settings = config['csv_settings']
+    encoding = csv_settings['encoding']
+    consumed = position['byte_offset']
+    
+    def decode_lines(f):
+        nonlocal consumed
+        for line in f:
+            consumed += len(line)
+            yield line.decode(encoding)
+    
+    try:
+        with open(csv_path, 'rb') as f:
+            f.seek(consumed)
+            reader = csv.reader(decode_lines(f), delimiter=csv_settings['delimiter'])
+            
+            if consumed == 0 and csv_settings['has_header']:
+                next(reader, None)
+            
+            while True:
+                batch = list(islice(reader, batch_size))
+                if not batch:
+                    break
+                position['byte_offset'] = consumed
+                position['row_number'] += len(batch)
+                yield batch
+    except Exception as e:
+        print(f"CSV読み込みエラー: {e}", file=sys.stderr)
+        raise
+
+def get_table_keys(config):
+    """設定ファイルから主キー・一意制約・インデックスのカラム名リストを取得
+    
+    トップレベルの primary_key / unique / indexes と、column_mappingsの各カラムの
+    primary_key / unique / index をまとめる。各要素はカラム名1つでもリストでもよい。
+    """
+    def as_column_list(value):
+        return [value] if isinstance(value, str) else list(value)
+    
+    column_mappings = config['column_mappings']
+    
+    primary_key = as_column_list(config.get('primary_key') or [])
+    if not primary_key:
+        primary_key = [m['db_column'] for m in column_mappings if m.get('primary_key')]
+    
+    unique = [as_column_list(value) for value in config.get('unique', [])]
+    unique += [[m['db_column']] for m in column_mappings if m.get('unique')]
+    
+    indexes = [as_column_list(value) for value in config.get('indexes', [])]
+    indexes += [[m['db_column']] for m in column_mappings if m.get('index')]
+    
+    return {'primary_key': primary_key, 'unique': unique, 'indexes': indexes}
+
+def get_fulltext_columns(config):
+    """設定ファイルから全文検索の対象カラム（fulltextを指定したカラム）の名前リストを取得"""
+    return [m['db_column'] for m in config['column_mappings'] if m.get('fulltext')]
+
+def get_conflict_columns(keys):
+    """upsertで一致を判定するカラム（主キー、なければ最初の一意制約）"""
+    if keys['primary_key']:
+        return keys['primary_key']
+    return keys['unique'][0] if keys['unique'] else None
+
 def create_table_from_config(config):
     """設定ファイルからテーブルを作成"""
     table_name = config['table_name']
     column_mappings = config['column_mappings']
+    keys = get_table_keys(config)
     
     # カラム定義を準備
     columns = []
@@ -132,23 +550,166 @@ def create_table_from_config(config):
         columns.append(col_def)
     
     # テーブルを作成
-    if db.create_import_table(table_name, columns):
+    if db.create_import_table(table_name, columns, keys['primary_key'], keys['unique'],
+                              get_fulltext_columns(config)):
         print(f"テーブル '{table_name}' を作成しました")
         return True
     else:
         print(f"テーブル '{table_name}' の作成に失敗しました", file=sys.stderr)
         return False
 
-def map_csv_data(headers, data, config):
-    """CSVデータをデータベースカラムにマッピング"""
-    column_mappings = config['column_mappings']
+def to_integer(value):
+    """INTEGER型へ変換（空欄・変換不可の場合は0）"""
+    try:
+        return int(value)
+    except ValueError:
+        return 0
+
+def to_real(value):
+    """REAL型へ変換（空欄・変換不可の場合は0.0）"""
+    try:
+        return float(value)
+    except ValueError:
+        return 0.0
+
+# データ型ごとの変換関数（ここにない型はTEXTとしてそのまま格納）
+COLUMN_CONVERTERS = {
+    'INTEGER': to_integer,
+    'REAL': to_real,
+}
+
+# 変換できない値でValueErrorを送出する組み込みの変換関数（行単位の高速パス用）
+# 行のすべての値をこれで変換できた場合は、COLUMN_CONVERTERSの関数の呼び出しを省ける
+STRICT_CONVERTERS = {
+    'INTEGER': int,
+    'REAL': float,
+}
+
+# 書式・桁数を指定して変換するデータ型（DATE・DATETIMEはISO形式の文字列、
+# BOOLEANは0/1、DECIMALは小数点以下を丸めた数値で格納し、範囲の絞り込みにインデックスを使えるようにする）
+PARSED_DATA_TYPES = ('DATE', 'DATETIME', 'BOOLEAN', 'DECIMAL')
+
+# 空欄・変換できない値の扱い（default: 型ごとの既定値、null: NULL）
+NULL_POLICIES = ('default', 'null')
+DEFAULT_NULL_POLICY = 'default'
+
+# null_policyがdefaultのときに格納する値（ここにない型は元の値のまま）
+# DATE・DATETIME・BOOLEAN・DECIMALは、これらの型をTEXTとして格納していた以前の設定ファイルで
+# 書式の合わない値が失われないよう、元の値のまま格納する
+DEFAULT_VALUES = {
+    'INTEGER': 0,
+    'REAL': 0.0,
+}
+
+# BOOLEANとして受け付ける値（大文字・小文字は区別しない）
+BOOLEAN_VALUES = {
+    '1': 1, 'true': 1, 't': 1, 'yes': 1, 'y': 1, 'on': 1,
+    '0': 0, 'false': 0, 'f': 0, 'no': 0, 'n': 0, 'off': 0,
+}
+
+# 日付・日時の変換結果をキャッシュする件数（同じ日付が繰り返し現れるため。日付なら約180年分）
+DATE_PARSE_CACHE_SIZE = 65536
+
+def parse_data_type(data_type):
+    """データ型を (型名, 括弧内の数値のリスト) に分ける（例: 'DECIMAL(10,2)' → ('DECIMAL', [10, 2])）"""
+    match = re.fullmatch(r'\s*(\w+)\s*(?:\(\s*(\d+)\s*(?:,\s*(\d+)\s*)?\))?\s*', data_type or '')
+    if not match:
+        return (data_type or '').upper(), []
+    return match.group(1).upper(), [int(arg) for arg in match.group(2, 3) if arg is not None]
+
+def to_boolean(value):
+    """BOOLEAN型へ変換（1/0。受け付けない値はValueError）"""
+    try:
+        return BOOLEAN_VALUES[value]
+    except KeyError:
+        pass
+    try:
+        return BOOLEAN_VALUES[value.strip().lower()]
+    except KeyError:
+        raise ValueError(f"BOOLEANに変換できません: {value!r}") from None
+
+def make_date_parser(data_type, date_format=None):
+    """DATE・DATETIME型の変換関数を作成（変換できない値はValueError）
     
-    # CSVカラム名からDBカラム名へのマッピングを作成
-    csv_to_db = {}
-    for mapping in column_mappings:
-        csv_column = mapping['csv_column']
-        db_column = mapping['db_column']
-        csv_to_db[csv_column] = db_column
+    DATEは「YYYY-MM-DD」、DATETIMEは「YYYY-MM-DD HH:MM:SS」のISO形式の文字列に揃える。
+    date_formatを省略した場合はISO形式（2024-01-05、20240105など）として読み込む。
+    書式の解釈（strptime）は遅いため、値ごとの変換結果をキャッシュする。
+    """
+    if data_type == 'DATE':
+        if date_format:
+            parse = lambda value: datetime.strptime(value, date_format).date().isoformat()
+        else:
+            parse = lambda value: date.fromisoformat(value).isoformat()
+    else:
+        if date_format:
+            parse = lambda value: datetime.strptime(value, date_format).isoformat(sep=' ')
+        else:
+            parse = lambda value: datetime.fromisoformat(value).isoformat(sep=' ')
+    return lru_cache(maxsize=DATE_PARSE_CACHE_SIZE)(parse)
+
+def make_decimal_parser(scale=None):
+    """DECIMAL型の変換関数を作成（小数点以下scale桁に丸める。変換できない値はValueError）"""
+    if scale is None:
+        return float
+    return lambda value: round(float(value), scale)
+
+def make_fallback_converter(strict_converter, default):
+    """変換できない値をdefaultに置き換える変換関数を作成"""
+    def convert(value):
+        try:
+            return strict_converter(value)
+        except ValueError:
+            return default
+    return convert
+
+def make_passthrough_converter(strict_converter):
+    """変換できない値を元の値のまま返す変換関数を作成"""
+    def convert(value):
+        try:
+            return strict_converter(value)
+        except ValueError:
+            return value
+    return convert
+
+def get_column_converters(mapping):
+    """カラムマッピングから (組み込みの変換関数, 既定値に置き換える変換関数) を取得
+    
+    組み込みの変換関数は変換できない値でValueErrorを送出する（行単位の高速パス用）。
+    DATE・DATETIME・BOOLEAN・DECIMALでnull_policyがdefaultの場合、変換できない値は元の値のまま返す。
+    変換しないカラムは (None, None)、TEXTでnull_policyがnullの場合は (None, 空欄をNULLにする関数)。
+    """
+    data_type, args = parse_data_type(mapping['data_type'])
+    null_policy = mapping.get('null_policy', DEFAULT_NULL_POLICY)
+    
+    if data_type in STRICT_CONVERTERS:
+        strict_converter = STRICT_CONVERTERS[data_type]
+        if null_policy == DEFAULT_NULL_POLICY:
+            return strict_converter, COLUMN_CONVERTERS[data_type]
+    elif data_type in ('DATE', 'DATETIME'):
+        strict_converter = make_date_parser(data_type, mapping.get('format'))
+    elif data_type == 'BOOLEAN':
+        strict_converter = to_boolean
+    elif data_type == 'DECIMAL':
+        scale = args[-1] if args else mapping.get('scale')
+        strict_converter = make_decimal_parser(scale)
+    elif null_policy == 'null':
+        return None, lambda value: value or None
+    else:
+        return None, None
+    
+    if null_policy == 'null':
+        return strict_converter, make_fallback_converter(strict_converter, None)
+    return strict_converter, make_passthrough_converter(strict_converter)
+
+def compile_mapping_plan(headers, config, counters=None, failures=None):
+    """カラムマッピング設定を行変換関数にコンパイル
+    
+    CSVカラムの位置と変換関数を事前に解決しておき、
+    1行を受け取ってDBカラム順の値リストを返す関数を返す。
+    countersに辞書を指定すると、空欄・変換できない値を含む行の数を'conversion_failed_rows'に加算する。
+    failuresにリストを指定すると、変換できない値（空欄を除く）を (返した値リスト, カラム位置, 元の値) で追加する。
+    """
+    column_mappings = config['column_mappings']
     
     # ヘッダーがある場合、カラムインデックスを取得
     header_to_index = {}
@@ -156,96 +717,933 @@ def map_csv_data(headers, data, config):
         for i, header in enumerate(headers):
             header_to_index[header] = i
     
-    # データを変換
-    mapped_data = []
-    for row in data:
-        mapped_row = []
+    # カラムごとの取得位置と変換関数を解決
+    indices = []
+    converters = []
+    strict_converters = []
+    for position, mapping in enumerate(column_mappings):
+        strict_converter, converter = get_column_converters(mapping)
         
-        for mapping in column_mappings:
-            csv_column = mapping['csv_column']
-            data_type = mapping['data_type']
-            
-            # 値を取得
-            value = ""
-            if headers:
-                # ヘッダーがある場合、カラム名で検索
-                if csv_column in header_to_index:
-                    idx = header_to_index[csv_column]
-                    if idx < len(row):
-                        value = row[idx]
-            else:
-                # ヘッダーがない場合、順番で取得
-                idx = len(mapped_row)
-                if idx < len(row):
-                    value = row[idx]
-            
-            # データ型に応じて変換
-            if data_type.upper() == 'INTEGER':
-                try:
-                    value = int(value) if value.strip() else 0
-                except ValueError:
-                    value = 0
-            elif data_type.upper() == 'REAL':
+        if headers:
+            idx = header_to_index.get(mapping['csv_column'])
+        else:
+            # ヘッダーがない場合、順番で取得
+            idx = position
+        
+        if idx is None:
+            # CSVに存在しないカラムは空欄を変換した定数
+            constant = converter('') if converter else ''
+            indices.append(0)
+            converters.append(lambda _value, constant=constant: constant)
+            strict_converters.append(None)
+        else:
+            indices.append(idx)
+            converters.append(converter)
+            strict_converters.append(strict_converter)
+    
+    if not indices:
+        return lambda row: []
+    
+    # すべての値を取得できる最小の列数（これ未満の行は低速パスで補完）
+    min_length = max(indices) + 1
+    if len(indices) == 1:
+        first = indices[0]
+        getter = lambda row: (row[first],)
+    else:
+        getter = itemgetter(*indices)
+    
+    def get_values(row):
+        if len(row) >= min_length:
+            return getter(row)
+        length = len(row)
+        return [row[i] if i < length else '' for i in indices]
+    
+    # 変換するカラムだけを（位置, 変換関数）で保持し、TEXTは取り出すだけにする
+    # 組み込みの変換関数があるカラム（strict）とそれ以外（other）に分ける
+    strict_columns = [(i, strict) for i, strict in enumerate(strict_converters) if strict]
+    fallback_columns = [(i, strict, converters[i]) for i, strict in strict_columns]
+    other_columns = [(i, converter) for i, converter in enumerate(converters)
+                     if converter and not strict_converters[i]]
+    
+    if not strict_columns and not other_columns:
+        return lambda row: list(get_values(row))
+    
+    def convert_row(row):
+        values = list(get_values(row))
+        try:
+            for i, convert in strict_columns:
+                values[i] = convert(values[i])
+        except ValueError:
+            # 空欄・変換できない値を含む行は、元の値から既定値に置き換える変換関数で変換し直す
+            # （日付など変換済みの値を再度変換できない型があるため、値は取り出し直す）
+            values = list(get_values(row))
+            for i, strict, convert in fallback_columns:
+                value = values[i]
                 try:
-                    value = float(value) if value.strip() else 0.0
+                    values[i] = strict(value)
                 except ValueError:
-                    value = 0.0
-            else:
-                # TEXT型の場合はそのまま
-                value = str(value)
+                    values[i] = convert(value)
+                    if failures is not None and value.strip():
+                        failures.append((values, i, value))
+            if counters is not None:
+                counters['conversion_failed_rows'] = counters.get('conversion_failed_rows', 0) + 1
+        for i, convert in other_columns:
+            values[i] = convert(values[i])
+        return values
+    
+    return convert_row
+
+def map_csv_data(headers, data, config):
+    """CSVデータをデータベースカラムにマッピング"""
+    convert_row = compile_mapping_plan(headers, config)
+    return [convert_row(row) for row in data]
+
+def locate_conversion_failures(mapped, failures, first_row):
+    """compile_mapping_planで集めた変換できない値を [(データ行番号, カラム位置, 元の値), ...] にする
+    
+    mappedはマッピング済みの行リスト、first_rowはその先頭行のデータ行番号（ヘッダーを除き1から）。
+    変換できない値があったバッチでだけ行の位置を調べるため、変換できる行の処理は遅くならない。
+    """
+    row_numbers = {id(values): first_row + n for n, values in enumerate(mapped)}
+    records = [(row_numbers[id(values)], position, value) for values, position, value in failures]
+    failures.clear()
+    return records
+
+def map_csv_batches(headers, batches, config, timings=None, counters=None, on_errors=None, first_row=1):
+    """バッチ単位でCSVデータをマッピングするジェネレータ
+    
+    timingsに辞書を指定すると、バッチの読み込み（'read'）と変換（'map'）の秒数を加算する。
+    on_errorsを指定すると、変換できない値があったバッチごとに
+    [(データ行番号, カラム位置, 元の値), ...] を渡して呼び出す（first_rowは最初の行のデータ行番号）。
+    """
+    failures = [] if on_errors else None
+    convert_row = compile_mapping_plan(headers, config, counters, failures)
+    timed = timings is not None
+    if timed:
+        timings.setdefault('read', 0.0)
+        timings.setdefault('map', 0.0)
+    
+    batches = iter(batches)
+    while True:
+        start = time.perf_counter()
+        batch = next(batches, None)
+        read_end = time.perf_counter()
+        if timed:
+            timings['read'] += read_end - start
+        if batch is None:
+            break
+        mapped = [convert_row(row) for row in batch]
+        if timed:
+            timings['map'] += time.perf_counter() - read_end
+        if failures:
+            on_errors(locate_conversion_failures(mapped, failures, first_row))
+        first_row += len(mapped)
+        yield mapped
+
+def plan_csv_chunks(csv_path, config, chunk_bytes=PARALLEL_CHUNK_BYTES):
+    """CSVファイルをレコード境界で区切ったバイト範囲 [(開始, 終了), ...] に分割
+    
+    改行の手前までの引用符の数が偶数の位置だけを境界とするため、
+    引用符で囲まれた改行の途中では区切らない。
+    バイト単位で境界を探せない文字コードの場合はNoneを返す。
+    """
+    if not is_chunk_safe_encoding(config['csv_settings']['encoding']):
+        return None
+    
+    file_size = os.path.getsize(csv_path)
+    boundaries = [0]
+    target = chunk_bytes
+    offset = 0
+    quote_parity = 0
+    
+    with open(csv_path, 'rb') as f:
+        while target < file_size:
+            block = f.read(1024 * 1024)
+            if not block:
+                break
             
-            mapped_row.append(value)
-        
-        mapped_data.append(mapped_row)
+            # このブロック内で目標位置以降にある、引用符の外の改行を探す
+            pos = target - offset
+            while pos < len(block):
+                i = block.find(b'\n', max(pos, 0))
+                if i < 0:
+                    break
+                if (quote_parity + block.count(b'"', 0, i)) % 2 == 0:
+                    boundaries.append(offset + i + 1)
+                    target = offset + i + 1 + chunk_bytes
+                    pos = target - offset
+                else:
+                    pos = i + 1
+            
+            quote_parity = (quote_parity + block.count(b'"')) % 2
+            offset += len(block)
     
-    return mapped_data
+    if boundaries[-1] < file_size:
+        boundaries.append(file_size)
+    return list(zip(boundaries, boundaries[1:]))
 
-def import_csv_file(csv_info):
-    """単一のCSVファイルをインポート"""
-    print(f"\n=== {csv_info[0]} のインポートを開始 ===")
+def _parse_chunk(csv_path, config, headers, start, end, skip_header):
+    """ワーカープロセスでバイト範囲を読み込み、(マッピング済みの行リスト, カウンタ, 変換できない値) を返す
+    
+    範囲がレコード境界からずれていれば引用符の途中で終わるため、
+    strictモードのcsv.Errorとして検出される。
+    変換できない値は [(範囲内のデータ行番号, カラム位置, 元の値), ...]。
+    """
+    csv_settings = config['csv_settings']
+    
+    with open(csv_path, 'rb') as f:
+        f.seek(start)
+        text = f.read(end - start).decode(csv_settings['encoding'])
+    
+    reader = csv.reader(io.StringIO(text, newline=''), delimiter=csv_settings['delimiter'], strict=True)
+    if skip_header:
+        next(reader, None)
+    
+    counters = {}
+    failures = []
+    convert_row = compile_mapping_plan(headers, config, counters, failures)
+    rows = [convert_row(row) for row in reader]
+    return rows, counters, locate_conversion_failures(rows, failures, 1) if failures else []
+
+def read_csv_chunks(csv_path, config, headers, chunks, workers, boundary_errors, counters=None, on_errors=None,
+                    batch_size=DEFAULT_BATCH_SIZE):
+    """チャンクをワーカープロセスで並列に読み込み・マッピングし、ファイル順にバッチとして返すジェネレータ
+    
+    各チャンクの行はbatch_size行ずつのバッチに分けて返す（挿入・進捗の単位を逐次処理とそろえる）。
+    同時に処理中のチャンクはworkers + 1個まで（メモリ上限）。
+    レコード境界の判定に失敗した場合はboundary_errorsに例外を追加してから送出する。
+    countersに辞書を指定すると、ワーカーで数えたカウンタを加算する。
+    on_errorsはmap_csv_batchesと同じく、変換できない値があったチャンクごとに呼び出す。
+    """
+    has_header = config['csv_settings']['has_header']
+    row_offset = 0
+    
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        remaining = iter(enumerate(chunks))
+        
+        def submit_next():
+            for index, (start, end) in remaining:
+                pending.append(executor.submit(_parse_chunk, csv_path, config, headers,
+                                               start, end, has_header and index == 0))
+                return
+        
+        try:
+            for _ in range(workers + 1):
+                submit_next()
+            
+            while pending:
+                future = pending.popleft()
+                submit_next()
+                try:
+                    rows, chunk_counters, records = future.result()
+                except csv.Error as e:
+                    boundary_errors.append(e)
+                    print(f"CSV読み込みエラー: {e}", file=sys.stderr)
+                    raise
+                except Exception as e:
+                    print(f"CSV読み込みエラー: {e}", file=sys.stderr)
+                    raise
+                if counters is not None:
+                    for name, value in chunk_counters.items():
+                        counters[name] = counters.get(name, 0) + value
+                if records and on_errors:
+                    on_errors([(row_offset + row_number, position, value)
+                               for row_number, position, value in records])
+                row_offset += len(rows)
+                if len(rows) <= batch_size:
+                    yield rows
+                    continue
+                for batch_start in range(0, len(rows), batch_size):
+                    yield rows[batch_start:batch_start + batch_size]
+        finally:
+            for future in pending:
+                future.cancel()
+
+def load_import_config(csv_info):
+    """設定ファイルを読み込んで検証（不正な場合はNone）
     
-    # 設定ファイルを読み込み
+    csv_settingsのencodingは、resolve_encodingで確認・判定した文字コードに置き換える。
+    """
     config = load_config(csv_info[1])
     if not config:
-        return False
+        return None
     
-    # 設定を検証
     if not validate_config(config):
+        return None
+    
+    if not resolve_encoding(csv_info[0], config):
+        return None
+    
+    return config
+
+def estimate_row_count(csv_path, has_header=True):
+    """ファイルサイズと先頭の1行あたりのバイト数からCSVのデータ行数を概算（引用符内の改行も1行と数える）
+    
+    先頭のROW_ESTIMATE_SAMPLE_BYTESバイトだけを読むため、大きなファイルでも時間がかからない。
+    """
+    try:
+        file_size = os.path.getsize(csv_path)
+        with open(csv_path, 'rb') as f:
+            sample = f.read(ROW_ESTIMATE_SAMPLE_BYTES)
+    except OSError as e:
+        print(f"CSV読み込みエラー: {e}", file=sys.stderr)
+        return 0
+    
+    line_count = sample.count(b'\n')
+    if len(sample) < file_size and line_count:
+        line_count = round(file_size * line_count / len(sample))
+    elif sample and not sample.endswith(b'\n'):
+        # 末尾に改行がない最終行
+        line_count += 1
+    if has_header:
+        line_count -= 1
+    return max(line_count, 0)
+
+def identify_import_file(csv_info, config):
+    """重複判定・チェックポイントに使うCSVの識別情報を準備
+    
+    CSVの内容は1回だけ読んでハッシュを計算し、両方で使い回す。
+    {'file_hash', 'fingerprint', 'csv_name'} を返す。どちらも不要な設定の場合や
+    ファイルを読めない場合はNone。
+    """
+    if config.get('on_duplicate', DEFAULT_DUPLICATE_POLICY) == 'import' and not config.get('checkpoint'):
+        return None
+    
+    try:
+        file_hash = compute_file_hash(csv_info[0])
+    except OSError as e:
+        print(f"ハッシュ計算エラー: {e}", file=sys.stderr)
+        return None
+    
+    return {
+        'file_hash': file_hash,
+        'fingerprint': compute_fingerprint(file_hash, config),
+        'csv_name': os.path.basename(csv_info[0])
+    }
+
+def skip_duplicate(csv_info, config, source):
+    """取り込み済みと同じCSV・設定の組であれば、on_duplicateに従って処理しTrueを返す"""
+    on_duplicate = config.get('on_duplicate', DEFAULT_DUPLICATE_POLICY)
+    if not source or on_duplicate == 'import':
         return False
     
-    # CSVデータを読み込み
-    headers, data = read_csv_data(csv_info[0], config)
-    if headers is None or data is None:
+    try:
+        record = db.get_import_fingerprint(source['fingerprint'])
+    except Exception as e:
+        print(f"重複確認エラー: {e}", file=sys.stderr)
         return False
+    if not record:
+        return False
+    
+    print(f"取り込み済みのファイルと同じ内容・設定のため、インポートしません"
+          f"（{record['imported_at']} に {record['csv_name']} から {record['row_count']} 行を取り込み済み）")
+    if on_duplicate == 'log':
+        move_to_log(csv_info[0], csv_info[1], csv_info[2], 'duplicate')
+    return True
+
+def prepare_checkpoint(csv_info, config, source):
+    """設定でcheckpointが有効な場合、CSVの内容のハッシュから再開位置を準備
+    
+    insert_csv_batchesに渡すcheckpoint辞書を返す（無効な場合はNone）。
+    同じ内容のCSVの途中まで挿入した記録があれば、その位置から再開する。
+    """
+    if not config.get('checkpoint') or not source:
+        return None
+    
+    if not is_chunk_safe_encoding(config['csv_settings']['encoding']):
+        print("文字コードがバイト単位の再開位置に対応していないため、チェックポイントを使用しません")
+        return None
+    
+    try:
+        saved = db.get_import_checkpoint(source['file_hash'])
+    except Exception as e:
+        print(f"チェックポイント確認エラー: {e}", file=sys.stderr)
+        return None
+    
+    position = {'byte_offset': 0, 'row_number': 0}
+    if saved and saved['table_name'] == config['table_name']:
+        position = {'byte_offset': saved['byte_offset'], 'row_number': saved['row_number']}
+        print(f"チェックポイントから再開します（{saved['row_number']:,} 行目まで挿入済み）")
+    
+    return {
+        'file_hash': source['file_hash'],
+        'csv_name': source['csv_name'],
+        'position': position
+    }
+
+def should_defer_indexes(csv_info, config):
+    """既存のインデックスを挿入前に削除し、挿入後に作り直すかどうかを判断
+    
+    autoの場合、テーブルが空になる・空である場合や、既存の行数以上を挿入する場合に作り直す
+    （少量の追加では、既存のインデックスを更新しながら挿入する方が速い）。
+    """
+    defer_indexes = config.get('defer_indexes', 'auto')
+    if defer_indexes != 'auto':
+        return defer_indexes
+    
+    if config.get('import_mode') == 'replace':
+        return True
+    
+    existing_rows = 0
+    for table in db.get_import_tables():
+        if table['table_name'] == config['table_name']:
+            existing_rows = table['record_count']
+    if not existing_rows:
+        return True
+    
+    has_header = config['csv_settings'].get('has_header', True)
+    return estimate_row_count(csv_info[0], has_header) >= existing_rows
+
+def format_timings(timings):
+    """処理段階ごとの秒数を表示用の文字列にする"""
+    parts = [f"{label} {timings[phase]:.2f}秒" for phase, label in IMPORT_PHASES if phase in timings]
+    return ' / '.join(parts)
+
+def report_progress(batches, progress=None):
+    """バッチを順に返しながら、挿入済みの行数と処理速度を表示するジェネレータ
+    
+    progressを指定すると、バッチごとにファイル内の挿入済み行数を渡して呼び出す。
+    """
+    start = time.perf_counter()
+    row_count = 0
+    for batch in batches:
+        yield batch
+        # 次のバッチを要求された時点で、直前のバッチは挿入済み
+        row_count += len(batch)
+        elapsed = time.perf_counter() - start
+        rate = row_count / elapsed if elapsed > 0 else 0
+        print(f"  挿入済み: {row_count:,} 行（{rate:,.0f} 行/秒）", flush=True)
+        if progress:
+            progress(row_count)
+
+class ConversionLimitExceeded(Exception):
+    """変換できない値の件数がmax_conversion_errorsを超えたため、インポートを中止したことを表す"""
+
+class ConversionErrors:
+    """1ファイルのインポートで変換できなかった値の集計
+    
+    カラムごとの件数を数え、設定に応じてリジェクトファイル（データ行番号・カラム・値）への書き出しと、
+    件数の上限（max_conversion_errors）の確認を行う。値はバッチ単位でまとめて受け取る。
+    リジェクトファイルはlogフォルダに「ベース名_日時_rejects.csv」で作成し、
+    インポートに成功した場合は移動したCSVと同じ日時をファイル名に使う。
+    """
+    
+    def __init__(self, csv_info, config):
+        self.column_mappings = config['column_mappings']
+        self.max_errors = config.get('max_conversion_errors')
+        self.timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        self.reject_path = None
+        if config.get('reject_file'):
+            self.reject_path = os.path.join(LOG_FOLDER, f"{csv_info[2]}_{self.timestamp}_rejects.csv")
+        self.reject_file = None
+        self.writer = None
+        self.counts = {}  # DBカラム名 → 件数
+        self.total = 0
+        self.closed = False
+    
+    def add(self, records):
+        """変換できなかった値 [(データ行番号, カラム位置, 元の値), ...] を加える
+        
+        close後は何もしない（中止したファイルの残りのバッチを読み捨てる間に呼ばれるため）。
+        """
+        if self.closed:
+            return
+        for _, position, _ in records:
+            column = self.column_mappings[position]['db_column']
+            self.counts[column] = self.counts.get(column, 0) + 1
+        self.total += len(records)
+        
+        if not self.reject_path:
+            return
+        mappings = self.column_mappings
+        try:
+            if self.writer is None:
+                self.reject_file = open(self.reject_path, 'w', encoding='utf-8', newline='')
+                self.writer = csv.writer(self.reject_file)
+                self.writer.writerow(REJECT_FILE_HEADER)
+            self.writer.writerows((row_number, mappings[position]['csv_column'], mappings[position]['data_type'], value)
+                                  for row_number, position, value in records)
+        except OSError as e:
+            # 書き出せなくても件数の集計とインポートは続ける
+            print(f"リジェクトファイル書き込みエラー: {e}", file=sys.stderr)
+            self.close()
+            self.reject_path = None
+            self.writer = None
+    
+    def check(self):
+        """件数が上限を超えていればConversionLimitExceededを送出"""
+        if self.max_errors is not None and self.total > self.max_errors:
+            raise ConversionLimitExceeded(f"変換できない値が上限（{self.max_errors}件）を超えたため中止しました"
+                                          f"（{self.format_counts()}）")
+    
+    def checked(self, batches):
+        """バッチを順に返しながら、バッチごとに件数の上限を確認するジェネレータ"""
+        for batch in batches:
+            self.check()
+            yield batch
+    
+    def format_counts(self):
+        """カラムごとの件数を表示用の文字列にする"""
+        return ', '.join(f"{column} {count:,}件" for column, count in self.counts.items())
+    
+    def close(self):
+        """リジェクトファイルを閉じ、以降の値を受け付けないようにする"""
+        self.closed = True
+        if self.reject_file:
+            self.reject_file.close()
+            self.reject_file = None
+    
+    def discard(self):
+        """集計とリジェクトファイルを破棄（読み込みをやり直す場合）"""
+        self.close()
+        if self.writer is not None:
+            try:
+                os.remove(self.reject_path)
+            except OSError as e:
+                print(f"リジェクトファイル削除エラー: {e}", file=sys.stderr)
+        self.writer = None
+        self.counts = {}
+        self.total = 0
+        self.closed = False
+
+def write_csv_batches(csv_info, config, mapped_batches, progress=None, checkpoint=None, source=None,
+                      timings=None, counters=None, errors=None):
+    """マッピング済みのバッチをテーブルに挿入し、ファイルをlogフォルダに移動
+    
+    checkpointを指定した場合はバッチごとにコミットし、再開位置を記録する。
+    sourceを指定した場合は、挿入と同じトランザクションで重複判定用に取り込み済みとして登録する。
+    処理段階ごとの秒数をtimingsに記録し、最後に表示する。
+    countersを指定した場合は、行数・バイト数などのカウンタを加えて、計測値をimport_metricsに記録する。
+    errors（ConversionErrors）を指定した場合は、変換できない値の件数が上限を超えた時点で中止し、
+    最後にカラムごとの件数を表示する。
+    """
+    if timings is None:
+        timings = {}
+    table_name = config['table_name']
+    if counters is not None:
+        counters['bytes'] = os.path.getsize(csv_info[0])
     
-    print(f"CSVデータ: {len(data)} 行を読み込みました")
+    try:
+        success = _write_csv_batches(csv_info, config, mapped_batches, progress, checkpoint, source, timings,
+                                     counters, errors)
+    finally:
+        if errors:
+            errors.close()
+    
+    if errors and errors.total:
+        print(f"警告: 変換できない値がありました: {errors.format_counts()}")
+        if errors.writer is not None:
+            print(f"  リジェクトファイル: {os.path.basename(errors.reject_path)}")
+    
+    if counters is not None:
+        if errors:
+            counters['conversion_errors'] = errors.total
+            counters['conversion_errors_by_column'] = dict(errors.counts)
+        db.record_import_metrics(table_name, os.path.basename(csv_info[0]), success, timings, counters)
+    return success
+
+def _write_csv_batches(csv_info, config, mapped_batches, progress, checkpoint, source, timings, counters, errors):
+    """write_csv_batchesの本体（成功したかどうかを返す）"""
+    table_name = config['table_name']
+    if errors:
+        mapped_batches = errors.checked(mapped_batches)
     
     # テーブルを作成
+    start = time.perf_counter()
     if not create_table_from_config(config):
         return False
+    defer_indexes = should_defer_indexes(csv_info, config)
+    timings['create'] = time.perf_counter() - start
     
-    # データをマッピング
-    mapped_data = map_csv_data(headers, data, config)
+    # データベースに挿入（読み込み・変換はバッチの取り出しと同時に進む）
+    bulk_profile = config.get('bulk_profile', db.DEFAULT_BULK_PROFILE)
+    import_mode = config.get('import_mode', db.DEFAULT_IMPORT_MODE)
+    keys = get_table_keys(config)
+    start = time.perf_counter()
+    row_count = db.insert_csv_batches(table_name, report_progress(mapped_batches, progress),
+                                      bulk_profile, checkpoint, source,
+                                      import_mode, get_conflict_columns(keys),
+                                      defer_indexes, timings, counters)
+    load_time = time.perf_counter() - start
+    if 'map' not in timings:
+        # 読み込み・変換をワーカープロセスで行った場合は、挿入以外の時間をまとめて計上する
+        timings['parse'] = max(load_time - timings.get('insert', 0.0) - timings.get('index', 0.0), 0.0)
+    if counters is not None:
+        counters['rows'] = row_count or 0
     
-    # データベースに挿入
-    if db.insert_csv_data(config['table_name'], mapped_data):
-        print(f"{len(mapped_data)} 行をデータベースに挿入しました")
+    # 再開時は残りの行がなくても（前回の最後のコミット直後に中断した場合）成功とする
+    resumed_to_end = row_count == 0 and checkpoint and checkpoint['position']['row_number'] > 0
+    if row_count or resumed_to_end:
+        print(f"{row_count} 行をデータベースに挿入しました（バッチサイズ: {get_batch_size(config)}、モード: {import_mode}）")
+        
+        # インデックスはロードの速度を落とさないよう、挿入後に作成
+        start = time.perf_counter()
+        if keys['indexes']:
+            created = db.create_import_indexes(table_name, keys['indexes'])
+            if created:
+                print(f"インデックスを作成しました: {', '.join(created)}")
+        timings['index'] = timings.get('index', 0.0) + time.perf_counter() - start
+        
+        # クエリプランナー用の統計情報を更新
+        start = time.perf_counter()
+        db.analyze_import_table(table_name)
+        timings['analyze'] = time.perf_counter() - start
         
         # ファイルをlogフォルダに移動
-        if move_to_log(csv_info[0], csv_info[1], csv_info[2]):
-            return True
-        else:
-            return False
+        start = time.perf_counter()
+        moved = move_to_log(csv_info[0], csv_info[1], csv_info[2],
+                            timestamp=errors.timestamp if errors and errors.writer is not None else None)
+        timings['move'] = time.perf_counter() - start
+        
+        print(f"処理時間: {format_timings(timings)}")
+        return moved
     else:
         print("データベースへの挿入に失敗しました", file=sys.stderr)
+        if checkpoint:
+            saved = db.get_import_checkpoint(checkpoint['file_hash'])
+            if saved:
+                print(f"{saved['row_number']:,} 行目まではコミット済みです。同じファイルで再実行すると続きから再開します",
+                      file=sys.stderr)
         return False
 
-def main():
-    """メイン処理"""
+def import_csv_file(csv_info, chunk_workers=1, progress=None, timings=None):
+    """単一のCSVファイルをインポート
+    
+    chunk_workersが2以上の場合、ファイルをレコード境界で分割して並列に読み込む。
+    progressはバッチごとにファイル内の挿入済み行数を渡して呼び出される。
+    timingsに辞書を渡すと、処理段階（IMPORT_PHASES）ごとの秒数が記録される。
+    """
+    print(f"\n=== {csv_info[0]} のインポートを開始 ===")
+    
+    # 設定ファイルを読み込み・検証
+    config = load_import_config(csv_info)
+    if not config:
+        return False
+    
+    # 取り込み済みと同じファイルは解析を始める前に除外
+    if timings is None:
+        timings = {}
+    counters = {} if config.get('metrics', True) else None
+    errors = ConversionErrors(csv_info, config)
+    start = time.perf_counter()
+    source = identify_import_file(csv_info, config)
+    if source:
+        timings['hash'] = time.perf_counter() - start
+    if skip_duplicate(csv_info, config, source):
+        return True
+    
+    # ヘッダー行を読み込み
+    headers = read_csv_header(csv_info[0], config)
+    if headers is None:
+        return False
+    
+    # チェックポイントを使う場合は、再開位置を記録しながら逐次読み込む
+    checkpoint = prepare_checkpoint(csv_info, config, source)
+    if checkpoint:
+        if chunk_workers > 1:
+            print("チェックポイントを使用するため、ファイル内並列読み込みは行いません")
+        batches = read_csv_batches_from(csv_info[0], config, checkpoint['position'], get_batch_size(config))
+        mapped_batches = map_csv_batches(headers, batches, config, timings, counters, errors.add,
+                                         checkpoint['position']['row_number'] + 1)
+        return write_csv_batches(csv_info, config, mapped_batches, progress, checkpoint, source, timings, counters,
+                                 errors)
+    
+    # ファイル内並列読み込み（分割できない場合は逐次処理）
+    if chunk_workers > 1:
+        chunks = plan_csv_chunks(csv_info[0], config)
+        if chunks is None:
+            print("文字コードがバイト単位の分割に対応していないため、逐次読み込みを行います")
+        elif len(chunks) > 1:
+            print(f"{len(chunks)} チャンクに分割し、{chunk_workers} プロセスで読み込みます")
+            boundary_errors = []
+            mapped_batches = read_csv_chunks(csv_info[0], config, headers, chunks, chunk_workers, boundary_errors,
+                                             counters, errors.add, get_batch_size(config))
+            if write_csv_batches(csv_info, config, mapped_batches, progress, source=source, timings=timings,
+                                 counters=counters, errors=errors):
+                return True
+            
+            # ジャーナルなしではロールバックが効かないため、再実行すると重複しうる
+            if not boundary_errors or config.get('bulk_profile') == 'unsafe-max':
+                return False
+            print("レコード境界を判定できなかったため、逐次読み込みで再実行します")
+            timings.pop('parse', None)
+            if counters is not None:
+                counters.clear()
+            errors.discard()
+    
+    # 読み込み→マッピング→挿入をバッチ単位のストリームで処理
+    batches = read_csv_batches(csv_info[0], config, get_batch_size(config))
+    mapped_batches = map_csv_batches(headers, batches, config, timings, counters, errors.add)
+    
+    return write_csv_batches(csv_info, config, mapped_batches, progress, source=source, timings=timings,
+                             counters=counters, errors=errors)
+
+# 並列インポート用（ワーカープロセスではinitializerで設定される）
+_file_queues = None
+_ready_queue = None
+_abort_event = None
+
+class ImportAborted(Exception):
+    """書き込み側が中断したため、ワーカーが処理を打ち切ったことを表す"""
+
+def _init_parse_worker(file_queues, ready_queue, abort_event):
+    """ワーカープロセスの初期化: ファイルごとのキューと中断通知を受け取る"""
+    global _file_queues, _ready_queue, _abort_event
+    _file_queues = file_queues
+    _ready_queue = ready_queue
+    _abort_event = abort_event
+
+def _parse_worker(file_index, csv_path, config, position=None):
+    """ワーカープロセスでCSVを読み込み・マッピングし、バッチをキューで書き込み側へ送る
+    
+    送信するメッセージは ('batch', (行リスト, 再開位置, カウンタ, 変換できない値))、('end', ログ)、('error', ログ)。
+    positionを指定した場合はその位置から読み込み、バッチごとに末尾の再開位置を添える（それ以外はNone）。
+    カウンタはそのバッチまでの累計、変換できない値はそのバッチの分（map_csv_batchesのon_errorsと同じ形式）。
+    出力は書き込み側でファイルごとにまとめて表示するため、ログとして送る。
+    """
+    file_queue = _file_queues[file_index]
+    log = io.StringIO()
+    ready = False
+    
+    def send(kind, payload):
+        nonlocal ready
+        # 書き込み側が中断した場合に満杯のキューで待ち続けないよう、定期的に確認する
+        while True:
+            if _abort_event.is_set():
+                # 読まれないまま残ったバッチの送信完了をプロセス終了時に待たない
+                for pending_queue in _file_queues:
+                    pending_queue.cancel_join_thread()
+                raise ImportAborted()
+            try:
+                file_queue.put((kind, payload), timeout=1)
+                break
+            except queue.Full:
+                pass
+        if not ready:
+            # 最初のメッセージを送った時点で書き込み可能になったことを通知
+            _ready_queue.put(file_index)
+            ready = True
+    
+    if _abort_event.is_set():
+        return
+    
+    try:
+        with redirect_stdout(log), redirect_stderr(log):
+            headers = read_csv_header(csv_path, config)
+            if headers is None:
+                send('error', log.getvalue())
+                return
+            
+            if position is None:
+                batches = read_csv_batches(csv_path, config, get_batch_size(config))
+                first_row = 1
+            else:
+                batches = read_csv_batches_from(csv_path, config, position, get_batch_size(config))
+                first_row = position['row_number'] + 1
+            counters = {}
+            records = []
+            for batch in map_csv_batches(headers, batches, config, counters=counters, on_errors=records.extend,
+                                         first_row=first_row):
+                send('batch', (batch, dict(position) if position is not None else None, dict(counters), records.copy()))
+                records.clear()
+    except ImportAborted:
+        return
+    except Exception as e:
+        if not log.getvalue():
+            log.write(f"CSV読み込みエラー: {e}\n")
+        try:
+            send('error', log.getvalue())
+        except ImportAborted:
+            pass
+        return
+    
+    try:
+        send('end', log.getvalue())
+    except ImportAborted:
+        pass
+
+def _get_message(file_queue, future):
+    """ワーカーからのメッセージを受信（ワーカーが異常終了していれば例外）"""
+    while True:
+        try:
+            return file_queue.get(timeout=1)
+        except queue.Empty:
+            if not future.done():
+                continue
+        # タスク終了直後は送信中のメッセージが残っている可能性があるため一度だけ待つ
+        try:
+            return file_queue.get(timeout=1)
+        except queue.Empty:
+            raise RuntimeError('ワーカープロセスが異常終了しました')
+
+def _receive_batches(file_queue, future, position=None, counters=None, on_errors=None):
+    """ワーカーから届くバッチを順に返すジェネレータ（読み込みエラー時は例外）
+    
+    positionを指定した場合は、バッチを返す前にそのバッチの再開位置に更新する。
+    countersを指定した場合は、ワーカーで数えたカウンタの累計に更新する。
+    on_errorsはmap_csv_batchesと同じく、変換できない値があったバッチごとに呼び出す。
+    """
+    while True:
+        kind, payload = _get_message(file_queue, future)
+        if kind == 'batch':
+            batch, batch_position, batch_counters, records = payload
+            if position is not None and batch_position:
+                position.update(batch_position)
+            if counters is not None:
+                counters.update(batch_counters)
+            if records and on_errors:
+                on_errors(records)
+            yield batch
+            continue
+        
+        if payload:
+            print(payload, end='', file=sys.stderr if kind == 'error' else sys.stdout)
+        if kind == 'error':
+            raise RuntimeError('CSVの読み込みに失敗しました')
+        return
+
+def _drain_batches(received):
+    """書き込みを中断したファイルの残りバッチを読み捨て、ワーカーを終了させる"""
+    try:
+        for _ in received:
+            pass
+    except RuntimeError:
+        pass
+
+def import_csv_files_parallel(csv_files, workers, progress=None):
+    """CSVファイルを並列にインポートし、成功したファイル数を返す
+    
+    読み込みとマッピングはワーカープロセスで並列に行い、書き込みはこのプロセスが
+    1ファイルずつ行う（SQLiteの書き込みロックは常に1つ）。
+    書き込みは準備ができたファイルから順に行うが、同じテーブルに入るファイル同士は
+    get_csv_filesの順序を保つ。
+    同じ内容・設定のファイルが複数ある場合、2つ目以降は重複を判定できるよう、並列処理の後に逐次処理する。
+    progressはバッチごとにCSVファイルのパスと挿入済み行数を渡して呼び出される。
+    """
+    success_count = 0
+    
+    # 設定ファイルは書き込み側で読み込み・検証する（テーブルごとの順序付けにも使う）
+    jobs = []
+    queued_fingerprints = set()
+    deferred = []  # 同じ内容・設定のファイルがすでにjobsにあるもの
+    for csv_info in csv_files:
+        log = io.StringIO()
+        with redirect_stdout(log), redirect_stderr(log):
+            config = load_import_config(csv_info)
+        if config:
+            with redirect_stdout(log), redirect_stderr(log):
+                start = time.perf_counter()
+                source = identify_import_file(csv_info, config)
+                timings = {'hash': time.perf_counter() - start} if source else {}
+                counters = {} if config.get('metrics', True) else None
+                duplicate = skip_duplicate(csv_info, config, source)
+                checkpoint = None if duplicate else prepare_checkpoint(csv_info, config, source)
+            if duplicate:
+                print(f"\n=== {csv_info[0]} のインポートを開始 ===")
+                print(log.getvalue(), end='')
+                success_count += 1
+                continue
+            if source and source['fingerprint'] in queued_fingerprints:
+                # 取り込み済みの登録は書き込み時に行われるため、ここでは重複と判定できない
+                # 先のファイルの書き込み後に逐次処理し、その時点で重複を判定する
+                deferred.append(csv_info)
+                continue
+            if source:
+                queued_fingerprints.add(source['fingerprint'])
+            jobs.append((csv_info, config, source, checkpoint, timings, counters, log.getvalue()))
+        else:
+            print(f"\n=== {csv_info[0]} のインポートを開始 ===")
+            print(log.getvalue(), end='', file=sys.stderr)
+    
+    # 同じテーブルに入る先行ファイル（これらの書き込み完了を待つ）
+    predecessors = []
+    for i, (_, config, _, _, _, _, _) in enumerate(jobs):
+        predecessors.append([j for j in range(i) if jobs[j][1]['table_name'] == config['table_name']])
+    
+    file_queues = [multiprocessing.Queue(PARALLEL_QUEUE_DEPTH) for _ in jobs]
+    ready_queue = multiprocessing.Queue()
+    abort_event = multiprocessing.Event()
+    
+    with ProcessPoolExecutor(max_workers=workers,
+                             initializer=_init_parse_worker,
+                             initargs=(file_queues, ready_queue, abort_event)) as executor:
+        futures = [executor.submit(_parse_worker, i, csv_info[0], config,
+                                   dict(checkpoint['position']) if checkpoint else None)
+                   for i, (csv_info, config, _, checkpoint, _, _, _) in enumerate(jobs)]
+        
+        try:
+            ready = set()
+            done = set()
+            while len(done) < len(jobs):
+                # 準備ができていて、同じテーブルの先行ファイルが書き込み済みのものを選ぶ
+                writable = [i for i in sorted(ready) if all(j in done for j in predecessors[i])]
+                if not writable:
+                    try:
+                        index = ready_queue.get(timeout=1)
+                        if index not in done:
+                            ready.add(index)
+                    except queue.Empty:
+                        # 何も送らずに異常終了したワーカーのファイルは書き込み可能として扱う
+                        # （受信時にエラーとして報告される）
+                        for i, future in enumerate(futures):
+                            if i not in done and future.done() and future.exception() is not None:
+                                ready.add(i)
+                    continue
+                
+                i = writable[0]
+                ready.discard(i)
+                csv_info, config, source, checkpoint, timings, counters, prepare_log = jobs[i]
+                
+                print(f"\n=== {csv_info[0]} のインポートを開始 ===")
+                print(prepare_log, end='')
+                # 準備の後に同じ内容・設定のファイルが取り込まれていれば（別のプロセスなど）、書き込まない
+                if skip_duplicate(csv_info, config, source):
+                    success_count += 1
+                    _drain_batches(_receive_batches(file_queues[i], futures[i]))
+                    done.add(i)
+                    continue
+                errors = ConversionErrors(csv_info, config)
+                received = _receive_batches(file_queues[i], futures[i],
+                                            checkpoint['position'] if checkpoint else None, counters, errors.add)
+                file_progress = (lambda rows, path=csv_info[0]: progress(path, rows)) if progress else None
+                if write_csv_batches(csv_info, config, received, file_progress, checkpoint, source, timings,
+                                     counters, errors):
+                    success_count += 1
+                _drain_batches(received)
+                done.add(i)
+        except BaseException:
+            # 書き込み側の異常時はワーカーに中断を通知し、プールの終了待ちで止まらないようにする
+            abort_event.set()
+            raise
+    
+    for csv_info in deferred:
+        file_progress = (lambda rows, path=csv_info[0]: progress(path, rows)) if progress else None
+        if import_csv_file(csv_info, progress=file_progress):
+            success_count += 1
+    
+    return success_count
+
+def recount_catalog():
+    """テーブル一覧（カタログ）を再集計し、補正内容を表示"""
+    print("テーブル一覧のレコード数を再集計します")
+    corrected = db.recount_import_tables()
+    for entry in corrected:
+        print(f"  {entry['table_name']}: {entry['old_count']} → {entry['new_count']} 件"
+              + ("（カラム情報を更新）" if entry['columns_changed'] else ""))
+    print(f"補正したテーブル: {len(corrected)} 件")
+
+def run_import(workers=1, chunk_workers=1, progress=None, csv_files=None):
+    """importフォルダのCSVファイルをすべてインポートし、(成功数, ファイル数)を返す
+    
+    Webインターフェースなどから同じプロセス内で呼び出せる。進捗は標準出力に逐次出力する。
+    progressを指定すると、バッチごとにCSVファイルのパスとファイル内の挿入済み行数を渡して呼び出す。
+    csv_filesを指定すると、importフォルダを検索せずにそのファイルだけをインポートする。
+    """
     print("CSVインポートツールを開始します")
     print(f"importフォルダ: {IMPORT_FOLDER}")
     print(f"logフォルダ: {LOG_FOLDER}")
-    print()
+    print(flush=True)
     
     # フォルダを確認
     ensure_folders()
@@ -254,23 +1652,102 @@ def main():
     db.init_database()
     
     # インポート対象のファイルを取得
-    csv_files = get_csv_files()
+    if csv_files is None:
+        csv_files = get_csv_files()
     
     if not csv_files:
         print("インポート対象のファイルがありません")
         print("importフォルダにCSVファイルと対応するJSON設定ファイルを配置してください")
-        return
+        return 0, 0
+    
+    print(f"{len(csv_files)} 組のファイルが見つかりました", flush=True)
     
-    print(f"{len(csv_files)} 組のファイルが見つかりました")
+    # スナップショットを書き出すテーブルと形式（設定の不備はインポート時に報告されるため、ここでは出力しない）
+    # 文字コードの判定はファイルごとのインポートで行うため、ここでは設定ファイルの読み込みと検証だけを行う
+    with redirect_stdout(io.StringIO()), redirect_stderr(io.StringIO()):
+        configs = [load_config(csv_info[1]) for csv_info in csv_files]
+        configs = [config for config in configs if config and validate_config(config)]
+    snapshot_formats = {config['table_name']: config['snapshot'] if isinstance(config['snapshot'], str) else None
+                        for config in configs if config.get('snapshot')}
+    started_at = datetime.now().isoformat()
     
     # 各ファイルをインポート
-    success_count = 0
-    for csv_info in csv_files:
-        if import_csv_file(csv_info):
-            success_count += 1
+    if workers > 1:
+        print(f"ワーカー数: {workers}")
+        success_count = import_csv_files_parallel(csv_files, workers, progress)
+    else:
+        success_count = 0
+        for csv_info in csv_files:
+            file_progress = (lambda rows, path=csv_info[0]: progress(path, rows)) if progress else None
+            if import_csv_file(csv_info, chunk_workers, file_progress):
+                success_count += 1
+    
+    # 取り込み後のデータベース全体の統計情報などを更新
+    if success_count:
+        db.optimize_database()
+        
+        # 今回取り込んだテーブルのスナップショットを書き出す
+        imported = {table['table_name'] for table in db.get_import_tables()
+                    if table['last_import_at'] and table['last_import_at'] >= started_at}
+        snapshot_tables = [table_name for table_name in snapshot_formats if table_name in imported]
+        if snapshot_tables:
+            print("\nスナップショットを書き出しています...", flush=True)
+            snapshot.write_snapshots(snapshot_tables, snapshot_formats)
     
     print(f"\n=== インポート完了 ===")
-    print(f"成功: {success_count}/{len(csv_files)} ファイル")
+    print(f"成功: {success_count}/{len(csv_files)} ファイル", flush=True)
+    return success_count, len(csv_files)
+
+def run_profiled(func, *args, profile_path=None, trace_memory=False):
+    """funcを実行し、cProfile・tracemallocの結果を表示する（詳細な調査用）
+    
+    profile_pathを指定するとcProfileの結果をそのファイルに保存し、累積時間の上位を表示する
+    （保存したファイルは python -m pstats などで開ける）。
+    trace_memoryを指定するとtracemallocでメモリの確保を追跡し、ピークと確保量の上位の箇所を表示する。
+    どちらもこのプロセスだけが対象で、処理もかなり遅くなるため、通常のインポートでは使わない。
+    """
+    profiler = cProfile.Profile() if profile_path else None
+    if trace_memory:
+        tracemalloc.start()
+    try:
+        if profiler:
+            return profiler.runcall(func, *args)
+        return func(*args)
+    finally:
+        if profiler:
+            profiler.dump_stats(profile_path)
+            print(f"\nプロファイルを保存しました: {profile_path}")
+            pstats.Stats(profiler).sort_stats('cumulative').print_stats(PROFILE_TOP_COUNT)
+        if trace_memory:
+            memory_snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(f"\nメモリ（tracemalloc）: 終了時 {current / (1024 * 1024):.1f}MB / ピーク {peak / (1024 * 1024):.1f}MB")
+            for stat in memory_snapshot.statistics('lineno')[:PROFILE_TOP_COUNT]:
+                print(f"  {stat}")
+
+def main():
+    """メイン処理"""
+    parser = argparse.ArgumentParser(description='CSVインポートツール')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='読み込み・変換を並列に行うワーカープロセス数（既定: 1 = 逐次処理）')
+    parser.add_argument('--chunk-workers', type=int, default=1,
+                        help='1ファイルを分割して並列に読み込むプロセス数（--workers 1 の場合のみ有効）')
+    parser.add_argument('--recount', action='store_true',
+                        help='インポートを行わず、テーブル一覧のレコード数・カラム情報を実テーブルから再集計')
+    parser.add_argument('--profile', metavar='PATH',
+                        help='cProfileで計測して結果をPATHに保存し、累積時間の上位を表示（詳細な調査用）')
+    parser.add_argument('--trace-memory', action='store_true',
+                        help='tracemallocでメモリの確保を追跡し、ピークと上位の箇所を表示（詳細な調査用）')
+    args = parser.parse_args()
+    
+    if args.recount:
+        db.init_database()
+        recount_catalog()
+        return
+    
+    run_profiled(run_import, args.workers, args.chunk_workers,
+                 profile_path=args.profile, trace_memory=args.trace_memory)
 
 if __name__ == '__main__':
     main()
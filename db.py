@@ -3,335 +3,1563 @@
 import sqlite3
 import os
 import json
+import queue
+import threading
+import time
+from contextlib import contextmanager
 from datetime import datetime
 import sys
 
 # データベースファイルパス
 DB_PATH = os.path.join(os.path.dirname(__file__), 'container_yard.db')
 
-def init_database():
-    """データベースを初期化し、必要なテーブルを作成"""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
-    # タスク管理用テーブル
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS tasks (
-            id TEXT PRIMARY KEY,
-            name TEXT NOT NULL,
-            status TEXT DEFAULT 'CONTINUE',
-            create_date TEXT,
-            update_date TEXT,
-            complete_date TEXT,
-            pinned INTEGER DEFAULT 0,
-            category TEXT,
-            group_category TEXT,
-            content TEXT,
-            tags TEXT,  -- JSON形式で保存
-            担当者 TEXT,
-            大分類 TEXT,
-            中分類 TEXT,
-            小分類 TEXT,
-            regular TEXT DEFAULT 'Regular',
-            report_flag INTEGER DEFAULT 0
-        )
-    ''')
-    
-    # CSVインポート用の動的テーブル作成関数を追加
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS import_tables (
-            table_name TEXT PRIMARY KEY,
-            columns TEXT NOT NULL,  -- JSON形式でカラム定義を保存
-            created_at TEXT DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    
-    conn.commit()
-    conn.close()
+# 一括ロード時に一時的に適用するPRAGMA設定（プロファイル名 → PRAGMA）
+# safe:       既定の設定のまま（ジャーナル・同期ありで最も安全）
+# fast:       WAL・同期なし・大きなキャッシュ・排他ロック（OSクラッシュ時は直近のロードが失われうる）
+# unsafe-max: ジャーナルなし（ロード中の異常終了でDBが破損しうる。ロールバックも効かない）
+BULK_LOAD_PROFILES = {
+    'safe': {},
+    'fast': {
+        'locking_mode': 'EXCLUSIVE',
+        'journal_mode': 'WAL',
+        'synchronous': 'OFF',
+        'cache_size': -262144,  # 256MB
+        'temp_store': 'MEMORY',
+    },
+    'unsafe-max': {
+        'locking_mode': 'EXCLUSIVE',
+        'journal_mode': 'OFF',
+        'synchronous': 'OFF',
+        'cache_size': -1048576,  # 1GB
+        'temp_store': 'MEMORY',
+    },
+}
+DEFAULT_BULK_PROFILE = 'safe'
 
-def get_connection():
-    """データベース接続を取得"""
-    return sqlite3.connect(DB_PATH)
+# import_tables（インポート済みテーブルのカタログ）に後から追加したカラム
+IMPORT_CATALOG_COLUMNS = [
+    ('row_count', 'INTEGER NOT NULL DEFAULT 0'),  # インポート時に更新するレコード数
+    ('last_import_at', 'TEXT'),                   # 最終インポート日時
+    ('snapshot_path', 'TEXT'),                    # 列指向スナップショット（Parquet/Arrow）のパス
+    ('snapshot_at', 'TEXT'),                      # スナップショットの書き出し日時
+]
 
-def fetch_one(task_id):
-    """タスクを1件取得"""
-    conn = get_connection()
-    conn.row_factory = sqlite3.Row
-    cursor = conn.cursor()
+# インポート後の統計情報の収集でインデックスごとに調べる行数の上限（PRAGMA analysis_limit）
+ANALYSIS_LIMIT = 1000
+
+# インポート時の既存データの扱い
+# append: 追加、replace: 全件を入れ替え、upsert: キーが一致する行は更新し、それ以外は追加
+IMPORT_MODES = ('append', 'replace', 'upsert')
+DEFAULT_IMPORT_MODE = 'append'
+
+# 全文検索用のFTS5テーブルのトークナイザ（先頭から順に、使えるものを使う）
+# trigramは3文字単位で索引を作るため、分かち書きをしない日本語の文章でも部分一致で検索できる
+FULLTEXT_TOKENIZERS = ('trigram', 'unicode61')
+
+# trigramの索引で検索できる検索語の最小文字数（これより短い語はLIKEで絞り込む）
+FULLTEXT_MIN_TERM_LENGTH = 3
+
+# FTS5テーブルを元のテーブルと同期するトリガーの名前の末尾（挿入・削除・更新）
+FULLTEXT_TRIGGER_SUFFIXES = ('ai', 'ad', 'au')
+
+# 設定ファイルのデータ型と、テーブル作成時に宣言するSQLiteの型が異なるもの（型名 → SQLiteの型）
+# DATE・DATETIMEはISO形式の文字列で格納し、文字列として比較させる
+# （型名のままだとNUMERIC型になり、絞り込みの値「2024」などが数値に変換されて比較できない）
+STORAGE_TYPES = {
+    'DATE': 'TEXT',
+    'DATETIME': 'TEXT',
+    'BOOLEAN': 'INTEGER',
+    'DECIMAL': 'REAL',
+}
+
+# 前方一致の絞り込みを使えるデータ型（型名にいずれかを含むもの。DATEはDATETIMEも含む）
+PREFIX_FILTER_TYPES = ('TEXT', 'DATE')
+
+# テーブル表示の絞り込み条件の演算子（演算子名 → SQLの比較演算子）
+# prefixは前方一致（インデックスを使えるよう範囲検索に変換する。TEXT・DATE・DATETIME型のカラムのみ）
+FILTER_OPERATORS = {
+    'eq': '=',
+    'gt': '>',
+    'ge': '>=',
+    'lt': '<',
+    'le': '<=',
+    'prefix': None,
+}
+
+# 同じカラムでの絞り込みがこの回数に達したら、そのカラムのインデックスを自動で作成する
+FILTER_INDEX_THRESHOLD = 3
+
+# エクスポート時に1回のfetchmanyで読み込む行数
+EXPORT_BATCH_SIZE = 5000
+
+# 接続プールに保持しておく未使用接続の最大数
+DEFAULT_POOL_SIZE = 4
+
+# 接続ごとにキャッシュするプリペアドステートメントの数
+DEFAULT_CACHED_STATEMENTS = 256
+
+def _parse_task_row(row):
+    """tasksテーブルの行を辞書に変換"""
+    result = dict(row)
+    # tagsをJSONからリストに変換
+    if result.get('tags'):
+        try:
+            result['tags'] = json.loads(result['tags'])
+        except:
+            result['tags'] = []
+    else:
+        result['tags'] = []
+    return result
+
+def get_storage_type(data_type):
+    """設定ファイルのデータ型から、テーブル作成時に宣言するSQLiteの型を取得（例: 'DECIMAL(10,2)' → 'REAL'）"""
+    return STORAGE_TYPES.get(data_type.split('(')[0].strip().upper(), data_type)
+
+@contextmanager
+def bulk_load_settings(conn, profile=DEFAULT_BULK_PROFILE):
+    """一括ロード用のPRAGMAを一時的に適用し、終了時に元の設定へ戻す"""
+    pragmas = BULK_LOAD_PROFILES[profile]
+    saved = []
     
-    cursor.execute('SELECT * FROM tasks WHERE id = ?', (task_id,))
-    row = cursor.fetchone()
+    try:
+        for name, value in pragmas.items():
+            saved.append((name, conn.execute(f'PRAGMA {name}').fetchone()[0]))
+            conn.execute(f'PRAGMA {name} = {value}')
+        yield conn
+    finally:
+        # 適用したのと逆順で元の設定に戻す（journal_modeはトランザクション外で戻す必要がある）
+        if conn.in_transaction:
+            conn.rollback()
+        for name, value in reversed(saved):
+            try:
+                conn.execute(f'PRAGMA {name} = {value}')
+            except sqlite3.Error as e:
+                print(f"PRAGMA復元エラー ({name}): {e}", file=sys.stderr)
+        if saved:
+            # locking_modeをNORMALに戻した後、次のアクセスで排他ロックが解放される
+            try:
+                conn.execute('SELECT COUNT(*) FROM sqlite_master').fetchone()
+            except sqlite3.Error as e:
+                print(f"ロック解放エラー: {e}", file=sys.stderr)
+
+class Database:
+    """SQLite接続を再利用するデータベースセッション
     
-    conn.close()
+    接続は小さなプールで保持し、スレッド間で共有できる（同時に使うのは1スレッドのみ）。
+    各接続はプリペアドステートメントをキャッシュする。
+    """
     
-    if row:
-        result = dict(row)
-        # tagsをJSONからリストに変換
-        if result.get('tags'):
-            try:
-                result['tags'] = json.loads(result['tags'])
-            except:
-                result['tags'] = []
-        else:
-            result['tags'] = []
-        return result
+    def __init__(self, path=None, pool_size=DEFAULT_POOL_SIZE, cached_statements=DEFAULT_CACHED_STATEMENTS):
+        self.path = path or DB_PATH
+        self.pool_size = pool_size
+        self.cached_statements = cached_statements
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
     
-    return None
-
-def fetch_all():
-    """全タスクを取得"""
-    conn = get_connection()
-    conn.row_factory = sqlite3.Row
-    cursor = conn.cursor()
+    def _connect(self):
+        """新しい接続を作成"""
+        return sqlite3.connect(self.path,
+                               cached_statements=self.cached_statements,
+                               check_same_thread=False)
     
-    cursor.execute('SELECT * FROM tasks ORDER BY update_date DESC')
-    rows = cursor.fetchall()
+    def _acquire(self):
+        """プールから接続を取り出す（空なら新規作成）"""
+        with self._lock:
+            if self._pid != os.getpid():
+                # fork後の子プロセスでは親の接続を使わない
+                self._idle = queue.LifoQueue()
+                self._pid = os.getpid()
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            return self._connect()
     
-    conn.close()
+    def _release(self, conn):
+        """接続をプールに戻す（上限を超える場合は閉じる）"""
+        if conn.in_transaction:
+            conn.rollback()
+        if self._pid == os.getpid() and self._idle.qsize() < self.pool_size:
+            self._idle.put(conn)
+        else:
+            conn.close()
+    
+    @contextmanager
+    def connection(self):
+        """プールの接続を一時的に借りる"""
+        conn = self._acquire()
+        try:
+            yield conn
+        finally:
+            self._release(conn)
     
-    results = []
-    for row in rows:
-        result = dict(row)
-        # tagsをJSONからリストに変換
-        if result.get('tags'):
+    @contextmanager
+    def transaction(self):
+        """トランザクション内で接続を使う（正常終了でコミット、例外でロールバック）"""
+        with self.connection() as conn:
             try:
-                result['tags'] = json.loads(result['tags'])
-            except:
-                result['tags'] = []
-        else:
-            result['tags'] = []
-        results.append(result)
+                yield conn
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
     
-    return results
-
-def insert(task_dict):
-    """タスクを挿入"""
-    conn = get_connection()
-    cursor = conn.cursor()
-    
-    # tagsをJSONに変換
-    tags_json = json.dumps(task_dict.get('tags', []), ensure_ascii=False)
-    
-    cursor.execute('''
-        INSERT INTO tasks (
-            id, name, status, create_date, update_date, complete_date,
-            pinned, category, group_category, content, tags, 担当者,
-            大分類, 中分類, 小分類, regular, report_flag
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-    ''', (
-        task_dict.get('id'),
-        task_dict.get('name'),
-        task_dict.get('status', 'CONTINUE'),
-        task_dict.get('create_date'),
-        task_dict.get('update_date'),
-        task_dict.get('complete_date'),
-        int(task_dict.get('pinned', False)),
-        task_dict.get('category'),
-        task_dict.get('group_category'),
-        task_dict.get('content'),
-        tags_json,
-        task_dict.get('担当者'),
-        task_dict.get('大分類'),
-        task_dict.get('中分類'),
-        task_dict.get('小分類'),
-        task_dict.get('regular', 'Regular'),
-        int(task_dict.get('report_flag', False))
-    ))
-    
-    conn.commit()
-    conn.close()
-
-def update(task_id, task_dict):
-    """タスクを更新"""
-    conn = get_connection()
-    cursor = conn.cursor()
-    
-    # tagsをJSONに変換
-    tags_json = json.dumps(task_dict.get('tags', []), ensure_ascii=False)
-    
-    cursor.execute('''
-        UPDATE tasks SET 
-            name = ?, status = ?, create_date = ?, update_date = ?,
-            complete_date = ?, pinned = ?, category = ?, group_category = ?,
-            content = ?, tags = ?, 担当者 = ?, 大分類 = ?, 中分類 = ?,
-            小分類 = ?, regular = ?, report_flag = ?
-        WHERE id = ?
-    ''', (
-        task_dict.get('name'),
-        task_dict.get('status'),
-        task_dict.get('create_date'),
-        task_dict.get('update_date'),
-        task_dict.get('complete_date'),
-        int(task_dict.get('pinned', False)),
-        task_dict.get('category'),
-        task_dict.get('group_category'),
-        task_dict.get('content'),
-        tags_json,
-        task_dict.get('担当者'),
-        task_dict.get('大分類'),
-        task_dict.get('中分類'),
-        task_dict.get('小分類'),
-        task_dict.get('regular', 'Regular'),
-        int(task_dict.get('report_flag', False)),
-        task_id
-    ))
-    
-    conn.commit()
-    conn.close()
-
-def delete(task_id):
-    """タスクを削除"""
-    conn = get_connection()
-    cursor = conn.cursor()
+    def close(self):
+        """プール内の未使用接続をすべて閉じる"""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+    
+    def init_database(self):
+        """データベースを初期化し、必要なテーブルを作成"""
+        catalog_migrated = False
+        
+        with self.transaction() as conn:
+            cursor = conn.cursor()
+            
+            # タスク管理用テーブル
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS tasks (
+                    id TEXT PRIMARY KEY,
+                    name TEXT NOT NULL,
+                    status TEXT DEFAULT 'CONTINUE',
+                    create_date TEXT,
+                    update_date TEXT,
+                    complete_date TEXT,
+                    pinned INTEGER DEFAULT 0,
+                    category TEXT,
+                    group_category TEXT,
+                    content TEXT,
+                    tags TEXT,  -- JSON形式で保存
+                    担当者 TEXT,
+                    大分類 TEXT,
+                    中分類 TEXT,
+                    小分類 TEXT,
+                    regular TEXT DEFAULT 'Regular',
+                    report_flag INTEGER DEFAULT 0
+                )
+            ''')
+            
+            # CSVインポート用の動的テーブル作成関数を追加
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS import_tables (
+                    table_name TEXT PRIMARY KEY,
+                    columns TEXT NOT NULL,  -- JSON形式でカラム定義を保存
+                    created_at TEXT DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            
+            # 途中で失敗したインポートの再開位置（CSVの内容のハッシュごと）
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS import_checkpoints (
+                    file_hash TEXT PRIMARY KEY,
+                    table_name TEXT NOT NULL,
+                    csv_name TEXT,
+                    byte_offset INTEGER NOT NULL,  -- 最後にコミットしたバッチの末尾の位置
+                    row_number INTEGER NOT NULL,   -- コミット済みのデータ行数
+                    updated_at TEXT
+                )
+            ''')
+            
+            # 取り込み済みのCSVと設定の組（重複判定用）
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS import_fingerprints (
+                    fingerprint TEXT PRIMARY KEY,  -- CSVの内容と設定のハッシュ
+                    file_hash TEXT NOT NULL,       -- CSVの内容のハッシュ
+                    table_name TEXT NOT NULL,
+                    csv_name TEXT,
+                    row_count INTEGER,
+                    imported_at TEXT
+                )
+            ''')
+            
+            # バックグラウンドで実行するインポートジョブのキュー
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS import_jobs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    status TEXT NOT NULL DEFAULT 'queued',  -- queued/running/done/failed
+                    workers INTEGER NOT NULL DEFAULT 1,
+                    chunk_workers INTEGER NOT NULL DEFAULT 1,
+                    created_at TEXT NOT NULL,
+                    started_at TEXT,
+                    finished_at TEXT,
+                    rows_done INTEGER NOT NULL DEFAULT 0,
+                    rows_total INTEGER,
+                    success_count INTEGER,
+                    file_count INTEGER,
+                    log TEXT,
+                    csv_files TEXT  -- JSON形式で対象ファイルの組のリストを保存（NULLはimportフォルダ全体）
+                )
+            ''')
+            
+            # テーブル表示で絞り込みに使われたカラムの回数（インデックスの自動作成用）
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS import_filter_stats (
+                    table_name TEXT NOT NULL,
+                    column_name TEXT NOT NULL,
+                    use_count INTEGER NOT NULL DEFAULT 0,
+                    last_used_at TEXT,
+                    PRIMARY KEY (table_name, column_name)
+                )
+            ''')
+            
+            # ファイルごとのインポートの計測値（処理段階ごとの秒数とカウンタ）
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS import_metrics (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    table_name TEXT NOT NULL,
+                    csv_name TEXT,
+                    success INTEGER NOT NULL,
+                    row_count INTEGER,
+                    byte_count INTEGER,
+                    seconds REAL,           -- 処理段階の秒数の合計
+                    timings TEXT,           -- JSON形式で処理段階ごとの秒数を保存
+                    counters TEXT,          -- JSON形式でカウンタを保存
+                    recorded_at TEXT NOT NULL
+                )
+            ''')
+            
+            # 既存のカタログに不足しているカラムを追加
+            cursor.execute('PRAGMA table_info(import_tables)')
+            existing = {col[1] for col in cursor.fetchall()}
+            for name, definition in IMPORT_CATALOG_COLUMNS:
+                if name not in existing:
+                    cursor.execute(f'ALTER TABLE import_tables ADD COLUMN {name} {definition}')
+                    catalog_migrated = True
+            
+            # 既存のジョブのキューに対象ファイルのカラムを追加
+            cursor.execute('PRAGMA table_info(import_jobs)')
+            if 'csv_files' not in {col[1] for col in cursor.fetchall()}:
+                cursor.execute('ALTER TABLE import_jobs ADD COLUMN csv_files TEXT')
+        
+        # カラムを追加した場合、既存テーブルのレコード数を一度だけ集計
+        if catalog_migrated:
+            self.recount_import_tables()
     
-    cursor.execute('DELETE FROM tasks WHERE id = ?', (task_id,))
+    def fetch_one(self, task_id):
+        """タスクを1件取得"""
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = sqlite3.Row
+            cursor.execute('SELECT * FROM tasks WHERE id = ?', (task_id,))
+            row = cursor.fetchone()
+        
+        if row:
+            return _parse_task_row(row)
+        
+        return None
     
-    conn.commit()
-    conn.close()
-
-# CSVインポート用の関数
-def create_import_table(table_name, columns):
-    """CSVインポート用の動的テーブルを作成"""
-    conn = get_connection()
-    cursor = conn.cursor()
+    def fetch_all(self):
+        """全タスクを取得"""
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = sqlite3.Row
+            cursor.execute('SELECT * FROM tasks ORDER BY update_date DESC')
+            rows = cursor.fetchall()
+        
+        return [_parse_task_row(row) for row in rows]
     
-    # カラム定義をJSONで保存
-    columns_json = json.dumps(columns, ensure_ascii=False)
+    def insert(self, task_dict):
+        """タスクを挿入"""
+        # tagsをJSONに変換
+        tags_json = json.dumps(task_dict.get('tags', []), ensure_ascii=False)
+        
+        with self.transaction() as conn:
+            conn.execute('''
+                INSERT INTO tasks (
+                    id, name, status, create_date, update_date, complete_date,
+                    pinned, category, group_category, content, tags, 担当者,
+                    大分類, 中分類, 小分類, regular, report_flag
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (
+                task_dict.get('id'),
+                task_dict.get('name'),
+                task_dict.get('status', 'CONTINUE'),
+                task_dict.get('create_date'),
+                task_dict.get('update_date'),
+                task_dict.get('complete_date'),
+                int(task_dict.get('pinned', False)),
+                task_dict.get('category'),
+                task_dict.get('group_category'),
+                task_dict.get('content'),
+                tags_json,
+                task_dict.get('担当者'),
+                task_dict.get('大分類'),
+                task_dict.get('中分類'),
+                task_dict.get('小分類'),
+                task_dict.get('regular', 'Regular'),
+                int(task_dict.get('report_flag', False))
+            ))
     
-    # テーブル作成SQLを生成
-    column_defs = []
-    for col in columns:
-        column_defs.append(f"{col['name']} {col['type']}")
+    def update(self, task_id, task_dict):
+        """タスクを更新"""
+        # tagsをJSONに変換
+        tags_json = json.dumps(task_dict.get('tags', []), ensure_ascii=False)
+        
+        with self.transaction() as conn:
+            conn.execute('''
+                UPDATE tasks SET 
+                    name = ?, status = ?, create_date = ?, update_date = ?,
+                    complete_date = ?, pinned = ?, category = ?, group_category = ?,
+                    content = ?, tags = ?, 担当者 = ?, 大分類 = ?, 中分類 = ?,
+                    小分類 = ?, regular = ?, report_flag = ?
+                WHERE id = ?
+            ''', (
+                task_dict.get('name'),
+                task_dict.get('status'),
+                task_dict.get('create_date'),
+                task_dict.get('update_date'),
+                task_dict.get('complete_date'),
+                int(task_dict.get('pinned', False)),
+                task_dict.get('category'),
+                task_dict.get('group_category'),
+                task_dict.get('content'),
+                tags_json,
+                task_dict.get('担当者'),
+                task_dict.get('大分類'),
+                task_dict.get('中分類'),
+                task_dict.get('小分類'),
+                task_dict.get('regular', 'Regular'),
+                int(task_dict.get('report_flag', False)),
+                task_id
+            ))
     
-    create_sql = f"CREATE TABLE IF NOT EXISTS {table_name} ({', '.join(column_defs)})"
+    def delete(self, task_id):
+        """タスクを削除"""
+        with self.transaction() as conn:
+            conn.execute('DELETE FROM tasks WHERE id = ?', (task_id,))
     
-    try:
-        cursor.execute(create_sql)
+    # CSVインポート用のメソッド
+    def create_import_table(self, table_name, columns, primary_key=None, unique=None, fulltext=None):
+        """CSVインポート用の動的テーブルを作成
+        
+        primary_keyは主キーのカラム名のリスト、uniqueは一意制約ごとのカラム名のリストのリスト。
+        既存のテーブルには主キー・一意制約を追加できないため、不足している分は一意インデックスで補う。
+        fulltextは全文検索の対象カラム名のリスト（FTS5テーブル「テーブル名_fts」を作成する）。
+        """
+        unique = unique or []
+        
+        # カラム定義をJSONで保存
+        columns_json = json.dumps(columns, ensure_ascii=False)
+        
+        # テーブル作成SQLを生成
+        column_defs = []
+        for col in columns:
+            column_defs.append(f"{col['name']} {get_storage_type(col['type'])}")
+        if primary_key:
+            column_defs.append(f"PRIMARY KEY ({', '.join(primary_key)})")
+        for key_columns in unique:
+            column_defs.append(f"UNIQUE ({', '.join(key_columns)})")
+        
+        create_sql = f"CREATE TABLE IF NOT EXISTS {table_name} ({', '.join(column_defs)})"
+        
+        try:
+            with self.transaction() as conn:
+                cursor = conn.cursor()
+                cursor.execute(create_sql)
+                
+                # 既存のテーブルで不足しているキーを一意インデックスとして追加
+                existing_keys = self._get_unique_keys(cursor, table_name)
+                for key_columns in ([primary_key] if primary_key else []) + unique:
+                    if frozenset(key_columns) not in existing_keys:
+                        cursor.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS "
+                                       f"uq_{table_name}_{'_'.join(key_columns)} "
+                                       f"ON {table_name} ({', '.join(key_columns)})")
+                
+                # 全文検索用のFTS5テーブル
+                self._sync_fulltext_table(cursor, table_name, fulltext or [])
+                
+                # テーブル情報を保存（既存の場合は作成日時・レコード数を保持）
+                cursor.execute('''
+                    INSERT INTO import_tables (table_name, columns, created_at)
+                    VALUES (?, ?, ?)
+                    ON CONFLICT(table_name) DO UPDATE SET columns = excluded.columns
+                ''', (table_name, columns_json, datetime.now().isoformat()))
+            return True
+        except Exception as e:
+            print(f"テーブル作成エラー: {e}", file=sys.stderr)
+            return False
+    
+    def _get_unique_keys(self, cursor, table_name):
+        """テーブルの主キー・一意インデックスのカラムの組を取得（frozensetの集合）"""
+        keys = set()
+        
+        cursor.execute(f'PRAGMA table_info({table_name})')
+        primary_key = [row[1] for row in cursor.fetchall() if row[5] > 0]
+        if primary_key:
+            keys.add(frozenset(primary_key))
+        
+        cursor.execute(f'PRAGMA index_list({table_name})')
+        for index in cursor.fetchall():
+            # (seq, name, unique, origin, partial)
+            if index[2] and not index[4]:
+                cursor.execute(f'PRAGMA index_info({index[1]})')
+                keys.add(frozenset(row[2] for row in cursor.fetchall()))
+        return keys
+    
+    def _get_fulltext_info(self, cursor, table_name):
+        """テーブルの全文検索用FTS5テーブルの (カラム名のリスト, trigramかどうか) を取得（ない場合はNone）"""
+        fulltext_table = f"{table_name}_fts"
+        cursor.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (fulltext_table,))
+        row = cursor.fetchone()
+        if not row:
+            return None
+        cursor.execute(f"PRAGMA table_info({fulltext_table})")
+        return [col[1] for col in cursor.fetchall()], 'trigram' in row[0]
+    
+    def _sync_fulltext_table(self, cursor, table_name, columns):
+        """全文検索用のFTS5テーブルと同期用のトリガーを作成（カラムが変わった場合は作り直す）
+        
+        FTS5テーブルは元のテーブルを参照する外部コンテンツ方式で、挿入・削除・更新（replace・upsertを含む）は
+        トリガーで反映する。作成時・作り直し時は既存の行から索引を構築する。
+        columnsが空の場合は既存のFTS5テーブルをそのまま残す。
+        """
+        if not columns:
+            return
+        
+        fulltext_table = f"{table_name}_fts"
+        info = self._get_fulltext_info(cursor, table_name)
+        if info and info[0] == list(columns):
+            return
+        if info:
+            for suffix in FULLTEXT_TRIGGER_SUFFIXES:
+                cursor.execute(f"DROP TRIGGER IF EXISTS {fulltext_table}_{suffix}")
+            cursor.execute(f"DROP TABLE {fulltext_table}")
+        
+        # 使えるトークナイザのうち先頭のものを使う（trigramはSQLite 3.34以降）
+        for tokenizer in FULLTEXT_TOKENIZERS:
+            try:
+                cursor.execute(f"""
+                    CREATE VIRTUAL TABLE {fulltext_table} USING fts5(
+                        {', '.join(columns)}, content='{table_name}', content_rowid='rowid', tokenize='{tokenizer}'
+                    )
+                """)
+                break
+            except sqlite3.OperationalError:
+                if tokenizer == FULLTEXT_TOKENIZERS[-1]:
+                    raise
+        
+        for trigger_sql in self._build_fulltext_triggers(table_name, columns):
+            cursor.execute(trigger_sql)
+        cursor.execute(f"INSERT INTO {fulltext_table}({fulltext_table}) VALUES ('rebuild')")
+    
+    def _build_fulltext_triggers(self, table_name, columns):
+        """元のテーブルの変更をFTS5テーブルに反映するトリガーのCREATE TRIGGER文のリストを返す"""
+        fulltext_table = f"{table_name}_fts"
+        column_list = ', '.join(columns)
+        new_values = ', '.join(f"new.{name}" for name in columns)
+        old_values = ', '.join(f"old.{name}" for name in columns)
+        insert = f"INSERT INTO {fulltext_table}(rowid, {column_list}) VALUES (new.rowid, {new_values});"
+        delete = (f"INSERT INTO {fulltext_table}({fulltext_table}, rowid, {column_list}) "
+                  f"VALUES ('delete', old.rowid, {old_values});")
+        return [
+            f"CREATE TRIGGER {fulltext_table}_ai AFTER INSERT ON {table_name} BEGIN {insert} END",
+            f"CREATE TRIGGER {fulltext_table}_ad AFTER DELETE ON {table_name} BEGIN {delete} END",
+            f"CREATE TRIGGER {fulltext_table}_au AFTER UPDATE ON {table_name} BEGIN {delete} {insert} END",
+        ]
+    
+    def _drop_fulltext_triggers(self, cursor, table_name):
+        """FTS5テーブルの同期用トリガーを削除し、作り直すためのCREATE TRIGGER文のリストを返す
+        
+        トリガーを作り直した後は、FTS5テーブルの索引を'rebuild'で構築し直す必要がある。
+        """
+        info = self._get_fulltext_info(cursor, table_name)
+        if not info:
+            return []
+        for suffix in FULLTEXT_TRIGGER_SUFFIXES:
+            cursor.execute(f"DROP TRIGGER IF EXISTS {table_name}_fts_{suffix}")
+        return self._build_fulltext_triggers(table_name, info[0])
+    
+    def create_import_indexes(self, table_name, indexes):
+        """テーブルに（一意でない）インデックスを作成し、作成したインデックス名のリストを返す
+        
+        indexesはインデックスごとのカラム名のリストのリスト。作成済みのものはそのまま。
+        失敗時はNone。
+        """
+        created = []
+        try:
+            with self.transaction() as conn:
+                cursor = conn.cursor()
+                cursor.execute(f'PRAGMA index_list({table_name})')
+                existing = {row[1] for row in cursor.fetchall()}
+                
+                for index_columns in indexes:
+                    index_name = f"idx_{table_name}_{'_'.join(index_columns)}"
+                    if index_name in existing:
+                        continue
+                    cursor.execute(f"CREATE INDEX {index_name} ON {table_name} ({', '.join(index_columns)})")
+                    created.append(index_name)
+            return created
+        except Exception as e:
+            print(f"インデックス作成エラー: {e}", file=sys.stderr)
+            return None
+    
+    def insert_csv_batches(self, table_name, batches, profile=DEFAULT_BULK_PROFILE, checkpoint=None, source=None,
+                           import_mode=DEFAULT_IMPORT_MODE, key_columns=None, defer_indexes=False, timings=None,
+                           counters=None):
+        """バッチ単位でCSVデータをテーブルに挿入
+        
+        batchesは行リストを順に返すイテラブル（ジェネレータ可）。
+        全バッチを1トランザクションで挿入し、挿入（upsertでは挿入・更新）した行数を返す。失敗時はNone。
+        profileにはBULK_LOAD_PROFILESのキーを指定する。
+        
+        import_modeにはIMPORT_MODESのいずれかを指定する。replaceでは最初のバッチの挿入前に
+        既存の行を削除し（チェックポイントから再開する場合を除く）、upsertではkey_columnsが
+        一致する行を更新する。カタログのレコード数には挿入した行数を足し（replaceでは削除時に0にする）、
+        更新した行を含むupsertでは最後のコミットで実テーブルから数え直す。
+        
+        defer_indexesを指定すると、一意でないインデックスを挿入前に削除し、挿入後に同じ定義で
+        作り直す（同じトランザクション内で行うため、失敗時は元に戻る）。checkpointとは併用できない。
+        全文検索のFTS5テーブルも同様に、同期用のトリガーを外して挿入し、挿入後に索引をまとめて構築する。
+        timingsに辞書を指定すると、挿入（'insert'）とインデックスの再作成（'index'）の秒数を加算する。
+        countersに辞書を指定すると、バッチ数（'batches'）、コミットの回数（'commits'）、
+        コミットにかかった秒数の合計（'commit_seconds'）と最大（'commit_max_seconds'）を加算する。
+        
+        checkpointを指定した場合はバッチごとにコミットし、同じトランザクションで
+        import_checkpointsに再開位置を記録する。失敗時もコミット済みのバッチは残る。
+        checkpointは file_hash, csv_name と、バッチを受け取った時点で直前に読んだ
+        バッチの末尾を指す position（byte_offset, row_number）を持つ辞書。
+        全バッチの挿入が終わると再開位置は削除される。
         
-        # テーブル情報を保存
+        sourceに fingerprint, file_hash, csv_name を持つ辞書を指定すると、
+        最後のコミットでimport_fingerprintsに取り込み済みとして登録する。
+        """
+        insert_sql = None
+        row_count = 0
+        batch_start = 0  # コミット済みの行数
+        resuming = bool(checkpoint and checkpoint['position']['row_number'] > 0)
+        deferred_indexes = []
+        deferred_triggers = []
+        insert_time = 0.0
+        batch_count = 0
+        commit_times = []
+        
+        def commit(conn):
+            start = time.perf_counter()
+            conn.commit()
+            commit_times.append(time.perf_counter() - start)
+        
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            try:
+                with bulk_load_settings(conn, profile):
+                    try:
+                        # 挿入開始時点で書き込みロックを取得
+                        cursor.execute('BEGIN IMMEDIATE')
+                        
+                        for batch in batches:
+                            if not batch:
+                                continue
+                            
+                            # 挿入SQLを生成（最初のバッチで一度だけ）
+                            if insert_sql is None:
+                                insert_sql = self._build_insert_sql(cursor, table_name, len(batch[0]),
+                                                                    import_mode, key_columns)
+                                
+                                # インデックス・全文検索の索引は挿入後にまとめて作り直す
+                                # （入れ替え時の削除でも更新しないよう、削除より先に外す）
+                                if defer_indexes and not checkpoint:
+                                    deferred_indexes = self._drop_secondary_indexes(cursor, table_name)
+                                    deferred_triggers = self._drop_fulltext_triggers(cursor, table_name)
+                                
+                                # 入れ替えの場合は、挿入するデータがあるときだけ既存の行を削除
+                                if import_mode == 'replace' and not resuming:
+                                    cursor.execute(f'DELETE FROM {table_name}')
+                                    cursor.execute('UPDATE import_tables SET row_count = 0 WHERE table_name = ?',
+                                                   (table_name,))
+                            
+                            start = time.perf_counter()
+                            cursor.executemany(insert_sql, batch)
+                            insert_time += time.perf_counter() - start
+                            row_count += len(batch)
+                            batch_count += 1
+                            
+                            if checkpoint:
+                                # バッチとカタログ・再開位置を一緒にコミット
+                                # （数え直しはバッチごとに全件を数えることになるため、最後のコミットでだけ行う）
+                                self._update_import_catalog(cursor, table_name, row_count - batch_start)
+                                self._save_import_checkpoint(cursor, table_name, checkpoint)
+                                commit(conn)
+                                cursor.execute('BEGIN IMMEDIATE')
+                                batch_start = row_count
+                        
+                        start = time.perf_counter()
+                        for index_sql in deferred_indexes:
+                            cursor.execute(index_sql)
+                        for trigger_sql in deferred_triggers:
+                            cursor.execute(trigger_sql)
+                        if deferred_triggers:
+                            cursor.execute(f"INSERT INTO {table_name}_fts({table_name}_fts) VALUES ('rebuild')")
+                        index_time = time.perf_counter() - start
+                        
+                        # カタログのレコード数をデータと同じトランザクションで更新
+                        self._update_import_catalog(cursor, table_name, row_count - batch_start,
+                                                    recount=import_mode == 'upsert')
+                        if checkpoint:
+                            cursor.execute('DELETE FROM import_checkpoints WHERE file_hash = ?',
+                                           (checkpoint['file_hash'],))
+                        if source:
+                            total_rows = checkpoint['position']['row_number'] if checkpoint else row_count
+                            self._save_import_fingerprint(cursor, table_name, source, total_rows)
+                        
+                        commit(conn)
+                        if timings is not None:
+                            timings['insert'] = timings.get('insert', 0.0) + insert_time
+                            timings['index'] = timings.get('index', 0.0) + index_time
+                        if counters is not None:
+                            counters['batches'] = counters.get('batches', 0) + batch_count
+                            counters['commits'] = counters.get('commits', 0) + len(commit_times)
+                            counters['commit_seconds'] = counters.get('commit_seconds', 0.0) + sum(commit_times)
+                            counters['commit_max_seconds'] = max([counters.get('commit_max_seconds', 0.0)]
+                                                                 + commit_times)
+                        return row_count
+                    except Exception as e:
+                        print(f"データ挿入エラー: {e}", file=sys.stderr)
+                        conn.rollback()
+                        return None
+            except sqlite3.Error as e:
+                print(f"一括ロード設定エラー: {e}", file=sys.stderr)
+                return None
+    
+    def _drop_secondary_indexes(self, cursor, table_name):
+        """一意でないインデックスを削除し、作り直すためのCREATE INDEX文のリストを返す
+        
+        一意インデックスは制約・upsertの判定に必要なため残す。
+        """
         cursor.execute('''
-            INSERT OR REPLACE INTO import_tables (table_name, columns, created_at)
-            VALUES (?, ?, ?)
-        ''', (table_name, columns_json, datetime.now().isoformat()))
-        
-        conn.commit()
-        return True
-    except Exception as e:
-        print(f"テーブル作成エラー: {e}", file=sys.stderr)
-        conn.rollback()
-        return False
-    finally:
-        conn.close()
-
-def insert_csv_data(table_name, data):
-    """CSVデータをテーブルに挿入"""
-    if not data:
-        return False
+            SELECT name, sql FROM sqlite_master
+            WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL
+        ''', (table_name,))
+        index_sqls = []
+        for name, sql in cursor.fetchall():
+            if sql.lstrip().upper().startswith('CREATE UNIQUE'):
+                continue
+            cursor.execute(f'DROP INDEX {name}')
+            index_sqls.append(sql)
+        return index_sqls
     
-    conn = get_connection()
-    cursor = conn.cursor()
+    def analyze_import_table(self, table_name):
+        """インポート後のテーブルの統計情報を更新（クエリプランナー用）
+        
+        大きなテーブルでも時間がかからないよう、PRAGMA analysis_limitで調べる行数を抑える。
+        """
+        try:
+            with self.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(f'PRAGMA analysis_limit = {ANALYSIS_LIMIT}')
+                cursor.execute(f'ANALYZE {table_name}')
+                conn.commit()
+            return True
+        except Exception as e:
+            print(f"統計情報更新エラー: {e}", file=sys.stderr)
+            return False
     
-    # プレースホルダーを生成
-    placeholders = ', '.join(['?' for _ in data[0]])
+    def optimize_database(self):
+        """PRAGMA optimizeで必要な統計情報の更新などを行う"""
+        try:
+            with self.connection() as conn:
+                conn.execute('PRAGMA optimize')
+                conn.commit()
+            return True
+        except Exception as e:
+            print(f"最適化エラー: {e}", file=sys.stderr)
+            return False
     
-    try:
-        cursor.executemany(f'INSERT INTO {table_name} VALUES ({placeholders})', data)
-        conn.commit()
-        return True
-    except Exception as e:
-        print(f"データ挿入エラー: {e}", file=sys.stderr)
-        conn.rollback()
-        return False
-    finally:
-        conn.close()
-
-def get_import_tables():
-    """インポートされたテーブルの一覧を取得"""
-    try:
-        conn = get_connection()
-        cursor = conn.cursor()
+    def _build_insert_sql(self, cursor, table_name, value_count, import_mode, key_columns):
+        """インポートモードに応じた挿入SQLを生成"""
+        placeholders = ', '.join(['?' for _ in range(value_count)])
+        if import_mode != 'upsert':
+            return f'INSERT INTO {table_name} VALUES ({placeholders})'
         
-        # import_tablesテーブルからテーブル情報を取得
-        cursor.execute("""
-            SELECT table_name, created_at 
-            FROM import_tables 
-            ORDER BY created_at DESC
-        """)
-        
-        tables = cursor.fetchall()
-        
-        # テーブルごとの詳細情報を取得
-        result = []
-        for table_name, created_at in tables:
-            # テーブルが存在するか確認
-            cursor.execute("""
-                SELECT name FROM sqlite_master 
-                WHERE type='table' AND name=?
-            """, (table_name,))
-            
-            if cursor.fetchone():
-                # カラム情報を取得
-                cursor.execute(f"PRAGMA table_info({table_name})")
-                columns = cursor.fetchall()
+        # キー以外のカラムを新しい値で更新（すべてキーの場合は何もしない）
+        cursor.execute(f'PRAGMA table_info({table_name})')
+        column_names = [row[1] for row in cursor.fetchall()]
+        updates = [f'{name} = excluded.{name}' for name in column_names if name not in key_columns]
+        action = f"DO UPDATE SET {', '.join(updates)}" if updates else 'DO NOTHING'
+        return (f"INSERT INTO {table_name} ({', '.join(column_names)}) VALUES ({placeholders}) "
+                f"ON CONFLICT ({', '.join(key_columns)}) {action}")
+    
+    def _update_import_catalog(self, cursor, table_name, row_count, recount=False):
+        """カタログのレコード数と最終インポート日時を更新
+        
+        recountを指定した場合は、挿入した行数を足す代わりに実テーブルから数え直す。
+        """
+        if recount:
+            cursor.execute(f'SELECT COUNT(*) FROM {table_name}')
+            cursor.execute('''
+                UPDATE import_tables SET row_count = ?, last_import_at = ?
+                WHERE table_name = ?
+            ''', (cursor.fetchone()[0], datetime.now().isoformat(), table_name))
+            return
+        
+        cursor.execute('''
+            UPDATE import_tables
+            SET row_count = row_count + ?, last_import_at = ?
+            WHERE table_name = ?
+        ''', (row_count, datetime.now().isoformat(), table_name))
+    
+    def _save_import_checkpoint(self, cursor, table_name, checkpoint):
+        """インポートの再開位置を記録"""
+        position = checkpoint['position']
+        cursor.execute('''
+            INSERT INTO import_checkpoints
+                (file_hash, table_name, csv_name, byte_offset, row_number, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT(file_hash) DO UPDATE SET
+                table_name = excluded.table_name, csv_name = excluded.csv_name,
+                byte_offset = excluded.byte_offset, row_number = excluded.row_number,
+                updated_at = excluded.updated_at
+        ''', (checkpoint['file_hash'], table_name, checkpoint.get('csv_name'),
+              position['byte_offset'], position['row_number'], datetime.now().isoformat()))
+    
+    def _save_import_fingerprint(self, cursor, table_name, source, row_count):
+        """取り込み済みのCSVと設定の組を登録"""
+        cursor.execute('''
+            INSERT OR REPLACE INTO import_fingerprints
+                (fingerprint, file_hash, table_name, csv_name, row_count, imported_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', (source['fingerprint'], source['file_hash'], table_name, source.get('csv_name'),
+              row_count, datetime.now().isoformat()))
+    
+    def get_import_fingerprint(self, fingerprint):
+        """取り込み済みのCSVと設定の組を取得（未登録の場合はNone）"""
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = sqlite3.Row
+            cursor.execute('SELECT * FROM import_fingerprints WHERE fingerprint = ?', (fingerprint,))
+            row = cursor.fetchone()
+            return dict(row) if row else None
+    
+    def get_import_checkpoint(self, file_hash):
+        """CSVの内容のハッシュに対応する再開位置を取得（ない場合はNone）"""
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = sqlite3.Row
+            cursor.execute('SELECT * FROM import_checkpoints WHERE file_hash = ?', (file_hash,))
+            row = cursor.fetchone()
+            return dict(row) if row else None
+    
+    def get_import_tables(self):
+        """インポートされたテーブルの一覧をカタログから取得"""
+        try:
+            with self.connection() as conn:
+                cursor = conn.cursor()
                 
-                # レコード数を取得
-                cursor.execute(f"SELECT COUNT(*) FROM {table_name}")
-                record_count = cursor.fetchone()[0]
+                # 実在するテーブルのカタログ情報を1回のクエリで取得
+                cursor.execute("""
+                    SELECT t.table_name, t.created_at, t.row_count, t.last_import_at, t.columns,
+                           t.snapshot_path, t.snapshot_at
+                    FROM import_tables t
+                    JOIN sqlite_master m ON m.type = 'table' AND m.name = t.table_name
+                    ORDER BY COALESCE(t.last_import_at, t.created_at) DESC
+                """)
                 
-                result.append({
+                return [{
                     'table_name': table_name,
                     'created_at': created_at,
-                    'record_count': record_count,
-                    'columns': [{'name': col[1], 'type': col[2]} for col in columns]
-                })
+                    'record_count': row_count,
+                    'last_import_at': last_import_at,
+                    'columns': json.loads(columns),
+                    'snapshot_path': snapshot_path,
+                    'snapshot_at': snapshot_at
+                } for table_name, created_at, row_count, last_import_at, columns, snapshot_path, snapshot_at
+                  in cursor.fetchall()]
+            
+        except Exception as e:
+            print(f"テーブル一覧取得エラー: {e}", file=sys.stderr)
+            return []
+    
+    def update_import_snapshot(self, table_name, snapshot_path, snapshot_at):
+        """カタログにテーブルの列指向スナップショットの場所と書き出し日時を記録"""
+        try:
+            with self.transaction() as conn:
+                conn.execute('''
+                    UPDATE import_tables SET snapshot_path = ?, snapshot_at = ?
+                    WHERE table_name = ?
+                ''', (snapshot_path, snapshot_at, table_name))
+            return True
+        except Exception as e:
+            print(f"スナップショット情報更新エラー: {e}", file=sys.stderr)
+            return False
+    
+    def recount_import_tables(self, table_name=None):
+        """カタログのレコード数・カラム情報を実テーブルから再集計（ずれの補正）
         
-        conn.close()
-        return result
+        table_nameを省略した場合は全テーブルが対象。
+        補正したテーブルの一覧 [{'table_name', 'old_count', 'new_count', 'columns_changed'}] を返す。
+        """
+        corrected = []
         
-    except Exception as e:
-        print(f"テーブル一覧取得エラー: {e}", file=sys.stderr)
-        return []
-
-def get_table_data(table_name, limit=100, offset=0):
-    """指定されたテーブルのデータを取得"""
-    try:
-        conn = get_connection()
-        cursor = conn.cursor()
+        with self.transaction() as conn:
+            cursor = conn.cursor()
+            
+            if table_name is None:
+                cursor.execute('SELECT table_name, row_count, columns FROM import_tables')
+            else:
+                cursor.execute('SELECT table_name, row_count, columns FROM import_tables WHERE table_name = ?',
+                               (table_name,))
+            
+            for name, old_count, columns_json in cursor.fetchall():
+                cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name=?", (name,))
+                if not cursor.fetchone():
+                    continue
+                
+                cursor.execute(f"SELECT COUNT(*) FROM {name}")
+                new_count = cursor.fetchone()[0]
+                
+                # カタログには設定ファイルのデータ型（DATE・DECIMAL(10,2)など）を記録しているため、
+                # 実テーブルで宣言した型（get_storage_type）と一致するカラムはカタログの型のままにする
+                catalog_columns = json.loads(columns_json)
+                cursor.execute(f"PRAGMA table_info({name})")
+                columns = []
+                for position, col in enumerate(cursor.fetchall()):
+                    column = {'name': col[1], 'type': col[2]}
+                    if position < len(catalog_columns):
+                        catalog_column = catalog_columns[position]
+                        catalog_type = catalog_column.get('type') or ''
+                        if (catalog_column['name'] == column['name']
+                                and get_storage_type(catalog_type).upper() == (column['type'] or '').upper()):
+                            column['type'] = catalog_type
+                    columns.append(column)
+                columns_changed = [(c['name'], c['type']) for c in columns] != \
+                    [(c['name'], c['type']) for c in catalog_columns]
+                
+                if new_count != old_count or columns_changed:
+                    cursor.execute('''
+                        UPDATE import_tables SET row_count = ?, columns = ?
+                        WHERE table_name = ?
+                    ''', (new_count, json.dumps(columns, ensure_ascii=False), name))
+                    corrected.append({
+                        'table_name': name,
+                        'old_count': old_count,
+                        'new_count': new_count,
+                        'columns_changed': columns_changed
+                    })
+        
+        return corrected
+    
+    def _build_table_query(self, cursor, table_name, filters=None, sort=None):
+        """絞り込み条件と並び替えのカラムをカタログのカラム一覧で検証し、WHERE句の条件とパラメータを返す
         
-        # テーブル名を検証（import_tablesに存在するか）
+        filtersは (カラム名, 演算子名, 値) のリスト（演算子名はFILTER_OPERATORSのキー）。
+        値はすべてパラメータとして渡し、カラム名は検証済みのものだけをSQLに埋め込む。
+        戻り値は (カタログの行数, 条件のリスト, パラメータのリスト)。テーブルがない場合はNone。
+        不正な条件はValueError。
+        """
         cursor.execute("""
-            SELECT table_name FROM import_tables 
+            SELECT row_count, columns FROM import_tables 
             WHERE table_name=?
         """, (table_name,))
         
-        if not cursor.fetchone():
-            conn.close()
-            return None, None, 0
+        catalog = cursor.fetchone()
+        if not catalog:
+            return None
+        column_types = {col['name']: (col.get('type') or '').upper() for col in json.loads(catalog[1])}
         
-        # カラム情報を取得
+        if sort is not None and sort not in column_types:
+            raise ValueError(f"並び替えのカラム '{sort}' はテーブル '{table_name}' にありません")
+        
+        conditions = []
+        params = []
+        for column, operator, value in filters or []:
+            if column not in column_types:
+                raise ValueError(f"絞り込みのカラム '{column}' はテーブル '{table_name}' にありません")
+            if operator not in FILTER_OPERATORS:
+                raise ValueError(f"絞り込みの演算子 '{operator}' は使用できません（{', '.join(FILTER_OPERATORS)}）")
+            
+            if operator != 'prefix':
+                conditions.append(f"{column} {FILTER_OPERATORS[operator]} ?")
+                params.append(value)
+                continue
+            
+            if not any(name in column_types[column] for name in PREFIX_FILTER_TYPES):
+                raise ValueError(f"前方一致はTEXT・DATE・DATETIME型のカラムのみ使用できます（'{column}' は {column_types[column]}）")
+            if value == '':
+                continue
+            
+            # 前方一致は「value以上、valueの末尾の文字を1つ進めた文字列未満」の範囲検索にする
+            conditions.append(f"{column} >= ?")
+            params.append(value)
+            next_code = ord(value[-1]) + 1
+            if 0xD800 <= next_code <= 0xDFFF:
+                next_code = 0xE000  # サロゲートはUTF-8で表せないため飛ばす
+            if next_code <= 0x10FFFF:
+                conditions.append(f"{column} < ?")
+                params.append(value[:-1] + chr(next_code))
+        
+        return catalog[0], conditions, params
+    
+    def _record_filter_usage(self, table_name, columns):
+        """絞り込みに使われたカラムの回数を記録し、回数が閾値に達したカラムにインデックスを作成
+        
+        先頭のカラムとして含むインデックスが既にある場合は作成しない。
+        作成したインデックス名のリストを返す。
+        """
+        created = []
+        try:
+            with self.transaction() as conn:
+                cursor = conn.cursor()
+                now = datetime.now().isoformat()
+                
+                for column in columns:
+                    cursor.execute('''
+                        INSERT INTO import_filter_stats (table_name, column_name, use_count, last_used_at)
+                        VALUES (?, ?, 1, ?)
+                        ON CONFLICT (table_name, column_name)
+                        DO UPDATE SET use_count = use_count + 1, last_used_at = excluded.last_used_at
+                    ''', (table_name, column, now))
+                    cursor.execute('''
+                        SELECT use_count FROM import_filter_stats
+                        WHERE table_name = ? AND column_name = ?
+                    ''', (table_name, column))
+                    if cursor.fetchone()[0] < FILTER_INDEX_THRESHOLD:
+                        continue
+                    if self._has_leading_index(cursor, table_name, column):
+                        continue
+                
+                    index_name = f"idx_{table_name}_{column}"
+                    cursor.execute(f"CREATE INDEX IF NOT EXISTS {index_name} ON {table_name} ({column})")
+                    created.append(index_name)
+                
+            for index_name in created:
+                print(f"よく使われる絞り込み条件のインデックスを作成しました: {index_name}", file=sys.stderr)
+            return created
+        except Exception as e:
+            # インポート中（排他ロック）などで書き込めない場合は、記録せずに検索だけ行う
+            print(f"絞り込み回数の記録エラー: {e}", file=sys.stderr)
+            return []
+                
+    def _has_leading_index(self, cursor, table_name, column):
+        """カラムを先頭に含むインデックス（またはrowidの別名の主キー）があるか"""
         cursor.execute(f"PRAGMA table_info({table_name})")
-        columns = cursor.fetchall()
-        column_names = [col[1] for col in columns]
+        pk_columns = [(col[1], col[2].upper()) for col in cursor.fetchall() if col[5]]
+        if pk_columns == [(column, 'INTEGER')]:
+            return True
+                
+        cursor.execute(f"PRAGMA index_list({table_name})")
+        for index in cursor.fetchall():
+            cursor.execute(f"PRAGMA index_info({index[1]})")
+            index_columns = cursor.fetchall()
+            if index_columns and index_columns[0][2] == column:
+                return True
+        return False
+                
+    def get_table_data(self, table_name, limit=100, offset=0, filters=None, sort=None, descending=False):
+        """指定されたテーブルのデータを取得
+            
+        filters: (カラム名, 演算子名, 値) のリストで絞り込み（条件はすべてAND）
+        sort: 並び替えのカラム（descendingがTrueなら降順。同じ値の行はrowid順）
+        総件数は、絞り込みなしの場合はカタログの値、絞り込みありの場合は該当件数。
+        不正な絞り込み条件・並び替えのカラムはValueError。
+        """
+        try:
+            with self.connection() as conn:
+                cursor = conn.cursor()
+                
+                # テーブル名・カラム名を検証（import_tablesに存在するか）
+                query = self._build_table_query(cursor, table_name, filters, sort)
+                if query is None:
+                    return None, None, 0
+                total_count, conditions, params = query
+                where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+                
+                if conditions:
+                    cursor.execute(f"SELECT COUNT(*) FROM {table_name} {where}", params)
+                    total_count = cursor.fetchone()[0]
+                
+                # データを取得
+                direction = 'DESC' if descending else 'ASC'
+                order = f"{sort} {direction}, rowid {direction}" if sort else f"rowid {direction}"
+                cursor.execute(f"""
+                    SELECT * FROM {table_name} 
+                    {where}
+                    ORDER BY {order} 
+                    LIMIT ? OFFSET ?
+                """, params + [limit, offset])
+                
+                column_names = [desc[0] for desc in cursor.description]
+                data = cursor.fetchall()
+            
+            # 検証済みの絞り込みカラムの回数を記録（次回以降の検索のためにインデックスを作成）
+            if filters:
+                self._record_filter_usage(table_name, sorted({f[0] for f in filters}))
+            
+            return column_names, data, total_count
+            
+        except ValueError:
+            raise
+        except Exception as e:
+            print(f"テーブルデータ取得エラー: {e}", file=sys.stderr)
+            return None, None, 0
+    
+    def get_table_page(self, table_name, limit=100, after=None, before=None, last=False, filters=None):
+        """rowidをキーにしたシーク方式でテーブルの1ページ分を取得
+        
+        after: このrowidより後のページ、before: このrowidより前のページ、
+        last: 最終ページ、いずれも指定しない場合は先頭ページ。
+        filters: (カラム名, 演算子名, 値) のリストで絞り込み（get_table_dataと同じ）。
+        OFFSETを使わないため、どのページでも取得コストは変わらない。
+        戻り値は辞書（columns, rows, total_count, first_rowid, last_rowid, has_prev, has_next）。
+        総件数は、絞り込みありの場合は該当件数。テーブルが存在しない場合はNone。
+        不正な絞り込み条件はValueError。
+        """
+        try:
+            with self.connection() as conn:
+                cursor = conn.cursor()
+                
+                # テーブル名・カラム名を検証（import_tablesに存在するか）
+                query = self._build_table_query(cursor, table_name, filters)
+                if query is None:
+                    return None
+                total_count, conditions, params = query
+                
+                if conditions:
+                    cursor.execute(f"SELECT COUNT(*) FROM {table_name} WHERE {' AND '.join(conditions)}", params)
+                    total_count = cursor.fetchone()[0]
+                
+                def select_rows(cursor_condition, cursor_params, order, row_limit):
+                    where = ' AND '.join(conditions + ([cursor_condition] if cursor_condition else []))
+                    cursor.execute(f"""
+                        SELECT rowid, * FROM {table_name}
+                        {'WHERE ' + where if where else ''}
+                        ORDER BY rowid {order} LIMIT ?
+                    """, params + cursor_params + [row_limit])
+                    return cursor.fetchall()
+                
+                # ページの行を取得（前方向・最終ページは逆順に取得して並べ直す）
+                if after is not None:
+                    rows = select_rows("rowid > ?", [after], 'ASC', limit)
+                elif before is not None:
+                    rows = select_rows("rowid < ?", [before], 'DESC', limit)[::-1]
+                elif last:
+                    rows = select_rows(None, [], 'DESC', limit)[::-1]
+                else:
+                    rows = select_rows(None, [], 'ASC', limit)
+                
+                column_names = [desc[0] for desc in cursor.description[1:]]
+                
+                # 前後のページがあるか（rowidの検索のみで判定）
+                first_rowid = rows[0][0] if rows else None
+                last_rowid = rows[-1][0] if rows else None
+                has_prev = has_next = False
+                if rows:
+                    has_prev = bool(select_rows("rowid < ?", [first_rowid], 'DESC', 1))
+                    has_next = bool(select_rows("rowid > ?", [last_rowid], 'ASC', 1))
+                
+            # 検証済みの絞り込みカラムの回数を記録（次回以降の検索のためにインデックスを作成）
+            if filters:
+                self._record_filter_usage(table_name, sorted({f[0] for f in filters}))
+            
+            return {
+                'columns': column_names,
+                'rows': [row[1:] for row in rows],
+                'total_count': total_count,
+                'first_rowid': first_rowid,
+                'last_rowid': last_rowid,
+                'has_prev': has_prev,
+                'has_next': has_next
+            }
+            
+        except ValueError:
+            raise
+        except Exception as e:
+            print(f"テーブルデータ取得エラー: {e}", file=sys.stderr)
+            return None
+
+    def export_table(self, table_name, filters=None, sort=None, descending=False, batch_size=EXPORT_BATCH_SIZE):
+        """テーブル全体（または絞り込んだ行）を一定の行数ずつ取り出す（エクスポート用）
+        
+        filters・sort・descendingはget_table_dataと同じ。件数は数えず、行はfetchmanyで
+        batch_size行ずつ読むため、テーブルの大きさに関係なくメモリ使用量は一定。
+        戻り値は (カラム名のリスト, 行のリストを順に返すジェネレータ)。
+        テーブルが存在しない場合は (None, None)。不正な絞り込み条件・並び替えのカラムはValueError。
+        """
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            
+            # テーブル名・カラム名を検証（import_tablesに存在するか）
+            query = self._build_table_query(cursor, table_name, filters, sort)
+            if query is None:
+                return None, None
+            _, conditions, params = query
+            
+            direction = 'DESC' if descending else 'ASC'
+            order = f"{sort} {direction}, rowid {direction}" if sort else f"rowid {direction}"
+            where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+            select_sql = f"SELECT * FROM {table_name} {where} ORDER BY {order}"
+            
+            cursor.execute(f"SELECT * FROM {table_name} LIMIT 0")
+            column_names = [desc[0] for desc in cursor.description]
+        
+        return column_names, self._fetch_batches(select_sql, params, batch_size)
+    
+    def _fetch_batches(self, sql, params, batch_size):
+        """クエリの結果をbatch_size行ずつ返すジェネレータ（読み終えるまで接続を使い続ける）"""
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(sql, params)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield rows
+    
+    def get_fulltext_columns(self, table_name):
+        """テーブルの全文検索の対象カラム名のリストを取得（全文検索が有効でない場合はNone）"""
+        try:
+            with self.connection() as conn:
+                info = self._get_fulltext_info(conn.cursor(), table_name)
+                return info[0] if info else None
+        except Exception as e:
+            print(f"全文検索情報取得エラー: {e}", file=sys.stderr)
+            return None
+    
+    def search_table(self, table_name, query, limit=100):
+        """全文検索（FTS5）で検索語を含む行を関連度の高い順に取得
+        
+        queryは空白区切りの検索語で、すべての語を含む行が対象。各語はフレーズとして扱う
+        （FTS5の演算子は解釈しない）。trigramの場合、FULLTEXT_MIN_TERM_LENGTH未満の語は
+        索引を使えないため、対象カラムのLIKEで絞り込む（短い語だけの検索は全件走査になる）。
+        戻り値は (カラム名のリスト, 行のリスト)。全文検索が有効でないテーブル・失敗時は (None, None)。
+        """
+        terms = query.split()
+        
+        try:
+            with self.connection() as conn:
+                cursor = conn.cursor()
+                
+                # テーブル名を検証（import_tablesに存在するか）
+                cursor.execute("SELECT 1 FROM import_tables WHERE table_name=?", (table_name,))
+                if not cursor.fetchone():
+                    return None, None
+                info = self._get_fulltext_info(cursor, table_name)
+                if not info:
+                    return None, None
+                fulltext_columns, trigram = info
+                fulltext_table = f"{table_name}_fts"
+                
+                if trigram:
+                    match_terms = [term for term in terms if len(term) >= FULLTEXT_MIN_TERM_LENGTH]
+                    like_terms = [term for term in terms if len(term) < FULLTEXT_MIN_TERM_LENGTH]
+                else:
+                    match_terms, like_terms = terms, []
+                
+                conditions = []
+                params = []
+                if match_terms:
+                    conditions.append(f"{fulltext_table} MATCH ?")
+                    params.append(' '.join('"' + term.replace('"', '""') + '"' for term in match_terms))
+                for term in like_terms:
+                    pattern = '%' + term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+                    conditions.append('(' + ' OR '.join(f"t.{name} LIKE ? ESCAPE '\\'"
+                                                        for name in fulltext_columns) + ')')
+                    params += [pattern] * len(fulltext_columns)
+                where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+                
+                if match_terms:
+                    # rankはbm25による関連度（小さいほど関連度が高い）
+                    cursor.execute(f"""
+                        SELECT t.* FROM {fulltext_table}
+                        JOIN {table_name} t ON t.rowid = {fulltext_table}.rowid
+                        {where}
+                        ORDER BY {fulltext_table}.rank
+                        LIMIT ?
+                    """, params + [limit])
+                else:
+                    cursor.execute(f"SELECT t.* FROM {table_name} t {where} ORDER BY t.rowid LIMIT ?",
+                                   params + [limit])
+                
+                column_names = [desc[0] for desc in cursor.description]
+                return column_names, cursor.fetchall()
         
-        # データを取得
-        cursor.execute(f"""
-            SELECT * FROM {table_name} 
-            ORDER BY rowid 
-            LIMIT ? OFFSET ?
-        """, (limit, offset))
+        except Exception as e:
+            print(f"全文検索エラー: {e}", file=sys.stderr)
+            return None, None
+    
+    def enqueue_import_job(self, workers=1, chunk_workers=1, csv_files=None):
+        """インポートジョブをキューに追加し、ジョブIDを返す（失敗時はNone）
         
-        data = cursor.fetchall()
+        csv_filesに (CSVのパス, 設定ファイルのパス, ベース名) のリストを指定すると、
+        どのワーカーが実行してもそのファイルだけをインポートする（省略時はimportフォルダ全体）。
+        """
+        files_json = json.dumps([list(csv_info) for csv_info in csv_files], ensure_ascii=False) \
+            if csv_files is not None else None
+        try:
+            with self.transaction() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    INSERT INTO import_jobs (workers, chunk_workers, created_at, csv_files)
+                    VALUES (?, ?, ?, ?)
+                ''', (workers, chunk_workers, datetime.now().isoformat(), files_json))
+                return cursor.lastrowid
+        except Exception as e:
+            print(f"ジョブ登録エラー: {e}", file=sys.stderr)
+            return None
+    
+    def claim_import_job(self):
+        """最も古い待機中のジョブを実行中にして返す
         
-        # 総件数を取得
-        cursor.execute(f"SELECT COUNT(*) FROM {table_name}")
-        total_count = cursor.fetchone()[0]
+        実行中のジョブがある場合や待機中のジョブがない場合はNone。
+        インポートが同時に1つだけ実行されるよう、確認と更新を1つの書き込みトランザクションで行う。
+        """
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute('BEGIN IMMEDIATE')
+                cursor.execute("SELECT 1 FROM import_jobs WHERE status = 'running' LIMIT 1")
+                if cursor.fetchone():
+                    conn.rollback()
+                    return None
+                
+                cursor.execute('''
+                    SELECT id FROM import_jobs WHERE status = 'queued'
+                    ORDER BY id LIMIT 1
+                ''')
+                row = cursor.fetchone()
+                if not row:
+                    conn.rollback()
+                    return None
+                
+                cursor.execute('''
+                    UPDATE import_jobs SET status = 'running', started_at = ?
+                    WHERE id = ?
+                ''', (datetime.now().isoformat(), row[0]))
+                conn.commit()
+            except Exception as e:
+                print(f"ジョブ取得エラー: {e}", file=sys.stderr)
+                conn.rollback()
+                return None
         
-        conn.close()
-        return column_names, data, total_count
+        return self.get_import_job(row[0])
+    
+    def finish_import_job(self, job_id, status, rows_done=0, rows_total=None,
+                          success_count=None, file_count=None, log=None):
+        """ジョブの終了状態と結果を記録"""
+        try:
+            with self.transaction() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    UPDATE import_jobs
+                    SET status = ?, finished_at = ?, rows_done = ?, rows_total = ?,
+                        success_count = ?, file_count = ?, log = ?
+                    WHERE id = ?
+                ''', (status, datetime.now().isoformat(), rows_done, rows_total,
+                      success_count, file_count, log, job_id))
+                return cursor.rowcount > 0
+        except Exception as e:
+            print(f"ジョブ更新エラー: {e}", file=sys.stderr)
+            return False
+    
+    def get_import_job(self, job_id):
+        """ジョブを1件取得（存在しない場合はNone）"""
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = sqlite3.Row
+            cursor.execute('SELECT * FROM import_jobs WHERE id = ?', (job_id,))
+            row = cursor.fetchone()
+            return dict(row) if row else None
+    
+    def get_import_jobs(self, limit=20, status=None):
+        """ジョブを新しい順に取得（statusを指定するとその状態のものだけ）"""
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = sqlite3.Row
+            if status:
+                cursor.execute('''
+                    SELECT * FROM import_jobs WHERE status = ?
+                    ORDER BY id DESC LIMIT ?
+                ''', (status, limit))
+            else:
+                cursor.execute('SELECT * FROM import_jobs ORDER BY id DESC LIMIT ?', (limit,))
+            return [dict(row) for row in cursor.fetchall()]
+
+    def record_import_metrics(self, table_name, csv_name, success, timings, counters):
+        """ファイルごとのインポートの計測値を記録（記録したIDを返す。失敗時はNone）
         
-    except Exception as e:
-        print(f"テーブルデータ取得エラー: {e}", file=sys.stderr)
-        return None, None, 0
+        timingsは処理段階 → 秒数、countersはカウンタ名 → 値の辞書。
+        行数（counters['rows']）とバイト数（counters['bytes']）は集計しやすいようカラムにも保存する。
+        """
+        try:
+            with self.transaction() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    INSERT INTO import_metrics
+                    (table_name, csv_name, success, row_count, byte_count, seconds, timings, counters, recorded_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', (table_name, csv_name, int(bool(success)), counters.get('rows'), counters.get('bytes'),
+                      sum(timings.values()), json.dumps(timings), json.dumps(counters, ensure_ascii=False),
+                      datetime.now().isoformat()))
+                return cursor.lastrowid
+        except Exception as e:
+            print(f"計測値記録エラー: {e}", file=sys.stderr)
+            return None
+    
+    def get_import_metrics(self, limit=20, table_name=None):
+        """インポートの計測値を新しい順に取得（timings・countersは辞書に変換）"""
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = sqlite3.Row
+            if table_name:
+                cursor.execute('''
+                    SELECT * FROM import_metrics WHERE table_name = ?
+                    ORDER BY id DESC LIMIT ?
+                ''', (table_name, limit))
+            else:
+                cursor.execute('SELECT * FROM import_metrics ORDER BY id DESC LIMIT ?', (limit,))
+            metrics = []
+            for row in cursor.fetchall():
+                entry = dict(row)
+                entry['timings'] = json.loads(entry['timings'] or '{}')
+                entry['counters'] = json.loads(entry['counters'] or '{}')
+                metrics.append(entry)
+            return metrics
+
+# モジュール共通のセッション（DB_PATHが変更された場合は作り直す）
+_database = None
+_database_lock = threading.Lock()
+
+def get_database():
+    """DB_PATHに対応する共有セッションを取得"""
+    global _database
+    with _database_lock:
+        if _database is None or _database.path != DB_PATH:
+            if _database is not None:
+                _database.close()
+            _database = Database(DB_PATH)
+        return _database
+
+def init_database():
+    """データベースを初期化し、必要なテーブルを作成"""
+    get_database().init_database()
+
+def get_connection():
+    """データベース接続を取得（プールを使わない単独の接続）"""
+    return sqlite3.connect(DB_PATH)
+
+def fetch_one(task_id):
+    """タスクを1件取得"""
+    return get_database().fetch_one(task_id)
+
+def fetch_all():
+    """全タスクを取得"""
+    return get_database().fetch_all()
+
+def insert(task_dict):
+    """タスクを挿入"""
+    get_database().insert(task_dict)
+
+def update(task_id, task_dict):
+    """タスクを更新"""
+    get_database().update(task_id, task_dict)
+
+def delete(task_id):
+    """タスクを削除"""
+    get_database().delete(task_id)
+
+# CSVインポート用の関数
+def create_import_table(table_name, columns, primary_key=None, unique=None, fulltext=None):
+    """CSVインポート用の動的テーブルを作成"""
+    return get_database().create_import_table(table_name, columns, primary_key, unique, fulltext)
+
+def create_import_indexes(table_name, indexes):
+    """テーブルに（一意でない）インデックスを作成"""
+    return get_database().create_import_indexes(table_name, indexes)
+
+def insert_csv_data(table_name, data):
+    """CSVデータをテーブルに挿入"""
+    if not data:
+        return False
+    
+    return bool(insert_csv_batches(table_name, [data]))
+
+def insert_csv_batches(table_name, batches, profile=DEFAULT_BULK_PROFILE, checkpoint=None, source=None,
+                       import_mode=DEFAULT_IMPORT_MODE, key_columns=None, defer_indexes=False, timings=None,
+                       counters=None):
+    """バッチ単位でCSVデータをテーブルに挿入（挿入した行数を返す。失敗時はNone）"""
+    return get_database().insert_csv_batches(table_name, batches, profile, checkpoint, source,
+                                             import_mode, key_columns, defer_indexes, timings, counters)
+
+def analyze_import_table(table_name):
+    """インポート後のテーブルの統計情報を更新"""
+    return get_database().analyze_import_table(table_name)
+
+def optimize_database():
+    """PRAGMA optimizeで必要な統計情報の更新などを行う"""
+    return get_database().optimize_database()
+
+def get_import_fingerprint(fingerprint):
+    """取り込み済みのCSVと設定の組を取得"""
+    return get_database().get_import_fingerprint(fingerprint)
+
+def get_import_checkpoint(file_hash):
+    """CSVの内容のハッシュに対応する再開位置を取得"""
+    return get_database().get_import_checkpoint(file_hash)
+
+def get_import_tables():
+    """インポートされたテーブルの一覧を取得"""
+    return get_database().get_import_tables()
+
+def update_import_snapshot(table_name, snapshot_path, snapshot_at):
+    """カタログにテーブルの列指向スナップショットの場所と書き出し日時を記録"""
+    return get_database().update_import_snapshot(table_name, snapshot_path, snapshot_at)
+
+def recount_import_tables(table_name=None):
+    """カタログのレコード数・カラム情報を実テーブルから再集計"""
+    return get_database().recount_import_tables(table_name)
+
+def get_table_data(table_name, limit=100, offset=0, filters=None, sort=None, descending=False):
+    """指定されたテーブルのデータを取得（絞り込み・並び替えあり）"""
+    return get_database().get_table_data(table_name, limit, offset, filters, sort, descending)
+
+def get_table_page(table_name, limit=100, after=None, before=None, last=False, filters=None):
+    """rowidをキーにしたシーク方式でテーブルの1ページ分を取得"""
+    return get_database().get_table_page(table_name, limit, after, before, last, filters)
+
+def export_table(table_name, filters=None, sort=None, descending=False, batch_size=EXPORT_BATCH_SIZE):
+    """テーブル全体（または絞り込んだ行）を一定の行数ずつ取り出す（エクスポート用）"""
+    return get_database().export_table(table_name, filters, sort, descending, batch_size)
+
+def get_fulltext_columns(table_name):
+    """テーブルの全文検索の対象カラム名のリストを取得"""
+    return get_database().get_fulltext_columns(table_name)
+
+def search_table(table_name, query, limit=100):
+    """全文検索で検索語を含む行を関連度の高い順に取得"""
+    return get_database().search_table(table_name, query, limit)
+
+# インポートジョブ用の関数
+def enqueue_import_job(workers=1, chunk_workers=1, csv_files=None):
+    """インポートジョブをキューに追加し、ジョブIDを返す"""
+    return get_database().enqueue_import_job(workers, chunk_workers, csv_files)
+
+def claim_import_job():
+    """最も古い待機中のジョブを実行中にして返す"""
+    return get_database().claim_import_job()
+
+def finish_import_job(job_id, status, rows_done=0, rows_total=None,
+                      success_count=None, file_count=None, log=None):
+    """ジョブの終了状態と結果を記録"""
+    return get_database().finish_import_job(job_id, status, rows_done, rows_total,
+                                            success_count, file_count, log)
+
+def get_import_job(job_id):
+    """ジョブを1件取得"""
+    return get_database().get_import_job(job_id)
+
+def get_import_jobs(limit=20, status=None):
+    """ジョブを新しい順に取得"""
+    return get_database().get_import_jobs(limit, status)
+
+def record_import_metrics(table_name, csv_name, success, timings, counters):
+    """ファイルごとのインポートの計測値を記録"""
+    return get_database().record_import_metrics(table_name, csv_name, success, timings, counters)
+
+def get_import_metrics(limit=20, table_name=None):
+    """インポートの計測値を新しい順に取得"""
+    return get_database().get_import_metrics(limit, table_name)
 
 # データベース初期化
 if __name__ == '__main__':
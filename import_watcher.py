@@ -0,0 +1,247 @@
+# -*- coding: utf-8 -*-
+"""
+importフォルダの監視（常駐してインポートを実行する）
+
+importフォルダを監視し、CSVファイルと設定ファイルの組が置かれたら、書き込みが終わったものから順にインポートする。
+インタープリタとデータベース接続を起動したまま保つため、ファイルを置いてから数秒で取り込まれる。
+
+書き込み中のファイルを取り込まないよう、サイズと更新日時が一定時間変わらなくなった組だけを対象にする。
+inotify_simpleがインストールされている場合（Linux）はinotifyでファイルの到着を待ち、
+ない場合は一定間隔でフォルダを確認する。
+
+インポートはWebインターフェースと同じインポートジョブとして実行するため、
+他のインポートと同時には実行されず、結果はジョブの履歴に記録される。
+"""
+
+import os
+import sys
+import time
+import signal
+import sqlite3
+import argparse
+from datetime import datetime
+import csv_import
+import import_worker
+import db
+
+try:
+    import inotify_simple
+except ImportError:
+    inotify_simple = None
+
+# フォルダを確認する間隔（秒、inotifyを使わない場合）
+WATCH_INTERVAL = 2
+
+# ファイルのサイズ・更新日時がこの秒数変わらなければ、書き込みが終わったとみなす
+WATCH_STABLE_SECONDS = 2
+
+# inotifyを使う場合に到着を待つ最大の秒数（イベントの取りこぼしに備えて定期的にフォルダを確認する）
+WATCH_IDLE_SECONDS = 60
+
+# 他のワーカーが実行中のジョブの終了を待つ間隔（秒）
+JOB_WAIT_INTERVAL = 1
+
+def log_message(message, file=None):
+    """時刻を付けてメッセージを出力"""
+    print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] {message}", file=file or sys.stdout, flush=True)
+
+class ImportFolderWatcher:
+    """importフォルダのCSVファイルと設定ファイルの組のうち、書き込みが終わったものを見つける"""
+    
+    def __init__(self, folder=csv_import.IMPORT_FOLDER, stable_seconds=WATCH_STABLE_SECONDS, use_inotify=True):
+        self.folder = folder
+        self.stable_seconds = stable_seconds
+        self.stats = {}       # ファイル名 → (サイズ, 更新日時) 前回の確認時の状態
+        self.processed = {}   # ベース名 → インポートを試みたときの (CSVの状態, 設定ファイルの状態)
+        self.pending = False  # 書き込み中とみなしたファイルがあるか
+        
+        self.inotify = None
+        if use_inotify and inotify_simple is not None:
+            try:
+                self.inotify = inotify_simple.INotify()
+                self.inotify.add_watch(folder, inotify_simple.flags.CREATE
+                                       | inotify_simple.flags.CLOSE_WRITE
+                                       | inotify_simple.flags.MOVED_TO)
+            except OSError as e:
+                log_message(f"inotifyを使用できないため、一定間隔で確認します: {e}", file=sys.stderr)
+                self.inotify = None
+    
+    def scan(self):
+        """書き込みが終わった未処理の組を、csv_import.get_csv_filesと同じ形式のリストで返す
+        
+        前回の確認時からサイズ・更新日時が変わっておらず、更新日時からstable_seconds秒以上
+        経過しているファイルを書き込み済みとみなす。CSVファイルと設定ファイルの両方がそろうまで待つ。
+        """
+        stats = {}
+        try:
+            with os.scandir(self.folder) as entries:
+                for entry in entries:
+                    if entry.name.lower().endswith(('.csv', '.json')) and entry.is_file():
+                        stat = entry.stat()
+                        stats[entry.name] = (stat.st_size, stat.st_mtime_ns)
+        except OSError as e:
+            log_message(f"フォルダ確認エラー: {e}", file=sys.stderr)
+            return []
+        
+        previous, self.stats = self.stats, stats
+        stable_before = time.time_ns() - int(self.stable_seconds * 1e9)
+        
+        def is_stable(name):
+            return previous.get(name) == stats[name] and stats[name][1] <= stable_before
+        
+        ready = []
+        present = set()
+        self.pending = False
+        for name in stats:
+            if not name.lower().endswith('.csv'):
+                continue
+            base_name = os.path.splitext(name)[0]
+            config_name = f"{base_name}.json"
+            present.add(base_name)
+            if config_name not in stats:
+                continue
+            
+            # インポートを試みた後もimportフォルダに残っている組は、内容が変わるまで対象にしない
+            if self.processed.get(base_name) == (stats[name], stats[config_name]):
+                continue
+            
+            if is_stable(name) and is_stable(config_name):
+                ready.append((os.path.join(self.folder, name), os.path.join(self.folder, config_name), base_name))
+            else:
+                self.pending = True
+        
+        # importフォルダからなくなった組の記録は削除（同じ名前のファイルが再び置かれた場合に取り込む）
+        self.processed = {base_name: signature for base_name, signature in self.processed.items()
+                          if base_name in present}
+        return ready
+    
+    def mark_processed(self, csv_files):
+        """インポートを試みた組の状態を記録"""
+        for csv_path, config_path, base_name in csv_files:
+            self.processed[base_name] = (self.stats.get(os.path.basename(csv_path)),
+                                         self.stats.get(os.path.basename(config_path)))
+    
+    def wait(self, interval=WATCH_INTERVAL):
+        """次にフォルダを確認するまで待つ
+        
+        inotifyを使う場合はファイルの到着まで（書き込み中のファイルがあれば書き込み済みか確認できるまで）待ち、
+        使わない場合はinterval秒待つ。
+        """
+        if self.inotify is None:
+            time.sleep(interval)
+            return
+        
+        timeout = self.stable_seconds if self.pending else WATCH_IDLE_SECONDS
+        self.inotify.read(timeout=int(timeout * 1000))
+
+def run_import_job(csv_files, workers=1, chunk_workers=1):
+    """ファイルの組をインポートジョブとして実行し、ジョブの状態（done・failed）を返す（登録できない場合はNone）
+    
+    ジョブはWebインターフェースから登録されるものと同じキューに登録し、順番が来てから実行する。
+    対象のファイルの組はジョブに記録するため、他のワーカーがこのジョブを実行した場合も、
+    書き込み中のファイルを含めずにその組だけをインポートする。
+    先に待機中のジョブがあれば、それも実行する。
+    他のワーカーが実行中の場合は終了を待ち、そのワーカーがこのジョブを実行した場合はその結果を返す。
+    """
+    job_id = db.enqueue_import_job(workers, chunk_workers, csv_files)
+    if job_id is None:
+        return None
+    
+    while True:
+        try:
+            import_worker.recover_stale_jobs()
+            job = db.claim_import_job()
+        except sqlite3.Error:
+            # 他のワーカーが排他ロックのプロファイルでロード中はDBを読み書きできないため、待って再試行する
+            time.sleep(JOB_WAIT_INTERVAL)
+            continue
+        
+        if job is None:
+            try:
+                current = db.get_import_job(job_id)
+            except sqlite3.Error:
+                # 排他ロックのプロファイルでロード中はDBを読めない
+                current = None
+            if current and current['status'] in ('done', 'failed'):
+                return current['status']
+            time.sleep(JOB_WAIT_INTERVAL)
+            continue
+        
+        if job['id'] == job_id:
+            return import_worker.run_job(job)
+        
+        log_message(f"待機中のジョブ {job['id']} を先に実行します")
+        status = import_worker.run_job(job)
+        log_message(f"ジョブ {job['id']} が終了しました（{status}）")
+
+def watch(interval=WATCH_INTERVAL, stable_seconds=WATCH_STABLE_SECONDS, workers=1, chunk_workers=1,
+          use_inotify=True):
+    """importフォルダを監視し、終了するまでインポートを繰り返す
+    
+    SIGTERM・Ctrl+Cで終了する。インポートの実行中にSIGTERMを受けた場合は、そのインポートが終わってから終了する。
+    """
+    csv_import.ensure_folders()
+    db.init_database()
+    
+    watcher = ImportFolderWatcher(csv_import.IMPORT_FOLDER, stable_seconds, use_inotify)
+    method = 'inotify' if watcher.inotify else f"{interval}秒ごとに確認"
+    log_message(f"importフォルダの監視を開始します: {csv_import.IMPORT_FOLDER}（{method}）")
+    
+    importing = False
+    stop_requested = False
+    
+    def handle_stop(signum, frame):
+        nonlocal stop_requested
+        if importing:
+            stop_requested = True
+        else:
+            raise KeyboardInterrupt
+    
+    signal.signal(signal.SIGTERM, handle_stop)
+    
+    try:
+        while not stop_requested:
+            csv_files = watcher.scan()
+            if not csv_files:
+                watcher.wait(interval)
+                continue
+            
+            names = ', '.join(os.path.basename(csv_info[0]) for csv_info in csv_files)
+            log_message(f"{len(csv_files)} 組のファイルをインポートします: {names}")
+            start = time.perf_counter()
+            importing = True
+            try:
+                status = run_import_job(csv_files, workers, chunk_workers)
+            finally:
+                importing = False
+            if status is None:
+                # 処理済みにせず、次の確認で登録し直す
+                log_message("ジョブを登録できませんでした。次の確認で再試行します", file=sys.stderr)
+                watcher.wait(interval)
+                continue
+            watcher.mark_processed(csv_files)
+            log_message(f"インポートが終了しました（{status}、{time.perf_counter() - start:.2f}秒）")
+    except KeyboardInterrupt:
+        pass
+    
+    log_message("importフォルダの監視を終了します")
+
+def main():
+    """メイン処理"""
+    parser = argparse.ArgumentParser(description='importフォルダを監視し、置かれたCSVファイルをインポートする')
+    parser.add_argument('--interval', type=float, default=WATCH_INTERVAL,
+                        help=f'フォルダを確認する間隔（秒、inotifyを使わない場合。既定: {WATCH_INTERVAL}）')
+    parser.add_argument('--stable-seconds', type=float, default=WATCH_STABLE_SECONDS,
+                        help=f'サイズ・更新日時がこの秒数変わらなければ書き込み済みとみなす（既定: {WATCH_STABLE_SECONDS}）')
+    parser.add_argument('--poll', action='store_true',
+                        help='inotifyを使わずに一定間隔で確認する')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='並列ワーカー数（csv_import.py の --workers と同じ）')
+    parser.add_argument('--chunk-workers', type=int, default=1,
+                        help='ファイル内並列数（csv_import.py の --chunk-workers と同じ）')
+    args = parser.parse_args()
+    
+    watch(args.interval, args.stable_seconds, args.workers, args.chunk_workers, not args.poll)
+
+if __name__ == '__main__':
+    main()
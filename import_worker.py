@@ -0,0 +1,304 @@
+# -*- coding: utf-8 -*-
+"""
+CSVインポートのバックグラウンドワーカー
+
+import_jobsテーブルに登録されたインポートジョブを古い順に1件ずつ実行する。
+Webインターフェースからはジョブ登録後にstart_worker()で起動され、キューが空になると終了する。
+
+実行中はインポートのトランザクションが書き込みロックを保持するため、
+進捗はDBではなくjobsフォルダの進捗ファイルに書き出す。
+"""
+
+import os
+import sys
+import io
+import json
+import time
+import sqlite3
+import argparse
+import threading
+import subprocess
+import traceback
+from contextlib import redirect_stdout, redirect_stderr
+from datetime import datetime
+import csv_import
+import db
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+JOB_FOLDER = os.path.join(SCRIPT_DIR, 'jobs')
+
+# 進捗ファイルを書き出す最小間隔（秒）
+PROGRESS_INTERVAL = 0.5
+
+# 進捗がこの秒数更新されない実行中ジョブは、ワーカーが異常終了したものとみなす
+JOB_STALE_SECONDS = 600
+
+# バッチの進捗がなくても進捗ファイルを書き出す間隔（秒、ワーカーが動作中であることを示す）
+HEARTBEAT_INTERVAL = 30
+
+# 進捗ファイルに含めるログの末尾の文字数
+PROGRESS_LOG_TAIL = 4000
+
+def get_progress_path(job_id):
+    """ジョブの進捗ファイルのパスを取得"""
+    return os.path.join(JOB_FOLDER, f"job_{job_id}.json")
+
+def read_progress(job_id):
+    """ジョブの進捗ファイルを読み込み（存在しない場合はNone）"""
+    try:
+        with open(get_progress_path(job_id), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+class JobProgress:
+    """インポートの進捗を集計し、進捗ファイルに書き出す（run_importのprogressに渡す）
+    
+    ハッシュ計算・インデックス作成・統計情報更新・スナップショットなど、バッチの進捗が出ない処理が
+    JOB_STALE_SECONDSより長くかかっても失敗とみなされないよう、ハートビートのスレッドで定期的に書き出す。
+    """
+    
+    def __init__(self, job, rows_total, file_count, log):
+        self.job = job
+        self.rows_total = rows_total
+        self.file_count = file_count
+        self.log = log
+        self.file_rows = {}
+        self.current_file = None
+        self.last_write = 0
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.heartbeat = None
+    
+    @property
+    def rows_done(self):
+        return sum(self.file_rows.values())
+    
+    def __call__(self, csv_path, rows):
+        # 逐次処理での再実行時はファイル内の行数が0から数え直される
+        self.file_rows[csv_path] = rows
+        self.current_file = os.path.basename(csv_path)
+        if time.monotonic() - self.last_write >= PROGRESS_INTERVAL:
+            self.write()
+    
+    def start_heartbeat(self):
+        """HEARTBEAT_INTERVAL秒ごとに進捗ファイルを書き出すスレッドを開始"""
+        def beat():
+            while not self.stopped.wait(HEARTBEAT_INTERVAL):
+                self.write()
+        
+        self.heartbeat = threading.Thread(target=beat, daemon=True)
+        self.heartbeat.start()
+    
+    def stop_heartbeat(self):
+        """ハートビートのスレッドを終了（進捗ファイルを削除する前に呼ぶ）"""
+        self.stopped.set()
+        if self.heartbeat:
+            self.heartbeat.join()
+    
+    def write(self):
+        """進捗ファイルを置き換える（読み込み側が書きかけのファイルを見ないようにする）"""
+        with self.lock:
+            self._write()
+    
+    def _write(self):
+        self.last_write = time.monotonic()
+        progress = {
+            'id': self.job['id'],
+            'started_at': self.job['started_at'],
+            'updated_at': datetime.now().isoformat(),
+            'rows_done': self.rows_done,
+            'rows_total': self.rows_total,
+            'file_count': self.file_count,
+            'current_file': self.current_file,
+            'log': self.log.getvalue()[-PROGRESS_LOG_TAIL:]
+        }
+        
+        path = get_progress_path(self.job['id'])
+        temp_path = path + '.tmp'
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(progress, f, ensure_ascii=False)
+            os.replace(temp_path, path)
+        except OSError as e:
+            print(f"進捗ファイル書き込みエラー: {e}", file=sys.stderr)
+
+def estimate_total_rows(csv_files):
+    """インポート対象の全ファイルのデータ行数を、ファイルサイズと先頭の1行あたりのバイト数から概算（ETAの計算用）
+    
+    ファイル全体は読まないため、大きなファイルでもインポートの開始を遅らせない。
+    """
+    # ヘッダーの有無は設定を読まないとわからないため、あるものとして数える
+    return sum(csv_import.estimate_row_count(csv_path) for csv_path, _, _ in csv_files)
+
+def get_job_files(job):
+    """ジョブに登録された対象ファイルの組のリストを取得（importフォルダ全体が対象の場合はNone）
+    
+    登録後に他のジョブで取り込まれるなどして、importフォルダからなくなった組は除く。
+    """
+    if not job.get('csv_files'):
+        return None
+    csv_files = []
+    for csv_path, config_path, base_name in json.loads(job['csv_files']):
+        if os.path.exists(csv_path) and os.path.exists(config_path):
+            csv_files.append((csv_path, config_path, base_name))
+        else:
+            print(f"ファイルがimportフォルダにないため、対象から除きます: {os.path.basename(csv_path)}")
+    return csv_files
+
+def run_job(job, csv_files=None):
+    """ジョブを1件実行し、結果をimport_jobsに記録
+    
+    csv_filesを指定すると、importフォルダを検索せずにそのファイルだけをインポートする。
+    省略した場合は、ジョブに登録された対象ファイル（なければimportフォルダ全体）をインポートする。
+    """
+    os.makedirs(JOB_FOLDER, exist_ok=True)
+    
+    log = io.StringIO()
+    progress = None
+    status = 'failed'
+    success_count = None
+    file_count = None
+    
+    try:
+        with redirect_stdout(log), redirect_stderr(log):
+            csv_import.ensure_folders()
+            if csv_files is None:
+                csv_files = get_job_files(job)
+            if csv_files is None:
+                csv_files = csv_import.get_csv_files()
+            progress = JobProgress(job, estimate_total_rows(csv_files), len(csv_files), log)
+            progress.write()
+            progress.start_heartbeat()
+            
+            success_count, file_count = csv_import.run_import(job['workers'], job['chunk_workers'],
+                                                              progress, csv_files)
+        if success_count == file_count:
+            status = 'done'
+    except Exception:
+        log.write(traceback.format_exc())
+    finally:
+        if progress:
+            progress.stop_heartbeat()
+    
+    db.finish_import_job(job['id'], status,
+                         progress.rows_done if progress else 0,
+                         progress.rows_total if progress else None,
+                         success_count, file_count, log.getvalue())
+    
+    try:
+        os.remove(get_progress_path(job['id']))
+    except OSError:
+        pass
+    
+    return status
+
+def recover_stale_jobs():
+    """進捗が途絶えた実行中ジョブを失敗として記録し、後続のジョブを実行できるようにする"""
+    now = time.time()
+    for job in db.get_import_jobs(limit=100, status='running'):
+        try:
+            last_update = os.path.getmtime(get_progress_path(job['id']))
+        except OSError:
+            last_update = datetime.fromisoformat(job['started_at']).timestamp()
+        
+        if now - last_update > JOB_STALE_SECONDS:
+            db.finish_import_job(job['id'], 'failed', job['rows_done'], job['rows_total'],
+                                 log="ワーカーの応答がないため、失敗として記録しました")
+            try:
+                os.remove(get_progress_path(job['id']))
+            except OSError:
+                pass
+
+def run_worker():
+    """キューが空になるまでジョブを実行し、実行したジョブ数を返す
+    
+    他のワーカーがジョブを実行中の場合は何もせずに終了する（そのワーカーが後続のジョブも実行する）。
+    """
+    db.init_database()
+    
+    job_count = 0
+    while True:
+        recover_stale_jobs()
+        job = db.claim_import_job()
+        if not job:
+            break
+        
+        print(f"ジョブ {job['id']} を開始します")
+        status = run_job(job)
+        print(f"ジョブ {job['id']} が終了しました（{status}）")
+        job_count += 1
+    
+    return job_count
+
+def start_worker():
+    """ワーカーを別プロセスとして起動（終了を待たずに戻る）"""
+    os.makedirs(JOB_FOLDER, exist_ok=True)
+    
+    # 呼び出し元（CGIなど）の終了や出力の終端に影響されないよう切り離して起動
+    options = {}
+    if os.name == 'nt':
+        options['creationflags'] = subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP
+    else:
+        options['start_new_session'] = True
+    
+    with open(os.path.join(JOB_FOLDER, 'worker.log'), 'a', encoding='utf-8') as worker_log:
+        subprocess.Popen([sys.executable, os.path.abspath(__file__)],
+                         cwd=SCRIPT_DIR,
+                         stdin=subprocess.DEVNULL,
+                         stdout=worker_log,
+                         stderr=worker_log,
+                         close_fds=True,
+                         **options)
+
+def get_job_status(job_id):
+    """ジョブの状態・進捗・処理速度・残り時間の見込みを取得（存在しない場合はNone）"""
+    try:
+        job = db.get_import_job(job_id)
+    except sqlite3.Error:
+        # 排他ロックのプロファイルでロード中はDBを読めないため、進捗ファイルだけで答える
+        job = None
+    
+    progress = read_progress(job_id)
+    if job is None and progress is None:
+        return None
+    
+    status = job if job else {'id': job_id, 'status': 'running'}
+    if progress and status['status'] == 'running':
+        status.update(progress)
+    
+    # 処理速度と残り時間（行数は改行数からの概算のため目安）
+    status['rows_per_sec'] = None
+    status['eta_seconds'] = None
+    if status.get('started_at'):
+        end_time = datetime.fromisoformat(status['finished_at']) if status.get('finished_at') else datetime.now()
+        elapsed = (end_time - datetime.fromisoformat(status['started_at'])).total_seconds()
+        if elapsed > 0:
+            status['rows_per_sec'] = round(status.get('rows_done', 0) / elapsed, 1)
+        if status['status'] == 'running' and status['rows_per_sec'] and status.get('rows_total'):
+            remaining = max(status['rows_total'] - status['rows_done'], 0)
+            status['eta_seconds'] = round(remaining / status['rows_per_sec'], 1)
+    
+    return status
+
+def main():
+    """メイン処理"""
+    parser = argparse.ArgumentParser(description='CSVインポートのバックグラウンドワーカー')
+    parser.add_argument('--enqueue', action='store_true',
+                        help='ジョブを登録してから実行する')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='登録するジョブの並列ワーカー数（csv_import.py の --workers と同じ）')
+    parser.add_argument('--chunk-workers', type=int, default=1,
+                        help='登録するジョブのファイル内並列数（csv_import.py の --chunk-workers と同じ）')
+    args = parser.parse_args()
+    
+    if args.enqueue:
+        db.init_database()
+        job_id = db.enqueue_import_job(args.workers, args.chunk_workers)
+        print(f"ジョブ {job_id} を登録しました")
+    
+    job_count = run_worker()
+    print(f"{job_count} 件のジョブを実行しました")
+
+if __name__ == '__main__':
+    main()
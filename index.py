@@ -1,8 +1,8 @@
 import sys
 import io
 import os
-import subprocess
 import json
+import sqlite3
 from datetime import datetime
 
 # Set stdout to UTF-8 to handle Japanese characters correctly
@@ -13,11 +13,30 @@ SCRIPT_PATH = os.path.dirname(__file__)
 IMPORT_FOLDER = os.path.join(SCRIPT_PATH, 'import')
 LOG_FOLDER = os.path.join(SCRIPT_PATH, 'log')
 
+# データ確認画面の絞り込み条件の表示名（db.FILTER_OPERATORSの演算子名 → 表示名）
+FILTER_OPERATOR_LABELS = {
+    'eq': '＝（等しい）',
+    'ge': '≧（以上）',
+    'le': '≦（以下）',
+    'gt': '＞（より大きい）',
+    'lt': '＜（より小さい）',
+    'prefix': 'で始まる',
+}
+
 # CGIフォームデータを取得
 import cgi
 form = cgi.FieldStorage()
 mode = form.getfirst("mode", '')
 
+def get_filter_params():
+    """絞り込み条件（カラム・演算子・値の組、値が空の条件は無視）と並び替えのパラメータを取得"""
+    filters = [(column, operator, value)
+               for column, operator, value in zip(form.getlist("fc"), form.getlist("fo"), form.getlist("fv"))
+               if column and value != ""]
+    sort = form.getfirst("sort", "") or None
+    descending = form.getfirst("order", "") == "desc"
+    return filters, sort, descending
+
 # CSVインポート実行機能
 if mode == 'import':
     print("Content-type: text/html; charset=UTF-8\n")
@@ -38,27 +57,38 @@ if mode == 'import':
         <pre class="bg-light p-3 rounded">
 """)
     
-    try:
-        # CSVインポートスクリプトを実行
-        result = subprocess.run([sys.executable, 'csv_import.py'], 
-                              cwd=SCRIPT_PATH,
-                              capture_output=True, 
-                              text=True, 
-                              encoding='utf-8')
+    sys.stdout.flush()
+    
+    # インポート処理は同じプロセス内で実行し、進捗を逐次ブラウザへ送る
+    import html
+    import csv_import
+    from contextlib import redirect_stdout, redirect_stderr
+    
+    class HtmlStream:
+        """書き込まれたテキストをHTMLエスケープし、すぐにレスポンスへ送り出す"""
+        def __init__(self, stream):
+            self.stream = stream
+        
+        def write(self, text):
+            self.stream.write(html.escape(text, quote=False))
+            self.stream.flush()
+            return len(text)
         
-        # 出力を表示
-        if result.stdout:
-            print(result.stdout)
-        if result.stderr:
-            print(f"エラー: {result.stderr}")
+        def flush(self):
+            self.stream.flush()
+    
+    output = HtmlStream(sys.stdout)
+    try:
+        with redirect_stdout(output), redirect_stderr(output):
+            success_count, file_count = csv_import.run_import()
         
-        if result.returncode == 0:
+        if success_count == file_count:
             print("\n✅ インポートが正常に完了しました！")
         else:
-            print(f"\n❌ インポートが失敗しました (終了コード: {result.returncode})")
+            print(f"\n❌ {file_count - success_count} ファイルのインポートが失敗しました")
             
     except Exception as e:
-        print(f"実行エラー: {e}")
+        print(f"実行エラー: {html.escape(str(e), quote=False)}")
     
     print("""
         </pre>
@@ -71,17 +101,134 @@ if mode == 'import':
 """)
     sys.exit(0)
 
+# バックグラウンドインポート（ジョブの登録・状態確認）
+if mode in ('enqueue', 'job_status', 'jobs'):
+    import db
+    import import_worker
+    
+    def print_json(data, status=None):
+        if status:
+            print(f"Status: {status}")
+        print("Content-type: application/json; charset=UTF-8\n")
+        print(json.dumps(data, ensure_ascii=False))
+    
+    if mode == 'enqueue':
+        # ジョブを登録してワーカーを起動し、インポートの完了を待たずに応答する
+        # （状態確認・一覧ではDBを初期化しない。排他ロックでロード中でも進捗ファイルから答えるため）
+        try:
+            db.init_database()
+        except sqlite3.Error as e:
+            print(f"データベース初期化エラー: {e}", file=sys.stderr)
+            job_id = None
+        else:
+            job_id = db.enqueue_import_job()
+        if job_id is None:
+            print_json({'error': 'ジョブを登録できませんでした'}, '500 Internal Server Error')
+        else:
+            import_worker.start_worker()
+            print_json({'job_id': job_id, 'status': 'queued'})
+    
+    elif mode == 'job_status':
+        try:
+            job_id = int(form.getfirst("job_id", ""))
+        except ValueError:
+            job_id = None
+        
+        job = import_worker.get_job_status(job_id) if job_id is not None else None
+        if job is None:
+            print_json({'error': 'ジョブが見つかりません'}, '404 Not Found')
+        else:
+            print_json(job)
+    
+    else:
+        try:
+            limit = min(max(int(form.getfirst("limit", "20")), 1), 100)
+        except ValueError:
+            limit = 20
+        
+        try:
+            jobs = db.get_import_jobs(limit)
+        except Exception as e:
+            print_json({'error': f'ジョブ一覧を取得できませんでした: {e}'}, '503 Service Unavailable')
+        else:
+            # 一覧ではログを省略（個別の状態確認で取得する）
+            for job in jobs:
+                job.pop('log', None)
+            print_json(jobs)
+    
+    sys.exit(0)
+
+# テーブルのエクスポート（CSV・JSON Lines、gzip圧縮は任意）
+if mode == 'export':
+    import db
+    import csv_export
+    
+    def print_error(message, status):
+        print(f"Status: {status}")
+        print("Content-type: text/plain; charset=UTF-8\n")
+        print(message)
+    
+    table_name = form.getfirst("table", "")
+    export_format = form.getfirst("format", csv_export.DEFAULT_EXPORT_FORMAT)
+    encoding = form.getfirst("encoding", csv_export.DEFAULT_EXPORT_ENCODING)
+    compress = form.getfirst("gzip", "") == "1"
+    filters, sort, descending = get_filter_params()
+    
+    if export_format not in csv_export.EXPORT_FORMATS:
+        print_error(f"format は {', '.join(csv_export.EXPORT_FORMATS)} のいずれかを指定してください", '400 Bad Request')
+        sys.exit(0)
+    if encoding not in csv_export.EXPORT_ENCODINGS:
+        print_error(f"encoding は {', '.join(csv_export.EXPORT_ENCODINGS)} のいずれかを指定してください", '400 Bad Request')
+        sys.exit(0)
+    
+    try:
+        columns, batches = db.export_table(table_name, filters, sort, descending)
+    except ValueError as e:
+        print_error(str(e), '400 Bad Request')
+        sys.exit(0)
+    if columns is None:
+        print_error(f"テーブル '{table_name}' は存在しません", '404 Not Found')
+        sys.exit(0)
+    
+    # ヘッダーを送ってから、行をバッチごとにそのまま書き出す
+    filename = csv_export.get_export_filename(table_name, export_format, compress)
+    print(f"Content-type: {csv_export.get_content_type(export_format, compress)}")
+    print(f'Content-Disposition: attachment; filename="{filename}"\n')
+    sys.stdout.flush()
+    csv_export.write_export(sys.stdout.buffer, columns, batches, export_format, compress, encoding)
+    sys.exit(0)
+
 # データ表示機能
 if mode == 'view':
     import db
     
+    # テーブル一覧のカタログを最新の形式に更新（排他ロックでロード中は次回に回す）
+    try:
+        db.init_database()
+    except sqlite3.Error as e:
+        print(f"データベース初期化エラー: {e}", file=sys.stderr)
+    
     print("Content-type: text/html; charset=UTF-8\n")
     
     # テーブル選択
     table_name = form.getfirst("table", "")
-    page = int(form.getfirst("page", "1"))
     limit = 50
-    offset = (page - 1) * limit
+    
+    # ページ位置（rowidのカーソル、並び替え時はページ番号）
+    def get_int_param(name):
+        value = form.getfirst(name, "")
+        try:
+            return int(value) if value else None
+        except ValueError:
+            return None
+    
+    after = get_int_param("after")
+    before = get_int_param("before")
+    last = form.getfirst("last", "") == "1"
+    page = max(get_int_param("page") or 1, 1)
+    
+    # 絞り込み条件と並び替え
+    filters, sort, descending = get_filter_params()
     
     print("""
 <!DOCTYPE html>
@@ -104,7 +251,15 @@ if mode == 'view':
 """)
     
     if not table_name:
+        # 再集計が指示された場合はカタログを実テーブルから補正
+        if form.getfirst("recount", "") == "1":
+            corrected = db.recount_import_tables()
+            print(f"""
+        <div class="alert alert-success">レコード数を再集計しました（補正: {len(corrected)} テーブル）</div>
+""")
+        
         # テーブル一覧を表示
+        import html
         tables = db.get_import_tables()
         
         if tables:
@@ -112,8 +267,9 @@ if mode == 'view':
         <div class="row">
             <div class="col-12">
                 <div class="card">
-                    <div class="card-header">
+                    <div class="card-header d-flex justify-content-between align-items-center">
                         <h3>インポート済みテーブル一覧</h3>
+                        <a href="index.py?mode=view&recount=1" class="btn btn-outline-secondary btn-sm">レコード数を再集計</a>
                     </div>
                     <div class="card-body">
                         <div class="table-responsive">
@@ -122,8 +278,10 @@ if mode == 'view':
                                     <tr>
                                         <th>テーブル名</th>
                                         <th>作成日時</th>
+                                        <th>最終インポート</th>
                                         <th>レコード数</th>
                                         <th>カラム数</th>
+                                        <th>スナップショット</th>
                                         <th>操作</th>
                                     </tr>
                                 </thead>
@@ -132,12 +290,16 @@ if mode == 'view':
             
             for table in tables:
                 created_at = table['created_at'][:19].replace('T', ' ') if table['created_at'] else '不明'
+                last_import_at = table['last_import_at'][:19].replace('T', ' ') if table['last_import_at'] else '-'
+                snapshot_at = table['snapshot_at'][:19].replace('T', ' ') if table['snapshot_at'] else '-'
                 print(f"""
                                     <tr>
                                         <td><strong>{table['table_name']}</strong></td>
                                         <td>{created_at}</td>
+                                        <td>{last_import_at}</td>
                                         <td>{table['record_count']:,}</td>
                                         <td>{len(table['columns'])}</td>
+                                        <td title="{html.escape(table['snapshot_path'] or '', quote=True)}">{snapshot_at}</td>
                                         <td>
                                             <a href="index.py?mode=view&table={table['table_name']}" class="btn btn-primary btn-sm">表示</a>
                                         </td>
@@ -163,9 +325,53 @@ if mode == 'view':
 """)
     else:
         # テーブルデータを表示
-        columns, data, total_count = db.get_table_data(table_name, limit, offset)
+        import html
+        from urllib.parse import urlencode
+        
+        def load_table_page(filters, sort):
+            """絞り込み・並び替えを適用した1ページ分を取得（並び替えなしはrowidのシーク方式）"""
+            if not sort:
+                return db.get_table_page(table_name, limit, after=after, before=before, last=last, filters=filters)
+            
+            columns, data, total_count = db.get_table_data(table_name, limit, (page - 1) * limit,
+                                                           filters, sort, descending)
+            if columns is None:
+                return None
+            return {
+                'columns': columns,
+                'rows': data,
+                'total_count': total_count,
+                'has_prev': page > 1,
+                'has_next': page * limit < total_count
+            }
         
-        if columns is None:
+        filter_error = None
+        try:
+            table_page = load_table_page(filters, sort)
+        except ValueError as e:
+            # 不正な条件の場合は、エラーを表示して絞り込みなしで表示
+            filter_error = str(e)
+            filters = []
+            sort = None
+            table_page = load_table_page(filters, sort)
+        
+        # 全文検索（検索語がある場合は、絞り込み・並び替えの代わりに関連度の高い順に上位を表示）
+        search_query = form.getfirst("q", "").strip()
+        fulltext_columns = db.get_fulltext_columns(table_name) if table_page else None
+        if fulltext_columns and search_query:
+            search_columns, search_rows = db.search_table(table_name, search_query, limit)
+            if search_columns is not None:
+                table_page = {
+                    'columns': search_columns,
+                    'rows': search_rows,
+                    'total_count': len(search_rows),
+                    'has_prev': False,
+                    'has_next': False
+                }
+        else:
+            search_query = ''
+        
+        if table_page is None:
             print(f"""
         <div class="alert alert-danger">
             <h4>テーブルが見つかりません</h4>
@@ -174,15 +380,88 @@ if mode == 'view':
         </div>
 """)
         else:
+            columns = table_page['columns']
+            data = table_page['rows']
+            total_count = table_page['total_count']
+            if search_query:
+                count_label = f'検索結果（関連度順・上位{limit}件まで）'
+            else:
+                count_label = '該当件数' if filters else '総件数'
+            
+            # 絞り込み・並び替えの条件（ページ送り・エクスポートのリンクに引き継ぐ）
+            condition_query = []
+            for condition in filters:
+                condition_query += list(zip(('fc', 'fo', 'fv'), condition))
+            if sort:
+                condition_query += [('sort', sort), ('order', 'desc' if descending else 'asc')]
+            
+            if filter_error:
+                print(f"""
+        <div class="alert alert-warning">{html.escape(filter_error)}</div>
+""")
+            
             print(f"""
         <div class="card mb-3">
             <div class="card-header">
                 <div class="d-flex justify-content-between align-items-center">
                     <h3>テーブル: {table_name}</h3>
-                    <span class="badge bg-info">総件数: {total_count:,}</span>
+                    <span class="badge bg-info">{count_label}: {total_count:,}</span>
                 </div>
             </div>
             <div class="card-body">
+""")
+            
+            if fulltext_columns:
+                print(f"""
+                <form method="get" action="index.py" class="mb-3">
+                    <input type="hidden" name="mode" value="view">
+                    <input type="hidden" name="table" value="{html.escape(table_name)}">
+                    <div class="input-group input-group-sm">
+                        <input type="search" name="q" class="form-control" value="{html.escape(search_query)}" placeholder="全文検索（{html.escape(', '.join(fulltext_columns))}）">
+                        <button type="submit" class="btn btn-outline-primary">全文検索</button>
+                    </div>
+                </form>
+""")
+            
+            # 絞り込み・並び替えのフォーム（既存の条件の下に空の行を1つ追加）
+            def column_options(selected, empty_label):
+                options = [f'<option value="">{empty_label}</option>']
+                for col in columns:
+                    mark = ' selected' if col == selected else ''
+                    options.append(f'<option value="{html.escape(col)}"{mark}>{html.escape(col)}</option>')
+                return ''.join(options)
+            
+            print(f"""
+                <form method="get" action="index.py" class="mb-3">
+                    <input type="hidden" name="mode" value="view">
+                    <input type="hidden" name="table" value="{html.escape(table_name)}">
+""")
+            for column, operator, value in filters + [('', 'eq', '')]:
+                operator_options = ''.join(
+                    f'<option value="{name}"{" selected" if name == operator else ""}>{label}</option>'
+                    for name, label in FILTER_OPERATOR_LABELS.items())
+                print(f"""
+                    <div class="row g-2 mb-2">
+                        <div class="col-md-4"><select name="fc" class="form-select form-select-sm">{column_options(column, '（絞り込むカラム）')}</select></div>
+                        <div class="col-md-3"><select name="fo" class="form-select form-select-sm">{operator_options}</select></div>
+                        <div class="col-md-5"><input type="text" name="fv" class="form-control form-control-sm" value="{html.escape(value)}" placeholder="値（空にすると条件を解除）"></div>
+                    </div>
+""")
+            print(f"""
+                    <div class="row g-2">
+                        <div class="col-md-4"><select name="sort" class="form-select form-select-sm">{column_options(sort, '（並び替えなし・取り込み順）')}</select></div>
+                        <div class="col-md-3">
+                            <select name="order" class="form-select form-select-sm">
+                                <option value="asc">昇順</option>
+                                <option value="desc"{' selected' if descending else ''}>降順</option>
+                            </select>
+                        </div>
+                        <div class="col-md-5">
+                            <button type="submit" class="btn btn-primary btn-sm">検索</button>
+                            <a href="index.py?mode=view&amp;table={html.escape(table_name)}" class="btn btn-outline-secondary btn-sm">条件をクリア</a>
+                        </div>
+                    </div>
+                </form>
                 <div class="table-container">
                     <table class="table table-striped table-hover">
                         <thead class="table-light">
@@ -216,39 +495,43 @@ if mode == 'view':
                 </div>
 """)
             
-            # ページング
-            if total_count > limit:
-                total_pages = (total_count + limit - 1) // limit
+            # ページング（rowidをカーソルにしたシーク方式、並び替え時はページ番号）
+            if table_page['has_prev'] or table_page['has_next']:
+                base_url = html.escape(f"index.py?{urlencode([('mode', 'view'), ('table', table_name)] + condition_query)}")
+                
+                if sort:
+                    last_page = max((total_count + limit - 1) // limit, 1)
+                    prev_url = f"{base_url}&amp;page={page - 1}"
+                    next_url = f"{base_url}&amp;page={page + 1}"
+                    last_url = f"{base_url}&amp;page={last_page}"
+                else:
+                    prev_url = f"{base_url}&amp;before={table_page['first_rowid']}"
+                    next_url = f"{base_url}&amp;after={table_page['last_rowid']}"
+                    last_url = f"{base_url}&amp;last=1"
                 print(f"""
                 <div class="d-flex justify-content-between align-items-center mt-3">
                     <div>
-                        <span class="text-muted">{(offset + 1)}-{min(offset + limit, total_count)} 件を表示 / 全 {total_count} 件</span>
+                        <span class="text-muted">{len(data)} 件を表示 / 全 {total_count:,} 件</span>
                     </div>
                     <nav>
                         <ul class="pagination mb-0">
 """)
                 
-                # 前のページ
-                if page > 1:
-                    print(f'                            <li class="page-item"><a class="page-link" href="index.py?mode=view&table={table_name}&page={page-1}">前へ</a></li>')
+                # 最初・前のページ
+                if table_page['has_prev']:
+                    print(f'                            <li class="page-item"><a class="page-link" href="{base_url}">最初へ</a></li>')
+                    print(f'                            <li class="page-item"><a class="page-link" href="{prev_url}">前へ</a></li>')
                 else:
+                    print('                            <li class="page-item disabled"><a class="page-link" href="#">最初へ</a></li>')
                     print('                            <li class="page-item disabled"><a class="page-link" href="#">前へ</a></li>')
                 
-                # ページ番号
-                start_page = max(1, page - 2)
-                end_page = min(total_pages, page + 2)
-                
-                for p in range(start_page, end_page + 1):
-                    if p == page:
-                        print(f'                            <li class="page-item active"><a class="page-link" href="#">{p}</a></li>')
-                    else:
-                        print(f'                            <li class="page-item"><a class="page-link" href="index.py?mode=view&table={table_name}&page={p}">{p}</a></li>')
-                
-                # 次のページ
-                if page < total_pages:
-                    print(f'                            <li class="page-item"><a class="page-link" href="index.py?mode=view&table={table_name}&page={page+1}">次へ</a></li>')
+                # 次・最後のページ
+                if table_page['has_next']:
+                    print(f'                            <li class="page-item"><a class="page-link" href="{next_url}">次へ</a></li>')
+                    print(f'                            <li class="page-item"><a class="page-link" href="{last_url}">最後へ</a></li>')
                 else:
                     print('                            <li class="page-item disabled"><a class="page-link" href="#">次へ</a></li>')
+                    print('                            <li class="page-item disabled"><a class="page-link" href="#">最後へ</a></li>')
                 
                 print("""
                         </ul>
@@ -259,6 +542,16 @@ if mode == 'view':
             print("""
                 <div class="mt-3">
                     <a href="index.py?mode=view" class="btn btn-secondary">テーブル一覧へ</a>
+""")
+            
+            # 表示中の絞り込み・並び替えの条件で全件をエクスポート
+            for export_format, label in (('csv', 'CSV'), ('ndjson', 'JSON Lines')):
+                export_query = [('mode', 'export'), ('table', table_name)] + condition_query + [('format', export_format)]
+                export_url = html.escape(f"index.py?{urlencode(export_query)}")
+                print(f'                    <a href="{export_url}" class="btn btn-outline-success">{label}でエクスポート</a>')
+                print(f'                    <a href="{export_url}&amp;gzip=1" class="btn btn-outline-success">{label}（gzip）</a>')
+            
+            print("""
                 </div>
             </div>
         </div>
@@ -300,15 +593,30 @@ print("""
                         <p class="text-muted">
                             importフォルダにCSVファイルと対応するJSON設定ファイルを配置してから実行ボタンを押してください。
                         </p>
-                        <form method="post">
-                            <input type="hidden" name="mode" value="import">
-                            <button type="submit" class="btn btn-primary me-2">
-                                <i class="bi bi-upload"></i> CSVインポート実行
-                            </button>
-                        </form>
+                        <button type="button" id="import-button" class="btn btn-primary me-2">
+                            <i class="bi bi-upload"></i> CSVインポート実行
+                        </button>
                         <a href="index.py?mode=view" class="btn btn-info">
                             <i class="bi bi-table"></i> データ確認
                         </a>
+                        <div id="job-progress" class="mt-3" style="display: none;">
+                            <div class="progress mb-2">
+                                <div id="job-progress-bar" class="progress-bar progress-bar-striped progress-bar-animated" role="progressbar" style="width: 0%"></div>
+                            </div>
+                            <div id="job-summary" class="small text-muted"></div>
+                            <pre id="job-log" class="bg-light p-2 rounded small mt-2" style="max-height: 200px; overflow-y: auto;"></pre>
+                        </div>
+                    </div>
+                </div>
+                
+                <div class="card mt-3">
+                    <div class="card-header">
+                        <h3>インポートジョブ</h3>
+                    </div>
+                    <div class="card-body">
+                        <div id="job-list" class="file-list">
+                            <p class="text-muted">読み込み中...</p>
+                        </div>
                     </div>
                 </div>
                 
@@ -400,6 +708,83 @@ print("""
             </div>
         </div>
         
+        <div class="row mt-4">
+            <div class="col-12">
+                <div class="card">
+                    <div class="card-header">
+                        <h3>インポートの計測値</h3>
+                    </div>
+                    <div class="card-body">
+""")
+
+# ファイルごとのインポートの計測値（最新20件）を表示
+import html
+import db
+import csv_import
+
+try:
+    db.init_database()
+    metrics = db.get_import_metrics(20)
+except Exception as e:
+    print(f"                        <p class='text-danger'>計測値を取得できません: {html.escape(str(e))}</p>")
+    metrics = None
+
+if metrics:
+    print("""                        <div class="table-responsive">
+                            <table class="table table-sm table-striped small">
+                                <thead>
+                                    <tr>
+                                        <th>日時</th><th>ファイル</th><th>テーブル</th><th>結果</th>
+                                        <th class="text-end">行数</th><th class="text-end">MB</th>
+                                        <th class="text-end">秒</th><th class="text-end">行/秒</th>
+                                        <th class="text-end">バッチ</th><th class="text-end">コミット（平均/最大）</th>
+                                        <th class="text-end">変換失敗行</th><th>変換できない値</th><th>処理段階ごとの秒数</th>
+                                    </tr>
+                                </thead>
+                                <tbody>""")
+    for entry in metrics:
+        counters = entry['counters']
+        seconds = entry['seconds'] or 0
+        rows = entry['row_count'] or 0
+        rate = f"{rows / seconds:,.0f}" if seconds else '-'
+        megabytes = f"{entry['byte_count'] / (1024 * 1024):,.1f}" if entry['byte_count'] is not None else '-'
+        commits = counters.get('commits')
+        if commits:
+            commit_text = (f"{counters['commit_seconds'] / commits * 1000:,.1f} / "
+                           f"{counters['commit_max_seconds'] * 1000:,.1f} ms（{commits}回）")
+        else:
+            commit_text = '-'
+        by_column = counters.get('conversion_errors_by_column') or {}
+        errors_text = ', '.join(f"{html.escape(column)} {count:,}" for column, count in by_column.items()) or '-'
+        result = ("<span class='badge bg-success'>成功</span>" if entry['success']
+                  else "<span class='badge bg-danger'>失敗</span>")
+        print(f"                                    <tr>")
+        print(f"                                        <td>{html.escape(entry['recorded_at'][:19].replace('T', ' '))}</td>")
+        print(f"                                        <td>{html.escape(entry['csv_name'] or '')}</td>")
+        print(f"                                        <td>{html.escape(entry['table_name'])}</td>")
+        print(f"                                        <td>{result}</td>")
+        print(f"                                        <td class='text-end'>{rows:,}</td>")
+        print(f"                                        <td class='text-end'>{megabytes}</td>")
+        print(f"                                        <td class='text-end'>{seconds:,.2f}</td>")
+        print(f"                                        <td class='text-end'>{rate}</td>")
+        print(f"                                        <td class='text-end'>{counters.get('batches', '-')}</td>")
+        print(f"                                        <td class='text-end'>{commit_text}</td>")
+        print(f"                                        <td class='text-end'>{counters.get('conversion_failed_rows', 0):,}</td>")
+        print(f"                                        <td>{errors_text}</td>")
+        print(f"                                        <td>{html.escape(csv_import.format_timings(entry['timings']))}</td>")
+        print(f"                                    </tr>")
+    print("""                                </tbody>
+                            </table>
+                        </div>""")
+elif metrics is not None:
+    print("                        <p class='text-muted'>計測値がありません</p>")
+
+print("""
+                    </div>
+                </div>
+            </div>
+        </div>
+        
         <div class="row mt-4">
             <div class="col-12">
                 <div class="card">
@@ -438,6 +823,104 @@ print("""
     </div>
     
     <script src="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/js/bootstrap.bundle.min.js"></script>
+    <script>
+        const statusLabels = {queued: '待機中', running: '実行中', done: '完了', failed: '失敗'};
+        const statusColors = {queued: 'secondary', running: 'primary', done: 'success', failed: 'danger'};
+        
+        function escapeHtml(text) {
+            const div = document.createElement('div');
+            div.textContent = text;
+            return div.innerHTML;
+        }
+        
+        function formatSeconds(seconds) {
+            if (seconds === null || seconds === undefined) return '-';
+            const s = Math.round(seconds);
+            return s >= 60 ? `${Math.floor(s / 60)}分${s % 60}秒` : `${s}秒`;
+        }
+        
+        // ジョブの状態を一定間隔で取得し、完了するまで進捗を表示
+        function pollJob(jobId) {
+            document.getElementById('job-progress').style.display = '';
+            fetch(`index.py?mode=job_status&job_id=${jobId}`)
+                .then(response => response.json())
+                .then(job => {
+                    const bar = document.getElementById('job-progress-bar');
+                    const done = job.rows_done || 0;
+                    const percent = job.rows_total ? Math.min(100, done * 100 / job.rows_total) : 0;
+                    bar.style.width = (job.status === 'done' ? 100 : percent) + '%';
+                    
+                    let summary = `ジョブ ${jobId}: ${statusLabels[job.status] || job.status} - ${done.toLocaleString()}`;
+                    if (job.rows_total) summary += ` / 約${job.rows_total.toLocaleString()}`;
+                    summary += ' 行';
+                    if (job.rows_per_sec) summary += `（${Math.round(job.rows_per_sec).toLocaleString()} 行/秒）`;
+                    if (job.status === 'running') summary += ` 残り約 ${formatSeconds(job.eta_seconds)}`;
+                    if (job.current_file && job.status === 'running') summary += ` - ${job.current_file}`;
+                    document.getElementById('job-summary').textContent = summary;
+                    
+                    const log = document.getElementById('job-log');
+                    log.textContent = job.log || '';
+                    log.scrollTop = log.scrollHeight;
+                    
+                    if (job.status === 'queued' || job.status === 'running') {
+                        setTimeout(() => pollJob(jobId), 1000);
+                    } else {
+                        bar.classList.remove('progress-bar-animated');
+                        bar.classList.add(job.status === 'done' ? 'bg-success' : 'bg-danger');
+                        document.getElementById('import-button').disabled = false;
+                        loadJobs();
+                    }
+                })
+                .catch(() => setTimeout(() => pollJob(jobId), 3000));
+        }
+        
+        function loadJobs() {
+            fetch('index.py?mode=jobs&limit=10')
+                .then(response => response.json())
+                .then(jobs => {
+                    const list = document.getElementById('job-list');
+                    if (!jobs.length) {
+                        list.innerHTML = "<p class='text-muted'>ジョブがありません</p>";
+                        return;
+                    }
+                    list.innerHTML = jobs.map(job => `
+                        <div class='d-flex justify-content-between align-items-center p-2 border-bottom'>
+                            <span>ジョブ ${job.id} <small class='text-muted'>${escapeHtml(job.created_at)}</small></span>
+                            <span>
+                                <small class='text-muted'>${job.file_count === null ? '' : `${job.success_count}/${job.file_count} ファイル`}</small>
+                                <span class='badge bg-${statusColors[job.status] || 'secondary'}'>${statusLabels[job.status] || escapeHtml(job.status)}</span>
+                            </span>
+                        </div>`).join('');
+                    
+                    // 実行中・待機中のジョブがあれば進捗の表示を再開
+                    const active = jobs.find(job => job.status === 'running' || job.status === 'queued');
+                    if (active && document.getElementById('job-progress').style.display === 'none') {
+                        document.getElementById('import-button').disabled = true;
+                        pollJob(active.id);
+                    }
+                })
+                .catch(() => {});
+        }
+        
+        document.getElementById('import-button').addEventListener('click', () => {
+            const button = document.getElementById('import-button');
+            button.disabled = true;
+            fetch('index.py', {method: 'POST', body: new URLSearchParams({mode: 'enqueue'})})
+                .then(response => response.json())
+                .then(result => {
+                    if (result.job_id) {
+                        loadJobs();
+                        pollJob(result.job_id);
+                    } else {
+                        alert(result.error || 'ジョブを登録できませんでした');
+                        button.disabled = false;
+                    }
+                })
+                .catch(() => { button.disabled = false; });
+        });
+        
+        loadJobs();
+    </script>
 </body>
 </html>
 """)
@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+"""
+インポート済みテーブルの列指向スナップショット
+
+テーブルの内容をParquet（またはArrow IPC）ファイルとしてsnapshotsフォルダに書き出し、
+ファイルの場所をカタログ（import_tables）に記録する。集計などの全件走査は
+SQLiteを経由せずにスナップショットを読めばよい。
+
+pyarrowがインストールされている場合のみ使用できる（ない場合は何もしない）。
+"""
+
+import os
+import sys
+import time
+import argparse
+from datetime import datetime
+import db
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+except ImportError:
+    pyarrow = None
+
+try:
+    import pyarrow.parquet as parquet
+except ImportError:
+    # Parquetのサポートなしでビルドされたpyarrowもある
+    parquet = None
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+SNAPSHOT_FOLDER = os.path.join(SCRIPT_DIR, 'snapshots')
+
+# スナップショットの形式と拡張子
+SNAPSHOT_FORMATS = {
+    'parquet': '.parquet',
+    'arrow': '.arrow',
+}
+
+# 1回に読み込んで書き出す行数（Parquetの行グループ・Arrowのレコードバッチの大きさ）
+SNAPSHOT_ROW_GROUP_SIZE = 100000
+
+def get_snapshot_format(preferred=None):
+    """使用できるスナップショットの形式を取得（pyarrowがない場合はNone）
+    
+    preferredを省略した場合はParquetを優先し、使えなければArrow IPCにする。
+    """
+    if pyarrow is None:
+        return None
+    if preferred == 'arrow' or parquet is None:
+        return 'arrow'
+    return 'parquet'
+
+def get_arrow_type(data_type):
+    """カラムのデータ型に対応するArrowの型を取得（ここにない型は文字列）"""
+    data_type = (data_type or '').split('(')[0].strip().upper()
+    if data_type == 'INTEGER':
+        return pyarrow.int64()
+    if data_type in ('REAL', 'DECIMAL'):
+        return pyarrow.float64()
+    if data_type == 'BOOLEAN':
+        return pyarrow.bool_()
+    if data_type == 'DATE':
+        return pyarrow.date32()
+    if data_type == 'DATETIME':
+        return pyarrow.timestamp('us')
+    return pyarrow.string()
+
+def to_record_batch(rows, schema):
+    """行のリストをArrowのレコードバッチ（カラムごとの配列）に変換"""
+    arrays = []
+    for field, values in zip(schema, zip(*rows) if rows else [[] for _ in schema]):
+        if pyarrow.types.is_string(field.type):
+            values = [value if value is None or isinstance(value, str) else str(value) for value in values]
+            arrays.append(pyarrow.array(values, type=field.type))
+        elif pyarrow.types.is_boolean(field.type):
+            # BOOLEANは0/1の整数で格納されている
+            arrays.append(pyarrow.array(values, type=pyarrow.int64()).cast(field.type))
+        elif pyarrow.types.is_date(field.type) or pyarrow.types.is_timestamp(field.type):
+            # DATE・DATETIMEはISO形式の文字列で格納されている
+            arrays.append(pyarrow.array(values, type=pyarrow.string()).cast(field.type))
+        else:
+            arrays.append(pyarrow.array(values, type=field.type))
+    return pyarrow.RecordBatch.from_arrays(arrays, schema=schema)
+
+def write_snapshot(table_name, snapshot_format=None):
+    """テーブルのスナップショットを書き出し、カタログに場所を記録する
+    
+    行はSNAPSHOT_ROW_GROUP_SIZE行ずつ読み込み、そのまま1つの行グループとして書き出す。
+    書き出し中のファイルは一時ファイルにし、完了後に置き換える（読み込み側が書きかけのファイルを見ないようにする）。
+    書き出したファイルのパスを返す。pyarrowがない場合・失敗時はNone。
+    """
+    snapshot_format = get_snapshot_format(snapshot_format)
+    if snapshot_format is None:
+        print("pyarrowがインストールされていないため、スナップショットを書き出しません", file=sys.stderr)
+        return None
+    
+    column_types = None
+    for table in db.get_import_tables():
+        if table['table_name'] == table_name:
+            column_types = {col['name']: col.get('type') for col in table['columns']}
+    if column_types is None:
+        print(f"テーブル '{table_name}' は存在しません", file=sys.stderr)
+        return None
+    
+    os.makedirs(SNAPSHOT_FOLDER, exist_ok=True)
+    path = os.path.join(SNAPSHOT_FOLDER, table_name + SNAPSHOT_FORMATS[snapshot_format])
+    temp_path = path + '.tmp'
+    
+    try:
+        columns, batches = db.export_table(table_name, batch_size=SNAPSHOT_ROW_GROUP_SIZE)
+        schema = pyarrow.schema([(name, get_arrow_type(column_types.get(name))) for name in columns])
+        
+        row_count = 0
+        if snapshot_format == 'parquet':
+            with parquet.ParquetWriter(temp_path, schema) as writer:
+                for batch in batches:
+                    writer.write_batch(to_record_batch(batch, schema), row_group_size=len(batch))
+                    row_count += len(batch)
+        else:
+            with pyarrow.OSFile(temp_path, 'wb') as sink, pyarrow.ipc.new_file(sink, schema) as writer:
+                for batch in batches:
+                    writer.write_batch(to_record_batch(batch, schema))
+                    row_count += len(batch)
+        
+        os.replace(temp_path, path)
+    except Exception as e:
+        print(f"スナップショット書き出しエラー: {e}", file=sys.stderr)
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        return None
+    
+    db.update_import_snapshot(table_name, path, datetime.now().isoformat())
+    print(f"スナップショットを書き出しました: {path}（{row_count} 行）")
+    return path
+
+def write_snapshots(table_names, snapshot_formats=None):
+    """複数のテーブルのスナップショットを書き出し、成功したテーブル数を返す
+    
+    snapshot_formatsはテーブル名 → 形式の辞書（省略したテーブルはParquetを優先）。
+    """
+    snapshot_formats = snapshot_formats or {}
+    success_count = 0
+    for table_name in table_names:
+        start = time.perf_counter()
+        if write_snapshot(table_name, snapshot_formats.get(table_name)):
+            success_count += 1
+            print(f"  処理時間: {time.perf_counter() - start:.2f}秒", flush=True)
+    return success_count
+
+def main():
+    """メイン処理"""
+    parser = argparse.ArgumentParser(description='インポート済みテーブルの列指向スナップショットを書き出す')
+    parser.add_argument('tables', nargs='*',
+                        help='対象のテーブル名（省略時はインポート済みのすべてのテーブル）')
+    parser.add_argument('--format', choices=list(SNAPSHOT_FORMATS),
+                        help='スナップショットの形式（既定: parquet、使えない場合はarrow）')
+    args = parser.parse_args()
+    
+    db.init_database()
+    tables = args.tables or [table['table_name'] for table in db.get_import_tables()]
+    success_count = write_snapshots(tables, {table_name: args.format for table_name in tables})
+    print(f"{success_count}/{len(tables)} テーブルのスナップショットを書き出しました")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+"""ファイル内並列読み込み（csv_import.read_csv_chunks）のテスト"""
+
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import csv_import
+
+ROW_COUNT = 1000
+
+class ReadCsvChunksTest(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.csv_path = os.path.join(self.temp_dir.name, 'items.csv')
+        self.config = {
+            'table_name': 'items',
+            'csv_settings': {'encoding': 'utf-8', 'delimiter': ',', 'has_header': True},
+            'batch_size': 30,
+            'column_mappings': [
+                {'csv_column': 'id', 'db_column': 'id', 'data_type': 'INTEGER'},
+                {'csv_column': 'flag', 'db_column': 'flag', 'data_type': 'BOOLEAN'},
+            ],
+        }
+        with open(self.csv_path, 'w', encoding='utf-8') as f:
+            f.write('id,flag\n')
+            for i in range(ROW_COUNT):
+                f.write(f"{i},{'maybe' if i % 100 == 0 else 'true'}\n")
+    
+    def tearDown(self):
+        self.temp_dir.cleanup()
+    
+    def test_batches_follow_batch_size(self):
+        """チャンクの行をbatch_size行ずつのバッチに分け、変換できない値の行番号はファイル全体で数える"""
+        chunks = csv_import.plan_csv_chunks(self.csv_path, self.config, chunk_bytes=2000)
+        self.assertGreater(len(chunks), 1)
+        
+        records = []
+        batches = list(csv_import.read_csv_chunks(self.csv_path, self.config, ['id', 'flag'], chunks, 2, [],
+                                                  on_errors=records.extend,
+                                                  batch_size=csv_import.get_batch_size(self.config)))
+        
+        self.assertTrue(all(0 < len(batch) <= 30 for batch in batches))
+        self.assertEqual([row[0] for batch in batches for row in batch], list(range(ROW_COUNT)))
+        self.assertEqual([row_number for row_number, _, _ in records], list(range(1, ROW_COUNT + 1, 100)))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""変換できない値の集計・リジェクトファイル・件数の上限（max_conversion_errors）のテスト"""
+
+import io
+import os
+import sys
+import csv
+import json
+import sqlite3
+import tempfile
+import unittest
+from contextlib import redirect_stdout, redirect_stderr
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import db
+import csv_import
+
+ROW_COUNT = 1000
+
+class ConversionLimitTest(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.saved = (csv_import.IMPORT_FOLDER, csv_import.LOG_FOLDER, db.DB_PATH)
+        csv_import.IMPORT_FOLDER = os.path.join(self.temp_dir.name, 'import')
+        csv_import.LOG_FOLDER = os.path.join(self.temp_dir.name, 'log')
+        db.DB_PATH = os.path.join(self.temp_dir.name, 'test.db')
+        csv_import.ensure_folders()
+        db.init_database()
+        
+        # 10%の行にBOOLEANとして変換できない値を含むファイル（上限50件を途中で超える）
+        config = {
+            'table_name': 'flags',
+            'csv_settings': {'encoding': 'utf-8', 'delimiter': ',', 'has_header': True},
+            'batch_size': 100,
+            'reject_file': True,
+            'max_conversion_errors': 50,
+            'column_mappings': [
+                {'csv_column': 'id', 'db_column': 'id', 'data_type': 'INTEGER'},
+                {'csv_column': 'flag', 'db_column': 'flag', 'data_type': 'BOOLEAN'},
+            ],
+        }
+        with open(os.path.join(csv_import.IMPORT_FOLDER, 'flags.csv'), 'w', encoding='utf-8') as f:
+            f.write('id,flag\n')
+            for i in range(ROW_COUNT):
+                f.write(f"{i},{'maybe' if i % 10 == 0 else 'true'}\n")
+        with open(os.path.join(csv_import.IMPORT_FOLDER, 'flags.json'), 'w', encoding='utf-8') as f:
+            json.dump(config, f)
+    
+    def tearDown(self):
+        db.get_database().close()
+        csv_import.IMPORT_FOLDER, csv_import.LOG_FOLDER, db.DB_PATH = self.saved
+        self.temp_dir.cleanup()
+    
+    def assert_aborted(self, success_count, file_count):
+        self.assertEqual((success_count, file_count), (0, 1))
+        
+        # ロールバックされ、ファイルはimportフォルダに残る
+        conn = sqlite3.connect(db.DB_PATH)
+        try:
+            self.assertEqual(conn.execute('SELECT COUNT(*) FROM flags').fetchone()[0], 0)
+        finally:
+            conn.close()
+        self.assertEqual(sorted(os.listdir(csv_import.IMPORT_FOLDER)), ['flags.csv', 'flags.json'])
+        
+        # リジェクトファイルには上限を超えるまでの値が書き出される
+        rejects = [name for name in os.listdir(csv_import.LOG_FOLDER) if name.endswith('_rejects.csv')]
+        self.assertEqual(len(rejects), 1)
+        with open(os.path.join(csv_import.LOG_FOLDER, rejects[0]), encoding='utf-8', newline='') as f:
+            rows = list(csv.reader(f))
+        self.assertEqual(rows[0], csv_import.REJECT_FILE_HEADER)
+        self.assertGreater(len(rows) - 1, 50)
+        self.assertEqual(rows[1], ['1', 'flag', 'BOOLEAN', 'maybe'])
+    
+    def run_import(self, workers):
+        with redirect_stdout(io.StringIO()), redirect_stderr(io.StringIO()):
+            return csv_import.run_import(workers)
+    
+    def test_sequential_abort(self):
+        """逐次処理では上限を超えた時点で中止する"""
+        self.assert_aborted(*self.run_import(1))
+    
+    def test_parallel_abort(self):
+        """並列処理でも上限を超えた時点で中止し、残りのバッチの読み捨てで失敗しない"""
+        self.assert_aborted(*self.run_import(2))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+"""データ型ごとの変換（null_policy）のテスト"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import csv_import
+
+class ColumnConverterTest(unittest.TestCase):
+    def convert(self, data_type, values, **options):
+        mapping = dict({'csv_column': 'value', 'db_column': 'value', 'data_type': data_type}, **options)
+        config = {'column_mappings': [mapping]}
+        convert_row = csv_import.compile_mapping_plan(['value'], config)
+        return [convert_row([value])[0] for value in values]
+    
+    def test_default_policy_keeps_unparsed_values(self):
+        """DATE・DATETIME・BOOLEAN・DECIMALでは、変換できない値を元の文字列のまま格納する"""
+        self.assertEqual(self.convert('DATE', ['2020-04-01', '2020/04/01', '']), ['2020-04-01', '2020/04/01', ''])
+        self.assertEqual(self.convert('DATETIME', ['2020-04-01T09:30:00', 'unknown']),
+                         ['2020-04-01 09:30:00', 'unknown'])
+        self.assertEqual(self.convert('BOOLEAN', ['Yes', 'maybe']), [1, 'maybe'])
+        self.assertEqual(self.convert('DECIMAL(10,2)', ['1.005', 'N/A']), [round(1.005, 2), 'N/A'])
+    
+    def test_default_policy_numeric_defaults(self):
+        """INTEGER・REALでは、変換できない値を0・0.0にする"""
+        self.assertEqual(self.convert('INTEGER', ['12', 'x', '']), [12, 0, 0])
+        self.assertEqual(self.convert('REAL', ['1.5', 'x']), [1.5, 0.0])
+    
+    def test_null_policy(self):
+        """null_policyがnullの場合は、変換できない値をNULLにする"""
+        self.assertEqual(self.convert('DATE', ['2020/04/01', '2020-04-01'], null_policy='null'), [None, '2020-04-01'])
+        self.assertEqual(self.convert('BOOLEAN', ['maybe'], null_policy='null'), [None])
+        self.assertEqual(self.convert('DATE', ['2020/04/01'], format='%Y/%m/%d'), ['2020-04-01'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""取り込み済みと同じ内容・設定のファイル（on_duplicate）の扱いのテスト"""
+
+import io
+import os
+import sys
+import json
+import sqlite3
+import tempfile
+import unittest
+from contextlib import redirect_stdout, redirect_stderr
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import db
+import csv_import
+
+ROW_COUNT = 1000
+
+class DuplicateImportTest(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.saved = (csv_import.IMPORT_FOLDER, csv_import.LOG_FOLDER, db.DB_PATH)
+        csv_import.IMPORT_FOLDER = os.path.join(self.temp_dir.name, 'import')
+        csv_import.LOG_FOLDER = os.path.join(self.temp_dir.name, 'log')
+        db.DB_PATH = os.path.join(self.temp_dir.name, 'test.db')
+        csv_import.ensure_folders()
+        db.init_database()
+        
+        # 同じ内容・設定のファイルを2組置く
+        config = {
+            'table_name': 'items',
+            'csv_settings': {'encoding': 'utf-8', 'delimiter': ',', 'has_header': True},
+            'column_mappings': [
+                {'csv_column': 'id', 'db_column': 'id', 'data_type': 'INTEGER'},
+                {'csv_column': 'name', 'db_column': 'name', 'data_type': 'TEXT'},
+            ],
+        }
+        content = 'id,name\n' + ''.join(f'{i},item{i}\n' for i in range(ROW_COUNT))
+        for base_name in ('items_a', 'items_b'):
+            with open(os.path.join(csv_import.IMPORT_FOLDER, f'{base_name}.csv'), 'w', encoding='utf-8') as f:
+                f.write(content)
+            with open(os.path.join(csv_import.IMPORT_FOLDER, f'{base_name}.json'), 'w', encoding='utf-8') as f:
+                json.dump(config, f)
+    
+    def tearDown(self):
+        db.get_database().close()
+        csv_import.IMPORT_FOLDER, csv_import.LOG_FOLDER, db.DB_PATH = self.saved
+        self.temp_dir.cleanup()
+    
+    def get_csv_files(self):
+        with redirect_stdout(io.StringIO()):
+            return sorted(csv_import.get_csv_files())
+    
+    def count_rows(self):
+        conn = sqlite3.connect(db.DB_PATH)
+        try:
+            return conn.execute('SELECT COUNT(*) FROM items').fetchone()[0]
+        finally:
+            conn.close()
+    
+    def assert_second_skipped(self):
+        self.assertEqual(self.count_rows(), ROW_COUNT)
+        self.assertEqual(os.listdir(csv_import.IMPORT_FOLDER), [])
+        duplicates = [name for name in os.listdir(csv_import.LOG_FOLDER) if name.endswith('_duplicate.csv')]
+        self.assertEqual(len(duplicates), 1)
+        self.assertTrue(duplicates[0].startswith('items_b_'))
+    
+    def test_sequential_skips_duplicate(self):
+        """逐次処理では2つ目のファイルを取り込まない"""
+        with redirect_stdout(io.StringIO()), redirect_stderr(io.StringIO()):
+            results = [csv_import.import_csv_file(csv_info) for csv_info in self.get_csv_files()]
+        
+        self.assertEqual(results, [True, True])
+        self.assert_second_skipped()
+    
+    def test_parallel_skips_duplicate(self):
+        """並列処理でも、同じ実行に含まれる2つ目のファイルを取り込まない"""
+        with redirect_stdout(io.StringIO()), redirect_stderr(io.StringIO()):
+            success_count = csv_import.import_csv_files_parallel(self.get_csv_files(), 2)
+        
+        self.assertEqual(success_count, 2)
+        self.assert_second_skipped()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""カタログの再集計（db.recount_import_tables）のテスト"""
+
+import os
+import sys
+import json
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import db
+
+class RecountImportTablesTest(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.saved_path = db.DB_PATH
+        db.DB_PATH = os.path.join(self.temp_dir.name, 'test.db')
+        db.init_database()
+    
+    def tearDown(self):
+        db.get_database().close()
+        db.DB_PATH = self.saved_path
+        self.temp_dir.cleanup()
+    
+    def get_catalog_columns(self, table_name):
+        for table in db.get_import_tables():
+            if table['table_name'] == table_name:
+                return [(column['name'], column['type']) for column in table['columns']]
+        return None
+    
+    def test_keeps_logical_types(self):
+        """DATE・DATETIME・BOOLEAN・DECIMALのカラムを型のずれとして扱わない"""
+        columns = [
+            {'name': 'id', 'type': 'INTEGER'},
+            {'name': 'hire_date', 'type': 'DATE'},
+            {'name': 'updated_at', 'type': 'DATETIME'},
+            {'name': 'active', 'type': 'BOOLEAN'},
+            {'name': 'price', 'type': 'DECIMAL(10,2)'},
+        ]
+        self.assertTrue(db.create_import_table('employees', columns))
+        db.insert_csv_batches('employees', [[[1, '2024-01-05', '2024-01-05 09:00:00', 1, 12.5]]])
+        
+        corrected = db.recount_import_tables()
+        
+        self.assertEqual(corrected, [])
+        self.assertEqual(self.get_catalog_columns('employees'),
+                         [(column['name'], column['type']) for column in columns])
+    
+    def test_corrects_changed_columns(self):
+        """実テーブルのカラムが変わった場合はカタログを更新する"""
+        self.assertTrue(db.create_import_table('items', [{'name': 'id', 'type': 'INTEGER'},
+                                                         {'name': 'day', 'type': 'DATE'}]))
+        with db.get_database().transaction() as conn:
+            conn.execute('ALTER TABLE items ADD COLUMN note TEXT')
+        
+        corrected = db.recount_import_tables('items')
+        
+        self.assertEqual(len(corrected), 1)
+        self.assertTrue(corrected[0]['columns_changed'])
+        self.assertEqual(self.get_catalog_columns('items'), [('id', 'INTEGER'), ('day', 'DATE'), ('note', 'TEXT')])
+
+    def get_catalog_row_count(self, table_name):
+        for table in db.get_import_tables():
+            if table['table_name'] == table_name:
+                return table['record_count']
+        return None
+    
+    def test_checkpoint_row_count(self):
+        """バッチごとにコミットする場合も、replace・upsertのレコード数が実テーブルと一致する"""
+        self.assertTrue(db.create_import_table('items', [{'name': 'id', 'type': 'INTEGER'},
+                                                         {'name': 'name', 'type': 'TEXT'}], primary_key=['id']))
+        
+        def insert(import_mode, batches):
+            checkpoint = {'file_hash': import_mode, 'csv_name': 'items.csv',
+                          'position': {'byte_offset': 0, 'row_number': 0}}
+            return db.insert_csv_batches('items', batches, checkpoint=checkpoint, import_mode=import_mode,
+                                         key_columns=['id'])
+        
+        self.assertEqual(insert('append', [[[i, 'a'] for i in range(10)]]), 10)
+        self.assertEqual(insert('replace', [[[i, 'b'] for i in range(3)], [[i, 'b'] for i in range(3, 5)]]), 5)
+        self.assertEqual(self.get_catalog_row_count('items'), 5)
+        
+        # 2行を更新し、2行を追加
+        self.assertEqual(insert('upsert', [[[3, 'c'], [4, 'c']], [[5, 'c'], [6, 'c']]]), 4)
+        self.assertEqual(self.get_catalog_row_count('items'), 7)
+
+if __name__ == '__main__':
+    unittest.main()